@@ -1,35 +1,127 @@
 from __future__ import annotations
 
+import asyncio
+import time
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.const import Platform
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .clearsky import MODE_SIMPLE
+from .const import CONF_ADAPTIVE_SCAN, CONF_EVENT_DRIVEN, CONF_MODE, DOMAIN, DATA_COORDINATOR, SERVICE_REFRESH_ALL
+from .coordinator import async_get_coordinator
+from .options import CompiledOptions, compile_options
+from .stats import EntryStats
+from .websocket import async_setup_websocket
 
 # Sensor + optionale Helper (binary_sensor)
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register domain-level services and websocket commands."""
+
+    async def _refresh_all(call: ServiceCall) -> ServiceResponse:
+        # alle geladenen Einträge parallel; laufende Neuberechnungen werden mitgenutzt
+        sensors = [
+            data["sensor"] for key, data in hass.data.get(DOMAIN, {}).items()
+            if key != DATA_COORDINATOR and data.get("sensor") is not None
+        ]
+        results = await asyncio.gather(*(sensor.async_refresh() for sensor in sensors))
+        if not call.return_response:
+            return None
+        return {sensor.entity_id: result for sensor, result in zip(sensors, results)}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REFRESH_ALL, _refresh_all, supports_response=SupportsResponse.OPTIONAL
+    )
+    async_setup_websocket(hass)
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Ältere Einträge auf die aktuelle Version heben."""
+    if entry.version > 2:
+        return False
+    if entry.version == 1:
+        # v1 rechnete in jedem Modus mit der einfachen Kurve -> Ausgabe unverändert lassen
+        data = {**entry.data}
+        options = {**entry.options}
+        if CONF_MODE in data:
+            data[CONF_MODE] = MODE_SIMPLE
+        if CONF_MODE in options:
+            options[CONF_MODE] = MODE_SIMPLE
+        # v1 rechnete im festen Intervall (scan_seconds) -> neue Takt-Modi nur auf Wunsch
+        for key in (CONF_ADAPTIVE_SCAN, CONF_EVENT_DRIVEN):
+            if key not in data and key not in options:
+                options[key] = False
+        hass.config_entries.async_update_entry(entry, data=data, options=options, version=2)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up config entry and reload on options changes."""
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {}
+    started = time.perf_counter()
+    # Optionen einmal kompilieren; Plattformen lesen nur noch den Schnappschuss
+    opts = compile_options({**entry.data, **entry.options})
+    entry_data = hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {"options": opts}
+    # gemeinsamer Koordinator für alle Einträge (Sonne + Wetterquellen einmal lesen)
+    coord = async_get_coordinator(hass)
+    stats = _async_set_stats(entry_data, coord, opts)
 
-    # Bei Options-Änderungen sauber neu laden
+    # Options-Änderungen: in place übernehmen, nur bei Bedarf neu laden
     entry.async_on_unload(entry.add_update_listener(_update_listener))
 
     # Plattformen starten
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if stats is not None:
+        stats.setup_seconds = time.perf_counter() - started
     return True
 
 
+def _async_set_stats(entry_data: dict, coord, opts: CompiledOptions) -> EntryStats | None:
+    """Instrumentierung des Eintrags an-/abschalten (``None`` = aus)."""
+    stats = entry_data.get("stats")
+    if not opts.instrumentation:
+        stats = None
+    elif stats is None:
+        stats = EntryStats()
+        coord.async_enable_stats()
+    entry_data["stats"] = stats
+    return stats
+
+
 async def _update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload the integration on any options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply options in place; reload only if entities have to be added/removed."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    new = compile_options({**entry.data, **entry.options})
+    old = entry_data.get("options") if entry_data else None
+    sensor = entry_data.get("sensor") if entry_data else None
+    if old is not None and new == old:
+        return
+    if old is None or sensor is None or old.requires_reload(new):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    entry_data["options"] = new
+    stats = _async_set_stats(entry_data, async_get_coordinator(hass), new)
+    if stats is not None:
+        stats.options_applied += 1
+    await sensor.async_apply_options(new)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload the integration entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        domain_data = hass.data.get(DOMAIN, {})
+        domain_data.pop(entry.entry_id, None)
+        # letzter Eintrag weg -> Koordinator abbauen
+        if set(domain_data) <= {DATA_COORDINATOR}:
+            coord = domain_data.pop(DATA_COORDINATOR, None)
+            if coord is not None:
+                coord.async_shutdown()
     return unload_ok
@@ -0,0 +1,260 @@
+# Illuminance Plus – Backfill in die Langzeitstatistik
+# © 2025 Martin Kluger – MIT
+
+"""Modellierte Lux für vergangene Zeiträume aus der Recorder-Historie.
+
+Liest die Historie der konfigurierten Quellen (Wetter, Cloud, Niederschlag,
+Sichtweite) tageweise in einem Rutsch, hält den jeweils letzten Wert auf
+einem Minutenraster, wertet das Dämpfungsmodell für den ganzen Tag in einem
+Stapelaufruf aus und importiert Stunden-Mittel/-Min/-Max als Langzeitstatistik
+der Sensor-Entität. Stunden, für die der Recorder bereits Statistik hat,
+bleiben unangetastet (sofern nicht ``overwrite``).
+
+Historie lesen und rechnen läuft im Recorder- bzw. Executor-Thread; pro
+Tages-Chunk liegt nur ein Tag an States im Speicher.
+
+Außerdem landen hier die abgeschlossenen Tage aus ``daily.py`` als externe
+Statistik (``async_import_daily``).
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    async_import_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, UNIT_LUX
+from .daily import DAILY_STATISTICS, bucket_start
+from .model import LuxModel
+from .options import CompiledOptions
+from .parsing import parse_precip_mm_h, parse_visibility_km, parse_weather
+from .solar import SolarEphemeris
+
+try:  # HA >= 2025.2
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # pragma: no cover
+    StatisticMeanType = None
+
+_LOGGER = logging.getLogger(__name__)
+
+CHUNK = timedelta(days=1)     # Historie/Statistik pro Durchlauf
+STEP = 60                     # s, Raster der Modellauswertung
+_HOUR = 3600
+_UNAVAILABLE = ("unavailable", "unknown")
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _metadata(statistic_id: str) -> dict[str, Any]:
+    meta: dict[str, Any] = {
+        "has_mean": True,
+        "has_sum": False,
+        "name": None,
+        "source": "recorder",
+        "statistic_id": statistic_id,
+        "unit_of_measurement": UNIT_LUX,
+    }
+    if StatisticMeanType is not None:
+        meta["mean_type"] = StatisticMeanType.ARITHMETIC
+    return meta
+
+
+def _series(states: list[State], parse) -> tuple[list[float], list[Any]]:
+    """(Zeitstempel, Werte) einer Quelle; unavailable/unknown -> None."""
+    ts: list[float] = []
+    vals: list[Any] = []
+    for st in states or ():
+        ts.append(st.last_updated.timestamp())
+        vals.append(None if st.state in _UNAVAILABLE else parse(st))
+    return ts, vals
+
+
+def _hold(series: tuple[list[float], list[Any]], grid: list[float], default: Any) -> list[Any]:
+    """Letzten bekannten Wert je Rasterpunkt halten (vor dem ersten State: ``default``)."""
+    ts, vals = series
+    out: list[Any] = []
+    for t in grid:
+        i = bisect_right(ts, t) - 1
+        v = vals[i] if i >= 0 else None
+        out.append(default if v is None else v)
+    return out
+
+
+def modeled_lux(
+    eph: SolarEphemeris,
+    grid: list[float],
+    sources: dict[str, list[State]],
+    opts: CompiledOptions,
+    model: LuxModel | None = None,
+):
+    """Roh-Lux auf dem Raster aus der Historie der Quellen (Stapelaufruf des Modells)."""
+    wx = _hold(_series(sources.get(opts.weather), parse_weather), grid, None)
+    weather = [None if w is None else w.condition for w in wx]
+    # wie im Live-Betrieb: eigene Sensoren vor den Attributen der Wetter-Entität
+    if opts.cloud:
+        cloud = _hold(_series(sources.get(opts.cloud), lambda st: _as_float(st.state)), grid, None)
+    else:
+        cloud = [None if w is None else w.cloud for w in wx]
+    if opts.precip:
+        precip = _hold(_series(sources.get(opts.precip), parse_precip_mm_h), grid, 0.0)
+    else:
+        precip = [0.0 if w is None or w.precip is None else w.precip for w in wx]
+    if opts.vis:
+        vis = _hold(_series(sources.get(opts.vis), parse_visibility_km), grid, 99.0)
+    else:
+        vis = [99.0 if w is None or w.vis is None else w.vis for w in wx]
+    return (model or opts.model).series(eph, grid, cloud, precip, vis, weather)
+
+
+def recorded_lux(states: list[State] | None, grid: list[float]) -> list[float | None]:
+    """Gespeicherte Werte eines Lux-Sensors auf dem Raster (vor dem ersten State: None)."""
+    return _hold(_series(states, lambda st: _as_float(st.state)), grid, None)
+
+
+def _hourly(
+    eph: SolarEphemeris,
+    start: float,
+    end: float,
+    sources: dict[str, list[State]],
+    opts: CompiledOptions,
+    skip: set[float],
+) -> list[dict[str, Any]]:
+    """Einen Chunk auswerten (läuft im Executor) -> Stunden-Statistik."""
+    grid = [float(t) for t in range(int(start), int(end), STEP)]
+    if not grid:
+        return []
+    lux = modeled_lux(eph, grid, sources, opts)
+
+    per_hour = _HOUR // STEP
+    rows: list[dict[str, Any]] = []
+    for i in range(0, len(grid), per_hour):
+        hour = grid[i]
+        if hour in skip:
+            continue
+        vals = [float(v) for v in lux[i:i + per_hour]]
+        rows.append({
+            "start": dt_util.utc_from_timestamp(hour),
+            "mean": sum(vals) / len(vals),
+            "min": min(vals),
+            "max": max(vals),
+        })
+    return rows
+
+
+def _existing_hours(hass: HomeAssistant, statistic_id: str, start: datetime, end: datetime) -> set[float]:
+    stats = statistics_during_period(hass, start, end, {statistic_id}, "hour", None, {"mean"})
+    out: set[float] = set()
+    for row in stats.get(statistic_id, ()):
+        begin = row["start"]
+        out.add(begin.timestamp() if isinstance(begin, datetime) else float(begin))
+    return out
+
+
+def read_history(
+    hass: HomeAssistant, start: datetime, end: datetime, entity_ids: list[str]
+) -> dict[str, list[State]]:
+    """Alle Zustandswechsel der Quellen im Chunk inkl. Zustand zu Chunk-Beginn."""
+    return history.get_significant_states(
+        hass,
+        start,
+        end,
+        entity_ids,
+        include_start_time_state=True,
+        significant_changes_only=False,
+        minimal_response=False,
+        no_attributes=False,
+    )
+
+
+async def async_backfill(
+    hass: HomeAssistant,
+    statistic_id: str,
+    opts: CompiledOptions,
+    start: datetime,
+    end: datetime,
+    overwrite: bool = False,
+) -> dict[str, Any]:
+    """Zeitraum ``start``–``end`` (auf volle Stunden gerundet) nachrechnen und importieren."""
+    start = dt_util.as_utc(start).replace(minute=0, second=0, microsecond=0)
+    end = min(dt_util.as_utc(end), dt_util.utcnow()).replace(minute=0, second=0, microsecond=0)
+    recorder = get_instance(hass)
+    sources = [eid for eid in (opts.weather, opts.cloud, opts.precip, opts.vis) if eid]
+    # eigene Ephemeride: Tagestabellen des Live-Betriebs nicht verdrängen
+    eph = SolarEphemeris(hass.config.latitude, hass.config.longitude)
+    meta = _metadata(statistic_id)
+    imported = skipped = 0
+
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + CHUNK, end)
+        skip: set[float] = set()
+        if not overwrite:
+            skip = await recorder.async_add_executor_job(
+                _existing_hours, hass, statistic_id, chunk_start, chunk_end
+            )
+        states: dict[str, list[State]] = {}
+        if sources:
+            states = await recorder.async_add_executor_job(
+                read_history, hass, chunk_start, chunk_end, sources
+            )
+        rows = await hass.async_add_executor_job(
+            _hourly, eph, chunk_start.timestamp(), chunk_end.timestamp(), states, opts, skip
+        )
+        if rows:
+            async_import_statistics(hass, meta, rows)
+        imported += len(rows)
+        skipped += len(skip)
+        chunk_start = chunk_end
+
+    _LOGGER.debug(
+        "Backfill %s %s–%s: %d hours imported, %d skipped", statistic_id, start, end, imported, skipped
+    )
+    return {
+        "statistic_id": statistic_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "hours_imported": imported,
+        "hours_skipped": skipped,
+    }
+
+
+def async_import_daily(hass: HomeAssistant, entry_id: str, name: str, summary: dict[str, Any]) -> None:
+    """Abgeschlossenen Tag als externe Langzeitstatistik importieren (je Kennzahl eine Stundenzeile)."""
+    if "recorder" not in hass.config.components:
+        return
+    start = dt_util.utc_from_timestamp(bucket_start(summary["start"]))
+    for key, unit in DAILY_STATISTICS:
+        value = summary.get(key)
+        if value is None:
+            continue
+        meta = {
+            "has_mean": True,
+            "has_sum": False,
+            "name": f"{name} {key.replace('_', ' ')}",
+            "source": DOMAIN,
+            "statistic_id": f"{DOMAIN}:{entry_id.lower()}_{key}",
+            "unit_of_measurement": unit,
+        }
+        if StatisticMeanType is not None:
+            meta["mean_type"] = StatisticMeanType.ARITHMETIC
+        try:
+            async_add_external_statistics(
+                hass, meta, [{"start": start, "mean": value, "min": value, "max": value}]
+            )
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.warning("Could not import daily statistic %s: %s", meta["statistic_id"], err)
@@ -4,101 +4,110 @@
 
 from __future__ import annotations
 
-from typing import Any, Optional
-
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.const import STATE_ON
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.util import slugify
 
-from .const import (
-    DOMAIN,
-    CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED,
-)
+from .const import DOMAIN, SIGNAL_RESULT
+from .options import CompiledOptions
+from .result import IlluminanceResult
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> None:
-    data = {**entry.data, **entry.options}
-    helpers = bool(data.get(CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED))
-    if not helpers:
-        return
-
-    # Haupt-Sensor anhand unique_id -> entity_id auflösen
-    reg = er.async_get(hass)
-    unique_id = f"{entry.entry_id}_lux"
-    main_entity_id: Optional[str] = None
-    for ent in reg.entities.values():
-        if ent.unique_id == unique_id and ent.platform == DOMAIN:
-            main_entity_id = ent.entity_id
-            break
-    if not main_entity_id:
-        return
-
-    name_base = data.get("name", "Illuminance Plus")
-    entities: list[BinarySensorEntity] = [
-        IllumPlusDarkHelper(hass, f"{name_base} – Dark", entry.entry_id, main_entity_id),
-        IllumPlusDarkSoonHelper(hass, f"{name_base} – Dark soon", entry.entry_id, main_entity_id),
+    opts: CompiledOptions = hass.data[DOMAIN][entry.entry_id]["options"]
+
+    # Kein Registry-Lookup nötig: Ergebnisse kommen per Dispatcher, adressiert über die entry_id
+    name_base = opts.name
+    entities: list[BinarySensorEntity] = []
+    if opts.helpers_enabled:
+        entities += [
+            IllumPlusDarkHelper(hass, f"{name_base} – Dark", entry.entry_id),
+            IllumPlusDarkSoonHelper(hass, f"{name_base} – Dark soon", entry.entry_id),
+        ]
+    # ein binary_sensor je Raum (is_dark mit den Schwellen des Raums)
+    entities += [
+        IllumPlusRoomDarkHelper(hass, f"{name_base} – {room} dark", entry.entry_id, idx, room)
+        for idx, room in enumerate(opts.room_names)
     ]
-    async_add_entities(entities)
+    if entities:
+        async_add_entities(entities)
 
 
-class _BaseAttrMirror(BinarySensorEntity):
-    """Basisklasse: spiegelt ein bool-Attribut des Hauptsensors."""
+class _BaseResultHelper(RestoreEntity, BinarySensorEntity):
+    """Basisklasse: spiegelt ein bool-Feld des Berechnungsergebnisses."""
 
     _attr_should_poll = False
+    _field: str = ""
 
-    def __init__(self, hass: HomeAssistant, name: str, entry_id: str, target_entity_id: str) -> None:
+    def __init__(self, hass: HomeAssistant, name: str, entry_id: str) -> None:
         self.hass = hass
         self._attr_name = name
         self._entry_id = entry_id
-        self._target = target_entity_id
         self._attr_unique_id = f"{entry_id}_{self.__class__.__name__}"
-        self._unsub = None
+        self._attr_is_on = None
+        self._entry_data: dict = {}
 
     async def async_added_to_hass(self) -> None:
-        # initial
-        self._update_from_target()
-        # live verfolgen
-        self._unsub = async_track_state_change_event(
-            self.hass, [self._target], self._on_target_change
+        # initial: letztes Ergebnis (falls der Hauptsensor schon gerechnet hat)
+        self._entry_data = self.hass.data[DOMAIN][self._entry_id]
+        last = self._entry_data.get("result")
+        if last is not None and (value := self._value(last)) is not None:
+            self._attr_is_on = value
+        elif (prev := await self.async_get_last_state()) is not None and prev.state in ("on", "off"):
+            # Hauptsensor hat noch nicht gerechnet -> letzten Wert zeigen statt "unknown"
+            self._attr_is_on = prev.state == STATE_ON
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_RESULT.format(self._entry_id), self._on_result)
         )
 
-    async def async_will_remove_from_hass(self) -> None:
-        if self._unsub:
-            self._unsub()
-            self._unsub = None
+    def _value(self, result: IlluminanceResult) -> bool | None:
+        return getattr(result, self._field)
 
     @callback
-    def _on_target_change(self, event) -> None:
-        self._update_from_target()
-
-    def _get_attr_bool(self, key: str) -> Optional[bool]:
-        st = self.hass.states.get(self._target)
-        if not st:
-            return None
-        val = st.attributes.get(key)
-        if isinstance(val, bool):
-            return val
-        return None
-
-    def _update_from_target(self) -> None:
-        # in abgeleiteter Klasse implementieren
-        raise NotImplementedError
+    def _on_result(self, result: IlluminanceResult) -> None:
+        """Nur schreiben, wenn der Wert kippt."""
+        value = self._value(result)
+        stats = self._entry_data.get("stats")
+        if stats is not None:
+            stats.helper_results += 1
+        if value is None or value == self._attr_is_on:
+            return
+        self._attr_is_on = value
+        if stats is not None:
+            stats.helper_writes += 1
+        self.async_write_ha_state()
 
 
-class IllumPlusDarkHelper(_BaseAttrMirror):
+class IllumPlusDarkHelper(_BaseResultHelper):
     """binary_sensor.* für is_dark"""
 
-    def _update_from_target(self) -> None:
-        val = self._get_attr_bool("is_dark")
-        self._attr_is_on = bool(val) if val is not None else None
-        self.async_write_ha_state()
+    _field = "is_dark"
 
 
-class IllumPlusDarkSoonHelper(_BaseAttrMirror):
+class IllumPlusDarkSoonHelper(_BaseResultHelper):
     """binary_sensor.* für dark_soon"""
 
-    def _update_from_target(self) -> None:
-        val = self._get_attr_bool("dark_soon")
-        self._attr_is_on = bool(val) if val is not None else None
-        self.async_write_ha_state()
+    _field = "dark_soon"
+
+
+class IllumPlusRoomDarkHelper(_BaseResultHelper):
+    """binary_sensor.* für is_dark eines Raums (eigene Schwellen über k/Empfindlichkeit)"""
+
+    def __init__(self, hass: HomeAssistant, name: str, entry_id: str, index: int, room: str) -> None:
+        super().__init__(hass, name, entry_id)
+        self._index = index
+        self._attr_unique_id = f"{entry_id}_room_{slugify(room)}"
+
+    def _value(self, result: IlluminanceResult) -> bool | None:
+        rooms = result.rooms
+        return rooms[self._index] if self._index < len(rooms) else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        opts: CompiledOptions | None = self._entry_data.get("options")
+        if opts is None or self._index >= len(opts.rooms):
+            return {}
+        return opts.rooms.attributes(self._index)
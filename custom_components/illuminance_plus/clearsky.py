@@ -0,0 +1,91 @@
+# Illuminance Plus – Clear-Sky-Modell
+# © 2025 Martin Kluger – MIT
+
+"""Beleuchtungsstärke bei klarem Himmel in Abhängigkeit von der Sonnenhöhe.
+
+Zwei Modelle:
+
+- ``simple``: die bisherige Kurve ``120 klx · sin(h)^1.5`` (0 lx ab Horizont).
+- ``normal`` (opt-in): Direktanteil über Luftmasse (Kasten/Young) und
+  atmosphärische Extinktion, dazu ein Diffusanteil des Himmels; unter dem
+  Horizont fällt die Helligkeit in der bürgerlichen Dämmerung log-linear ab
+  (~400 lx bei 0°) und wird im letzten Grad vor −6° stetig auf 0 lx
+  ausgeblendet.
+
+Beide Kurven werden beim Import einmal in eine Tabelle im Raster von
+``TABLE_STEP`` Grad geschrieben; eine Abfrage ist danach eine lineare
+Interpolation zwischen zwei Tabellenpunkten (konstanter Aufwand, auch für
+Prognosen und Stapelauswertungen).
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+
+MODE_NORMAL = "normal"
+MODE_SIMPLE = "simple"
+
+TABLE_MIN = -6.0          # darunter konstant 0 lx (Ende der bürgerlichen Dämmerung)
+TABLE_MAX = 90.0
+TABLE_STEP = 0.1          # Grad zwischen zwei Tabellenpunkten
+_POINTS = int(round((TABLE_MAX - TABLE_MIN) / TABLE_STEP)) + 1
+
+# Modell "normal"
+SOLAR_ILLUMINANCE = 128000.0   # lx, extraterrestrisch (Normalfläche)
+EXTINCTION = 0.21              # optische Dicke für sichtbares Licht bei klarer Luft
+DIFFUSE_ZENITH = 16000.0       # lx, Himmelsdiffuslicht bei Sonne im Zenit
+DIFFUSE_EXP = 0.8              # Form des Diffusanteils über sin(h)
+HORIZON_LUX = 400.0            # lx bei Sonnenhöhe 0°
+TWILIGHT_DECADES_PER_DEG = 0.35  # log10-Abfall je Grad unter dem Horizont
+TWILIGHT_TAPER_DEG = 1.0       # Grad vor TABLE_MIN, über die linear auf 0 lx ausgeblendet wird
+
+
+def _simple(elev: float) -> float:
+    if elev <= 0.0:
+        return 0.0
+    return 120000.0 * math.sin(math.radians(elev)) ** 1.5
+
+
+def _air_mass(elev: float) -> float:
+    """Relative Luftmasse nach Kasten/Young (1989), gültig bis zum Horizont."""
+    return 1.0 / (math.sin(math.radians(elev)) + 0.50572 * (elev + 6.07995) ** -1.6364)
+
+
+def _normal(elev: float) -> float:
+    if elev <= TABLE_MIN:
+        return 0.0
+    if elev <= 0.0:
+        # kein Sprung bei TABLE_MIN: im letzten Grad linear auf 0 auslaufen
+        taper = min(1.0, (elev - TABLE_MIN) / TWILIGHT_TAPER_DEG)
+        return taper * HORIZON_LUX * 10.0 ** (TWILIGHT_DECADES_PER_DEG * elev)
+    s = math.sin(math.radians(elev))
+    direct = SOLAR_ILLUMINANCE * math.exp(-EXTINCTION * _air_mass(elev)) * s
+    diffuse = HORIZON_LUX + (DIFFUSE_ZENITH - HORIZON_LUX) * s ** DIFFUSE_EXP
+    return direct + diffuse
+
+
+def _build(fn) -> array:
+    return array("d", (fn(TABLE_MIN + i * TABLE_STEP) for i in range(_POINTS)))
+
+
+_TABLES: dict[str, array] = {
+    MODE_NORMAL: _build(_normal),
+    MODE_SIMPLE: _build(_simple),
+}
+
+
+def table(mode: str) -> array:
+    """Tabelle eines Modells (unbekannter Modus -> ``simple``)."""
+    return _TABLES.get(mode) or _TABLES[MODE_SIMPLE]
+
+
+def clear_sky_lux(elev: float, mode: str) -> float:
+    """Clear-Sky-Lux für eine Sonnenhöhe in Grad, aus der Tabelle interpoliert."""
+    if elev <= TABLE_MIN:
+        return 0.0
+    tbl = table(mode)
+    pos = (min(elev, TABLE_MAX) - TABLE_MIN) / TABLE_STEP
+    i = min(int(pos), _POINTS - 2)
+    v0 = tbl[i]
+    return v0 + (tbl[i + 1] - v0) * (pos - i)
@@ -14,10 +14,12 @@ from homeassistant.helpers.selector import (
     EntitySelector, EntitySelectorConfig,
     SelectSelector, SelectSelectorConfig, SelectOptionDict,
     NumberSelector, NumberSelectorConfig, NumberSelectorMode,
-    TextSelector,
+    TextSelector, TextSelectorConfig,
     BooleanSelector,
 )
 
+from .rooms import RoomConfigError, parse_rooms
+from .windows import WindowConfigError, parse_windows
 from .const import (
     DOMAIN,
     DEFAULT_NAME, DEFAULT_MODE, DEFAULT_SCAN_SECONDS, DEFAULT_MAX_CLOUD_DIV, DEFAULT_SMOOTH_SECONDS,
@@ -34,12 +36,30 @@ from .const import (
     CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED,
     CONF_WINDOWS_ENABLED, CONF_WINDOWS_YAML, CONF_GLARE_ENABLED,
     DEFAULT_WINDOWS_ENABLED, DEFAULT_WINDOWS_YAML, DEFAULT_GLARE_ENABLED,
+    CONF_EVENT_DRIVEN, CONF_DEBOUNCE_SECONDS, DEFAULT_EVENT_DRIVEN, DEFAULT_DEBOUNCE_SECONDS,
+    CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN,
+    CONF_DIAGNOSTIC_ENTITY, DEFAULT_DIAGNOSTIC_ENTITY,
+    CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION,
+    CONF_REFERENCE_ENTITY,
+    CONF_ROOMS_YAML, DEFAULT_ROOMS_YAML,
+    CONF_DAILY_SUMMARY, DEFAULT_DAILY_SUMMARY,
 )
 
 def _validate_thresholds(user_input: dict[str, Any]) -> str | None:
     on_thr = float(user_input.get(CONF_ON, 800))
     off_thr = float(user_input.get(CONF_OFF, 2000))
-    return "thresholds" if on_thr > off_thr else None
+    if on_thr >= off_thr:
+        return "thresholds"
+    if user_input.get(CONF_WINDOWS_ENABLED):
+        try:
+            parse_windows(user_input.get(CONF_WINDOWS_YAML))
+        except WindowConfigError:
+            return "windows_yaml"
+    try:
+        parse_rooms(user_input.get(CONF_ROOMS_YAML))
+    except RoomConfigError:
+        return "rooms_yaml"
+    return None
 
 def _build_options_schema(values: dict[str, Any] | None = None) -> vol.Schema:
     v = values or {}
@@ -62,12 +82,20 @@ def _build_options_schema(values: dict[str, Any] | None = None) -> vol.Schema:
         vol.Optional(CONF_VIS, default=v.get(CONF_VIS)): EntitySelector(
             EntitySelectorConfig(domain="sensor")
         ),
+        vol.Optional(CONF_REFERENCE_ENTITY, default=v.get(CONF_REFERENCE_ENTITY)): EntitySelector(
+            EntitySelectorConfig(domain="sensor", device_class="illuminance")
+        ),
         vol.Required(CONF_MODE, default=v.get(CONF_MODE, DEFAULT_MODE)): SelectSelector(
             SelectSelectorConfig(options=modes)
         ),
         vol.Required(CONF_SCAN, default=v.get(CONF_SCAN, DEFAULT_SCAN_SECONDS)): NumberSelector(
             NumberSelectorConfig(min=30, max=900, step=10, mode=NumberSelectorMode.BOX, unit_of_measurement="s")
         ),
+        vol.Optional(CONF_ADAPTIVE_SCAN, default=v.get(CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN)): BooleanSelector(),
+        vol.Optional(CONF_EVENT_DRIVEN, default=v.get(CONF_EVENT_DRIVEN, DEFAULT_EVENT_DRIVEN)): BooleanSelector(),
+        vol.Optional(CONF_DEBOUNCE_SECONDS, default=v.get(CONF_DEBOUNCE_SECONDS, DEFAULT_DEBOUNCE_SECONDS)): NumberSelector(
+            NumberSelectorConfig(min=0, max=300, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="s")
+        ),
         vol.Optional(CONF_SMOOTH_SECONDS, default=v.get(CONF_SMOOTH_SECONDS, DEFAULT_SMOOTH_SECONDS)): NumberSelector(
             NumberSelectorConfig(min=0, max=900, step=10, mode=NumberSelectorMode.BOX, unit_of_measurement="s")
         ),
@@ -114,15 +142,24 @@ def _build_options_schema(values: dict[str, Any] | None = None) -> vol.Schema:
 
         # --- Helper-Entities (optional) ---
         vol.Optional(CONF_HELPERS_ENABLED, default=v.get(CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED)): BooleanSelector(),
+        vol.Optional(CONF_DIAGNOSTIC_ENTITY, default=v.get(CONF_DIAGNOSTIC_ENTITY, DEFAULT_DIAGNOSTIC_ENTITY)): BooleanSelector(),
+        vol.Optional(CONF_DAILY_SUMMARY, default=v.get(CONF_DAILY_SUMMARY, DEFAULT_DAILY_SUMMARY)): BooleanSelector(),
+        vol.Optional(CONF_INSTRUMENTATION, default=v.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION)): BooleanSelector(),
 
         # --- Fenster / Blendung (optional) ---
         vol.Optional(CONF_WINDOWS_ENABLED, default=v.get(CONF_WINDOWS_ENABLED, DEFAULT_WINDOWS_ENABLED)): BooleanSelector(),
         vol.Optional(CONF_GLARE_ENABLED, default=v.get(CONF_GLARE_ENABLED, DEFAULT_GLARE_ENABLED)): BooleanSelector(),
         vol.Optional(CONF_WINDOWS_YAML, default=v.get(CONF_WINDOWS_YAML, DEFAULT_WINDOWS_YAML)): TextSelector(),
+
+        # --- Räume (optional) ---
+        vol.Optional(CONF_ROOMS_YAML, default=v.get(CONF_ROOMS_YAML, DEFAULT_ROOMS_YAML)): TextSelector(
+            TextSelectorConfig(multiline=True)
+        ),
     })
 
 class IlluminancePlusConfigFlow(ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    # 2: Modus "normal" ist das physikalische Modell; alte Einträge -> "simple"
+    VERSION = 2
 
     def __init__(self) -> None:
         self._name: str = "Illuminance Plus"
@@ -4,11 +4,19 @@
 
 DOMAIN = "illuminance_plus"
 
+# Schlüssel in hass.data[DOMAIN] neben den entry_ids
+DATA_COORDINATOR = "coordinator"
+
+# Dispatcher-Signal mit dem Ergebnis jeder Berechnung (.format(entry_id))
+SIGNAL_RESULT = f"{DOMAIN}_result_{{}}"
+# dasselbe für alle Einträge (entry_id, Ergebnis) – auch später geladene
+SIGNAL_RESULT_ANY = f"{DOMAIN}_result"
+
 # Einheit für Lux (robuster Fallback, unabhängig von HA-Version)
 UNIT_LUX = "lx"
 
 DEFAULT_NAME = "Illuminance Plus"
-DEFAULT_MODE = "normal"  # normal | simple
+DEFAULT_MODE = "simple"  # simple | normal (physikalisches Modell, opt-in)
 DEFAULT_SCAN_SECONDS = 120
 DEFAULT_FALLBACK = 10.0
 DEFAULT_MAX_CLOUD_DIV = 10.0
@@ -71,6 +79,63 @@ DEFAULT_WINDOWS_ENABLED = False
 DEFAULT_WINDOWS_YAML = ""                        # leer = keine Fenster
 DEFAULT_GLARE_ENABLED = True                     # wenn Fenster aktiv: Blend-Risiko berechnen
 
+# ------------- NEU: Räume -------------
+CONF_ROOMS_YAML = "rooms_yaml"                  # YAML-Liste (name, k, optional sensitivity)
+DEFAULT_ROOMS_YAML = ""                          # leer = keine Räume
+
+# ------------- NEU: Ereignisgesteuerte Neuberechnung -------------
+CONF_EVENT_DRIVEN = "event_driven"              # bei Quell-Änderungen neu rechnen
+CONF_DEBOUNCE_SECONDS = "debounce_seconds"      # Mindestabstand zwischen zwei Neuberechnungen
+DEFAULT_EVENT_DRIVEN = True
+DEFAULT_DEBOUNCE_SECONDS = 10
+SAFETY_SCAN_SECONDS = 900                        # Timer im Event-Modus nur noch als Sicherheitsnetz
+
+# ------------- NEU: Adaptiver Takt -------------
+CONF_ADAPTIVE_SCAN = "adaptive_scan"            # Intervall aus Sonnenkurve/Schwellen-Abstand/Trend
+DEFAULT_ADAPTIVE_SCAN = True
+
+# ------------- NEU: Restore / Start -------------
+RESTORE_MAX_AGE = 6 * 3600                       # s; älterer Zustand wird nicht übernommen
+STARTUP_WAIT_SECONDS = 120                       # max. Warten auf Quellen beim HA-Start
+
+# Auslöser einer Neuberechnung (für Zähler)
+TRIGGER_START = "start"
+TRIGGER_TIMER = "timer"
+TRIGGER_SOURCE = "source"
+TRIGGER_OPTIONS = "options"
+TRIGGER_SERVICE = "service"
+
+# Dienste
+SERVICE_REFRESH = "refresh"                     # Entity-Dienst (sensor)
+SERVICE_REFRESH_ALL = "refresh_all"             # alle Einträge auf einmal
+SERVICE_BACKFILL = "backfill"                   # Entity-Dienst: Historie -> Langzeitstatistik
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_OVERWRITE = "overwrite"
+SERVICE_SIMULATE = "simulate"                   # Entity-Dienst: Schwellen an vergangenen Tagen testen
+ATTR_SOURCE = "source"
+ATTR_CANDIDATES = "candidates"
+WS_SUBSCRIBE = f"{DOMAIN}/subscribe"            # Websocket: Ergebnisse live abonnieren
+
+# ------------- NEU: Schreib-Unterdrückung / Diagnose-Entität -------------
+CONF_DIAGNOSTIC_ENTITY = "diagnostic_entity"    # Diagnose-Attribute auf eigene Entität auslagern
+DEFAULT_DIAGNOSTIC_ENTITY = False
+WRITE_DEADBAND_LUX = 10.0                        # Totzone absolut (lx)
+WRITE_DEADBAND_REL = 0.02                        # Totzone relativ (2 %)
+WRITE_MAX_SILENCE = 900                          # spätestens nach X s trotzdem schreiben
+DIAG_MIN_INTERVAL = 600                          # Diagnose-Entität höchstens alle X s schreiben
+
+# ------------- NEU: Instrumentierung -------------
+CONF_INSTRUMENTATION = "instrumentation"        # Zähler/Laufzeiten für Diagnose sammeln
+DEFAULT_INSTRUMENTATION = False
+
+# ------------- NEU: Tageswerte -------------
+CONF_DAILY_SUMMARY = "daily_summary"            # Tages-Akkumulatoren + Tages-Entität/Statistik
+DEFAULT_DAILY_SUMMARY = False
+
+# ------------- NEU: Kalibrierung -------------
+CONF_REFERENCE_ENTITY = "reference_entity"     # echter Lux-Sensor (optional) für Online-Kalibrierung
+
 # Mapping, wenn KEIN numerischer Cloud-%-Sensor vorhanden
 WEATHER_FACTORS = {
     "exceptional": 1.0, "sunny": 1.0, "clear": 1.0,
@@ -0,0 +1,118 @@
+# Illuminance Plus – Steuerlogik
+# © 2025 Martin Kluger – MIT
+
+"""Glättung, Hysterese und deren Replay über eine Roh-Lux-Reihe.
+
+``ema_step`` und ``dark_step`` sind die Glättung und Hysterese der Entität
+(``IlluminancePlus._compute`` ruft genau diese Funktionen auf). ``replay``
+wendet sie auf eine Roh-Lux-Reihe für viele Kandidaten in einem Durchlauf an:
+die geglättete Reihe wird nur einmal pro ``smooth_seconds`` berechnet, die
+Hysterese aller Kandidaten mit gleicher Glättung läuft im selben Zeitschritt.
+
+Ohne Home-Assistant-Importe, damit Dienst (``simulate.py``), Entität und
+Tests dieselbe Logik verwenden.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Sequence
+
+if TYPE_CHECKING:
+    from .options import CompiledOptions
+
+MAX_SWITCHES = 100            # Schaltzeitpunkte je Kandidat in der Antwort
+
+
+def ema_step(prev: float | None, raw: float, dt: float, tau: float) -> float:
+    """Ein Schritt des exponentiell gleitenden Mittelwerts über ``tau`` Sekunden."""
+    if tau <= 0 or prev is None:
+        return raw
+    alpha = 1.0 - math.exp(-dt / max(1.0, tau))
+    return (1.0 - alpha) * prev + alpha * raw
+
+
+def dark_step(prev: bool | None, control: float, on_eff: float, off_eff: float) -> bool:
+    """Hysterese: dunkel ab ``on_eff``, hell ab ``off_eff``, dazwischen halten."""
+    if prev is None:
+        return control <= on_eff
+    if control <= on_eff:
+        return True
+    if control >= off_eff:
+        return False
+    return prev
+
+
+# ---------- Replay ----------
+
+def candidate(opts: CompiledOptions, params: dict[str, Any]) -> dict[str, float]:
+    """Kandidat aus Teil-Parametern; Fehlendes kommt aus den aktuellen Optionen."""
+    on = float(params.get("on_threshold", opts.on_base))
+    off = float(params.get("off_threshold", opts.off_base))
+    sens = max(5.0, min(300.0, float(params.get("dark_sensitivity", opts.sens_pct))))
+    tau = max(0.0, float(params.get("smooth_seconds", opts.tau)))
+    if on >= off:
+        raise ValueError(f"on_threshold ({on:g}) must be below off_threshold ({off:g})")
+    return {
+        "on_threshold": on,
+        "off_threshold": off,
+        "dark_sensitivity": sens,
+        "smooth_seconds": tau,
+        "on_eff": on * sens / 100.0,
+        "off_eff": off * sens / 100.0,
+    }
+
+
+def replay(
+    ts: Sequence[float], raw: Sequence[float | None], candidates: list[dict[str, float]]
+) -> list[dict[str, Any]]:
+    """Alle Kandidaten über dieselbe Roh-Reihe laufen lassen (Lücken = ``None`` werden übersprungen)."""
+    results: list[dict[str, Any]] = [
+        {"flips": 0, "dark_seconds": 0.0, "switches": []} for _ in candidates
+    ]
+    groups: dict[float, list[int]] = {}
+    for i, cand in enumerate(candidates):
+        groups.setdefault(cand["smooth_seconds"], []).append(i)
+
+    for tau, members in groups.items():
+        on = [candidates[i]["on_eff"] for i in members]
+        off = [candidates[i]["off_eff"] for i in members]
+        out = [results[i] for i in members]
+        dark: list[bool | None] = [None] * len(members)
+        ema: float | None = None
+        last_t: float | None = None
+        for t, lux in zip(ts, raw):
+            if lux is None:
+                continue
+            dt = 0.0 if last_t is None else max(1.0, t - last_t)
+            ema = ema_step(ema, lux, dt, tau)
+            for j in range(len(members)):
+                prev = dark[j]
+                if prev:
+                    out[j]["dark_seconds"] += dt
+                now = dark_step(prev, ema, on[j], off[j])
+                if prev is not None and now != prev:
+                    res = out[j]
+                    res["flips"] += 1
+                    if len(res["switches"]) < MAX_SWITCHES:
+                        res["switches"].append(
+                            {"time": datetime.fromtimestamp(t, timezone.utc).isoformat(), "is_dark": now}
+                        )
+                dark[j] = now
+            last_t = t
+        for j in range(len(members)):
+            out[j]["final_is_dark"] = dark[j]
+
+    for cand, res in zip(candidates, results):
+        res["dark_minutes"] = round(res.pop("dark_seconds") / 60.0, 1)
+        res["switches_truncated"] = res["flips"] > len(res["switches"])
+        res.update({
+            "on_threshold": cand["on_threshold"],
+            "off_threshold": cand["off_threshold"],
+            "dark_sensitivity": cand["dark_sensitivity"],
+            "smooth_seconds": cand["smooth_seconds"],
+            "on_threshold_eff": round(cand["on_eff"], 0),
+            "off_threshold_eff": round(cand["off_eff"], 0),
+        })
+    return results
@@ -0,0 +1,400 @@
+# Illuminance Plus – gemeinsamer Eingabe-Koordinator
+# © 2025 Martin Kluger – MIT
+
+"""Ein Koordinator pro Domain, geteilt von allen Config-Entries.
+
+Er hält die zuletzt bekannten State-Objekte aller konfigurierten Quellen
+(Wetter, Cloud/Rain/Visibility), parst und normalisiert sie
+genau einmal pro State-Änderung und verteilt Änderungen an die Entitäten,
+die sich für diese Quelle interessieren. Aufwand und State-Machine-Zugriffe
+wachsen damit mit der Zahl *verschiedener* Quellen, nicht mit der Zahl der
+Einträge.
+
+Die Wetter-Entität wird mit einem State-Read komplett ausgewertet: Zustand
+plus ``cloud_coverage``, ``visibility`` und ``precipitation`` aus ihren
+Attributen (inkl. ``*_unit``). Eigene Sensoren haben Vorrang; fehlen sie,
+füllen die Attribute der Wetter-Entität die Lücke.
+
+Numerische Quellen laufen durch eine robuste Eingangsstufe (``inputs.py``:
+Hampel-Filter mit Sprung-Bestätigung, Halten des letzten guten Werts); die
+State-Änderung selbst füttert den Filter. Der Referenzsensor (``lux``) bleibt
+ungefiltert. Jede Quelle darf höchstens
+alle ``SOURCE_MIN_TRIGGER_INTERVAL`` Sekunden eine Neuberechnung auslösen;
+Änderungen dazwischen werden zu einem nachgereichten Auslöser gebündelt,
+überbrückte Ausfälle lösen gar nicht aus.
+
+Der Sonnenstand kommt aus der lokalen Ephemeride (``solar.py``);
+``sun.sun`` dient nur noch als Auslöser für Neuberechnungen (und entfällt
+ganz, wenn der adaptive Takt der Sonnenkurve selbst folgt).
+"""
+
+from __future__ import annotations
+
+import time
+from functools import partial
+from typing import Any, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_COORDINATOR
+from .forecast import ForecastCache
+from .inputs import SOURCE_MIN_TRIGGER_INTERVAL, SourceFilter
+from .parsing import (
+    INCH_RATES,
+    MILES,
+    WeatherInputs,
+    parse_number,
+    parse_precip_mm_h,
+    parse_visibility_km,
+    parse_weather,
+)
+from .solar import SolarEphemeris
+from .stats import CoordinatorStats
+from .twilight import TwilightTracker
+
+SUN_ENTITY = "sun.sun"
+
+# Parse-Arten mit Einheiten-Umrechnung (nur für die Instrumentierung)
+_CONVERTED_UNITS = {"precip": INCH_RATES, "visibility": MILES}
+_UNAVAILABLE = ("unavailable", "unknown")
+
+
+@callback
+def async_get_coordinator(hass: HomeAssistant) -> "IlluminanceCoordinator":
+    """Gemeinsamen Koordinator holen (legt ihn beim ersten Aufruf an)."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    coord = domain_data.get(DATA_COORDINATOR)
+    if coord is None:
+        coord = domain_data[DATA_COORDINATOR] = IlluminanceCoordinator(hass)
+    return coord
+
+
+class IlluminanceCoordinator:
+    """Geteilte, pro State-Objekt gecachte Eingaben aller Einträge."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # zuletzt bekannte States der verfolgten Quellen
+        self._states: dict[str, State | None] = {}
+        # Referenzzähler + Rückrufe je Quelle
+        self._refs: dict[str, int] = {}
+        self._listeners: dict[str, list[Callable[[str], None]]] = {}
+        # Parse-Cache: (entity_id, art) -> (State, Wert); gültig solange das State-Objekt gleich ist
+        self._parsed: dict[tuple[str, str], tuple[State | None, Any]] = {}
+        # Eingangsfilter je Quelle und Art (mit Parser) und Auslöse-Drosselung je Quelle
+        self._filters: dict[str, dict[str, tuple[SourceFilter, Callable[[State], Any]]]] = {}
+        self._last_trigger: dict[str, float] = {}
+        self._trigger_timers: dict[str, CALLBACK_TYPE] = {}
+        # Ablauf gehaltener Werte je Quelle (dann mit Defaults neu rechnen)
+        self._stale_timers: dict[str, CALLBACK_TYPE] = {}
+        self._triggers: dict[str, int] = {}
+        self._suppressed: dict[str, int] = {}
+        self._unsub_track: CALLBACK_TYPE | None = None
+        self._ephemeris: SolarEphemeris | None = None
+        # stündliche Wetterprognosen (TTL-Cache, geteilt von allen Einträgen)
+        self.forecasts = ForecastCache(hass)
+        # Dämmerungs-Übergänge (ein Punkt-Timer für alle Einträge)
+        self.twilight = TwilightTracker(hass, lambda: self.ephemeris)
+        # Instrumentierung (None = aus; wird vom ersten instrumentierten Eintrag angelegt)
+        self.stats: CoordinatorStats | None = None
+
+    # ---------- Abonnements ----------
+
+    @callback
+    def async_track(
+        self, entity_ids: list[str], action: Callable[[str], None] | None = None
+    ) -> CALLBACK_TYPE:
+        """Quellen verfolgen; ``action`` wird bei jeder Änderung mit der entity_id aufgerufen."""
+        added = False
+        for eid in entity_ids:
+            if self._refs.get(eid, 0) == 0:
+                self._states[eid] = self.hass.states.get(eid)
+                if self.stats is not None:
+                    self.stats.state_machine_reads += 1
+                added = True
+            self._refs[eid] = self._refs.get(eid, 0) + 1
+            if action is not None:
+                self._listeners.setdefault(eid, []).append(action)
+        if added:
+            self._resubscribe()
+
+        @callback
+        def _remove() -> None:
+            removed = False
+            for eid in entity_ids:
+                if action is not None and action in self._listeners.get(eid, ()):
+                    self._listeners[eid].remove(action)
+                    if not self._listeners[eid]:
+                        del self._listeners[eid]
+                self._refs[eid] -= 1
+                if self._refs[eid] <= 0:
+                    del self._refs[eid]
+                    self._states.pop(eid, None)
+                    removed = True
+            if removed:
+                self._parsed = {k: v for k, v in self._parsed.items() if k[0] in self._refs}
+                self._filters = {k: v for k, v in self._filters.items() if k in self._refs}
+                for eid in entity_ids:
+                    if eid not in self._refs:
+                        self._forget_source(eid)
+                self._resubscribe()
+
+        return _remove
+
+    def _resubscribe(self) -> None:
+        if self._unsub_track:
+            self._unsub_track()
+            self._unsub_track = None
+        if self._refs:
+            self._unsub_track = async_track_state_change_event(
+                self.hass, list(self._refs), self._on_state_change
+            )
+
+    @callback
+    def _on_state_change(self, event) -> None:
+        eid = event.data["entity_id"]
+        new = event.data.get("new_state")
+        self._states[eid] = new
+        # jedes State-Objekt sofort (genau einmal) in die Filter der Quelle
+        filters = self._filters.get(eid)
+        now = dt_util.utcnow().timestamp()
+        confirm: float | None = None
+        if filters:
+            for kind, (filt, parse) in filters.items():
+                filt.observe(new, self._state_ts(new, now), self._cached(eid, kind, parse))
+                wait_confirm = filt.confirm_in(now)
+                if wait_confirm is not None:
+                    confirm = wait_confirm if confirm is None else max(confirm, wait_confirm)
+        if eid not in self._listeners:
+            return
+        self._schedule_stale(eid, now)
+        # Ausfall mit gehaltenem Wert bzw. verdächtiger Sprung: Ergebnis ändert sich (noch) nicht
+        held = new is not None and new.state in _UNAVAILABLE and self._holding(eid, now)
+        if held or confirm is not None:
+            self._suppressed[eid] = self._suppressed.get(eid, 0) + 1
+            if confirm is not None:
+                # nach Ablauf der Bestätigungszeit neu rechnen (dann ggf. mit dem Sprung)
+                self._schedule_trigger(eid, confirm + 1.0, replace=True)
+            return
+        last = self._last_trigger.get(eid)
+        wait = 0.0 if last is None else last + SOURCE_MIN_TRIGGER_INTERVAL - time.monotonic()
+        if wait > 0 or eid in self._trigger_timers:
+            # gedrosselt: ein Auslöser am Ende des Intervalls mit dem dann aktuellen State
+            self._suppressed[eid] = self._suppressed.get(eid, 0) + 1
+            self._schedule_trigger(eid, max(0.0, wait))
+            return
+        self._notify(eid)
+
+    def _schedule_trigger(self, eid: str, delay: float, replace: bool = False) -> None:
+        timer = self._trigger_timers.get(eid)
+        if timer is not None:
+            if not replace:
+                return
+            timer()
+        self._trigger_timers[eid] = async_call_later(
+            self.hass, delay, partial(self._deferred_trigger, eid)
+        )
+
+    @callback
+    def _deferred_trigger(self, eid: str, _now) -> None:
+        self._trigger_timers.pop(eid, None)
+        if eid in self._listeners:
+            self._notify(eid)
+
+    def _schedule_stale(self, eid: str, now: float) -> None:
+        """Timer auf den Verfall des gehaltenen Werts setzen bzw. nach Erholung lösen."""
+        unsub = self._stale_timers.pop(eid, None)
+        if unsub is not None:
+            unsub()
+        waits = [
+            wait for filt, _parse in self._filters.get(eid, {}).values()
+            if (wait := filt.stale_in(now)) is not None
+        ]
+        if waits:
+            self._stale_timers[eid] = async_call_later(
+                self.hass, min(waits) + 1.0, partial(self._on_stale, eid)
+            )
+
+    @callback
+    def _on_stale(self, eid: str, now) -> None:
+        self._stale_timers.pop(eid, None)
+        if eid not in self._listeners:
+            return
+        self._notify(eid)
+        # weitere Arten derselben Quelle mit späterem Ablauf
+        self._schedule_stale(eid, now.timestamp())
+
+    @staticmethod
+    def _state_ts(st: State | None, now: float) -> float:
+        return now if st is None else st.last_updated.timestamp()
+
+    def _notify(self, eid: str) -> None:
+        self._last_trigger[eid] = time.monotonic()
+        self._triggers[eid] = self._triggers.get(eid, 0) + 1
+        for action in tuple(self._listeners.get(eid, ())):
+            action(eid)
+
+    def _holding(self, eid: str, now: float) -> bool:
+        return any(filt.current(now) is not None for filt, _parse in self._filters.get(eid, {}).values())
+
+    def _forget_source(self, eid: str) -> None:
+        for timers in (self._trigger_timers, self._stale_timers):
+            unsub = timers.pop(eid, None)
+            if unsub is not None:
+                unsub()
+        for table in (self._last_trigger, self._triggers, self._suppressed):
+            table.pop(eid, None)
+
+    @callback
+    def async_shutdown(self) -> None:
+        self.twilight.async_shutdown()
+        if self._unsub_track:
+            self._unsub_track()
+            self._unsub_track = None
+        self._refs.clear()
+        self._listeners.clear()
+        self._states.clear()
+        self._parsed.clear()
+        self._filters.clear()
+        for eid in {*self._trigger_timers, *self._stale_timers}:
+            self._forget_source(eid)
+        self._last_trigger.clear()
+        self._triggers.clear()
+        self._suppressed.clear()
+
+    # ---------- gecachte Eingaben ----------
+
+    def _get_state(self, entity_id: str) -> State | None:
+        if entity_id in self._refs:
+            return self._states.get(entity_id)
+        # nicht verfolgt (sollte nicht vorkommen) -> direkt lesen
+        if self.stats is not None:
+            self.stats.state_machine_reads += 1
+        return self.hass.states.get(entity_id)
+
+    def _cached(self, entity_id: str | None, kind: str, parse: Callable[[State], Any]) -> Any:
+        if not entity_id:
+            return None
+        st = self._get_state(entity_id)
+        key = (entity_id, kind)
+        hit = self._parsed.get(key)
+        if hit is not None and hit[0] is st:
+            return hit[1]
+        value = None if st is None else parse(st)
+        self._parsed[key] = (st, value)
+        stats = self.stats
+        if stats is not None:
+            stats.parses += 1
+            units = _CONVERTED_UNITS.get(kind)
+            if units and value is not None and str(st.attributes.get("unit_of_measurement", "")).lower() in units:
+                stats.unit_conversions += 1
+        return value
+
+    def _filtered(self, entity_id: str | None, kind: str, parse: Callable[[State], Any]) -> float | None:
+        """Wie ``_cached``, aber durch den Eingangsfilter der Quelle (Ausreißer, Ausfälle).
+
+        State-Änderungen arbeitet ``_on_state_change`` ein; hier nur der
+        Anfangszustand (bzw. ein State, der ohne Ereignis kam).
+        """
+        if not entity_id:
+            return None
+        kinds = self._filters.setdefault(entity_id, {})
+        hit = kinds.get(kind)
+        if hit is None:
+            hit = kinds[kind] = (SourceFilter(kind), parse)
+        filt = hit[0]
+        st = self._get_state(entity_id)
+        now = dt_util.utcnow().timestamp()
+        filt.observe(st, self._state_ts(st, now), self._cached(entity_id, kind, parse))
+        return filt.current(now)
+
+    def source_health(self, entity_ids) -> dict[str, Any]:
+        """Gesundheit je Quelle: Auslöser (gedrosselt) und Filterzustand je Art."""
+        now = dt_util.utcnow().timestamp()
+        out: dict[str, Any] = {}
+        for eid in entity_ids:
+            health: dict[str, Any] = {
+                "available": self.available(eid),
+                "triggers": self._triggers.get(eid, 0),
+                "triggers_suppressed": self._suppressed.get(eid, 0),
+            }
+            for kind, (filt, _parse) in self._filters.get(eid, {}).items():
+                health[kind] = filt.health(now)
+            out[eid] = health
+        return out
+
+    def available(self, entity_id: str) -> bool:
+        """False, wenn die Quelle fehlt oder unavailable/unknown ist."""
+        st = self._get_state(entity_id)
+        return st is not None and st.state not in _UNAVAILABLE
+
+    @callback
+    def async_enable_stats(self) -> CoordinatorStats:
+        if self.stats is None:
+            self.stats = CoordinatorStats()
+        return self.stats
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Zustand des Koordinators für den Diagnose-Download."""
+        return {
+            "tracked_sources": {eid: self._refs[eid] for eid in sorted(self._refs)},
+            "parse_cache_entries": len(self._parsed),
+            "sources": self.source_health(sorted(self._refs)),
+            "stats": None if self.stats is None else self.stats.as_dict(),
+        }
+
+    @property
+    def ephemeris(self) -> SolarEphemeris:
+        """Sonnen-Ephemeride für den Standort der HA-Instanz."""
+        lat, lon = self.hass.config.latitude, self.hass.config.longitude
+        eph = self._ephemeris
+        if eph is None or eph.lat != lat or eph.lon != lon:
+            eph = self._ephemeris = SolarEphemeris(lat, lon)
+        return eph
+
+    def sun(self, ts: float | None = None) -> tuple[float, float]:
+        """(Elevation, Azimut) zum Zeitpunkt ``ts`` (Standard: jetzt)."""
+        if ts is None:
+            ts = dt_util.utcnow().timestamp()
+        return self.ephemeris.position(ts)
+
+    def weather(self, entity_id: str | None) -> WeatherInputs | None:
+        """Zustand und Attribute der Wetter-Entität (ein Parse pro State-Objekt)."""
+        return self._cached(entity_id, "weather", parse_weather)
+
+    def inputs(
+        self, weather: str | None, cloud: str | None, precip: str | None, vis: str | None
+    ) -> tuple[str | None, float | None, float, float]:
+        """(Zustand, Wolken %, mm/h, km) – eigene Sensoren vor den Wetter-Attributen."""
+        wx = self.weather(weather)
+        if wx is None:
+            wx = _NO_WEATHER
+        cloud_val = self.number(cloud) if cloud else wx.cloud
+        precip_val = self.precip_mm_h(precip) if precip else wx.precip
+        vis_val = self.visibility_km(vis) if vis else wx.vis
+        return (
+            wx.condition,
+            cloud_val,
+            precip_val or 0.0,
+            99.0 if vis_val is None else vis_val,
+        )
+
+    def number(self, entity_id: str | None) -> float | None:
+        return self._filtered(entity_id, "number", parse_number)
+
+    def lux(self, entity_id: str | None) -> float | None:
+        """Referenz-Lux ungefiltert: schnelle echte Sprünge sind Messsignal der Kalibrierung."""
+        return self._cached(entity_id, "lux", parse_number)
+
+    def precip_mm_h(self, entity_id: str | None) -> float | None:
+        """Niederschlag in mm/h (in/h wird umgerechnet)."""
+        return self._filtered(entity_id, "precip", parse_precip_mm_h)
+
+    def visibility_km(self, entity_id: str | None) -> float | None:
+        """Sichtweite in km (Meilen werden umgerechnet)."""
+        return self._filtered(entity_id, "visibility", parse_visibility_km)
+
+
+_NO_WEATHER = WeatherInputs(None, None, None, None)
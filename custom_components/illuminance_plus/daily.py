@@ -0,0 +1,160 @@
+# Illuminance Plus – Tageswerte
+# © 2025 Martin Kluger – MIT
+
+"""Laufende Tages-Akkumulatoren statt Recorder-Abfragen.
+
+Pro Berechnung wird das Intervall seit dem letzten Sample zeitgewichtet
+integriert (Lux: Trapez, ``is_dark``: Halten) – O(1) pro Zyklus. Zur lokalen
+Mitternacht wird der Tag abgeschlossen und als kompakte Zusammenfassung
+geliefert: Lux-Stunden, Minuten dunkel, erster/letzter ``is_dark``-Wechsel,
+Spitzenwert. Der Zustand ist klein genug für die Restore-Daten der Entität.
+
+Die Zusammenfassung geht an die Tages-Entität und als externe
+Langzeitstatistik (``illuminance_plus:<entry>_lux_hours`` usw.) in den Recorder
+(``backfill.async_import_daily``). Das Modul selbst braucht kein Home
+Assistant; die lokale Zeitzone wird übergeben.
+
+Der Recorder kennt nur Stunden-Buckets (Beginn zur vollen UTC-Stunde). Jeder
+Tag wird daher als genau eine Stundenzeile abgelegt, und zwar in der ersten
+vollen UTC-Stunde ab lokaler Mitternacht (``bucket_start``). Sie liegt
+auch bei Zeitzonen mit halben Stunden (z. B. UTC+5:30) im richtigen lokalen
+Tag; Statistik-Karten mit Periode „Tag“ zeigen den Wert damit am richtigen
+Datum. Die übrigen Stunden des Tages bleiben leer.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Any
+
+from .const import UNIT_LUX
+
+MAX_GAP = 6 * 3600.0   # s; längere Lücken (Ausfall) werden nicht integriert
+
+# (Schlüssel, Einheit) der importierten Tagesstatistiken
+DAILY_STATISTICS: tuple[tuple[str, str], ...] = (
+    ("lux_hours", f"{UNIT_LUX}h"),
+    ("dark_minutes", "min"),
+    ("peak_lux", UNIT_LUX),
+)
+
+
+def _day_bounds(ts: float, tz: tzinfo) -> tuple[str, float, float]:
+    """(lokales Datum ISO, Tagesbeginn, nächste Mitternacht) für einen Zeitstempel."""
+    day = datetime.fromtimestamp(ts, tz).date()
+    start = datetime.combine(day, time(), tz)
+    end = datetime.combine(day + timedelta(days=1), time(), tz)
+    return day.isoformat(), start.timestamp(), end.timestamp()
+
+
+def bucket_start(day_start: float) -> float:
+    """Erste volle UTC-Stunde ab Tagesbeginn (Stunden-Bucket der Tagesstatistik)."""
+    return math.ceil(day_start / 3600.0) * 3600.0
+
+
+def _iso(ts: float | None) -> str | None:
+    return None if ts is None else datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class DailyAccumulator:
+    """Tages-Integrale über Lux und ``is_dark`` (lokaler Kalendertag)."""
+
+    __slots__ = (
+        "tz", "day", "day_start", "day_end", "lux_seconds", "dark_seconds", "covered",
+        "first_change", "last_change", "peak_lux", "peak_ts",
+        "last_ts", "last_lux", "last_dark",
+    )
+
+    def __init__(self, tz: tzinfo = timezone.utc) -> None:
+        self.tz = tz
+        self.day: str | None = None
+        self.day_start = self.day_end = 0.0
+        self._reset()
+        self.last_ts: float | None = None
+        self.last_lux: float | None = None
+        self.last_dark: bool | None = None
+
+    def _reset(self) -> None:
+        self.lux_seconds = 0.0
+        self.dark_seconds = 0.0
+        self.covered = 0.0
+        self.first_change: float | None = None
+        self.last_change: float | None = None
+        self.peak_lux: float | None = None
+        self.peak_ts: float | None = None
+
+    def _integrate(self, t1: float, lux1: float) -> None:
+        t0, lux0 = self.last_ts, self.last_lux
+        if t0 is None or lux0 is None or not 0.0 < t1 - t0 <= MAX_GAP:
+            return
+        dt = t1 - t0
+        self.lux_seconds += 0.5 * (lux0 + lux1) * dt
+        if self.last_dark:
+            self.dark_seconds += dt
+        self.covered += dt
+
+    def add(self, ts: float, lux: float, is_dark: bool | None) -> list[dict[str, Any]]:
+        """Sample einarbeiten; liefert abgeschlossene Tage (meist leer)."""
+        done: list[dict[str, Any]] = []
+        if self.day is None:
+            self.day, self.day_start, self.day_end = _day_bounds(ts, self.tz)
+        while ts >= self.day_end:
+            # Intervall an Mitternacht teilen: Lux linear bis zur Grenze interpolieren
+            edge = self.day_end
+            if self.last_ts is not None and self.last_lux is not None and ts > self.last_ts:
+                frac = (edge - self.last_ts) / (ts - self.last_ts)
+                edge_lux = self.last_lux + (lux - self.last_lux) * max(0.0, min(1.0, frac))
+                self._integrate(edge, edge_lux)
+                self.last_ts, self.last_lux = edge, edge_lux
+            if self.peak_lux is not None:
+                done.append(self.summary())
+            self.day, self.day_start, self.day_end = _day_bounds(edge, self.tz)
+            self._reset()
+        self._integrate(ts, lux)
+        if is_dark is not None and self.last_dark is not None and is_dark != self.last_dark:
+            if self.first_change is None:
+                self.first_change = ts
+            self.last_change = ts
+        if self.peak_lux is None or lux > self.peak_lux:
+            self.peak_lux, self.peak_ts = lux, ts
+        self.last_ts, self.last_lux, self.last_dark = ts, lux, is_dark
+        return done
+
+    def summary(self) -> dict[str, Any]:
+        """Kompakte Zusammenfassung des (laufenden oder abgeschlossenen) Tages."""
+        return {
+            "date": self.day,
+            "start": self.day_start,
+            "lux_hours": round(self.lux_seconds / 3600.0, 1),
+            "dark_minutes": round(self.dark_seconds / 60.0, 1),
+            "first_dark_change": _iso(self.first_change),
+            "last_dark_change": _iso(self.last_change),
+            "peak_lux": None if self.peak_lux is None else round(self.peak_lux, 0),
+            "peak_time": _iso(self.peak_ts),
+            "coverage_pct": round(min(100.0, self.covered / max(1.0, self.day_end - self.day_start) * 100.0), 1),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__ if k != "tz"}
+
+    @classmethod
+    def from_dict(cls, data: Any, tz: tzinfo = timezone.utc) -> "DailyAccumulator":
+        """Gespeicherten Zustand übernehmen; über den Neustart hinweg wird nicht integriert."""
+        acc = cls(tz)
+        if not isinstance(data, dict) or not isinstance(data.get("day"), str):
+            return acc
+        try:
+            for key in ("day_start", "day_end", "lux_seconds", "dark_seconds", "covered"):
+                setattr(acc, key, float(data[key]))
+            for key in ("first_change", "last_change", "peak_lux", "peak_ts", "last_ts"):
+                val = data.get(key)
+                setattr(acc, key, None if val is None else float(val))
+        except (KeyError, TypeError, ValueError):
+            return cls(tz)
+        acc.day = data["day"]
+        last_dark = data.get("last_dark")
+        acc.last_dark = last_dark if isinstance(last_dark, bool) else None
+        # Ausfallzeit nicht als Messung werten: nächstes Sample startet ein neues Intervall
+        acc.last_lux = None
+        return acc
@@ -0,0 +1,32 @@
+# Illuminance Plus – Diagnose-Download
+# © 2025 Martin Kluger – MIT
+
+"""Diagnose-Download pro Eintrag: Optionen, letztes Ergebnis, Zähler, Instrumentierung."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_COORDINATOR
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Diagnose-Daten für einen Eintrag."""
+    domain_data = hass.data.get(DOMAIN, {})
+    entry_data = domain_data.get(entry.entry_id) or {}
+    sensor = entry_data.get("sensor")
+    stats = entry_data.get("stats")
+    result = entry_data.get("result")
+    coord = domain_data.get(DATA_COORDINATOR)
+    return {
+        "options": {**entry.data, **entry.options},
+        "result": None if result is None else asdict(result),
+        "counters": None if sensor is None else sensor.diagnostic_counters(),
+        # None = Instrumentierung aus (Option "instrumentation")
+        "instrumentation": None if stats is None else stats.as_dict(),
+        "coordinator": None if coord is None else coord.diagnostics(),
+    }
@@ -0,0 +1,130 @@
+# Illuminance Plus – Kurzfrist-Prognose
+# © 2025 Martin Kluger – MIT
+
+"""Lux-Prognose aus Clear-Sky-Kurve + stündlicher Wetterprognose.
+
+Die stündliche Prognose der Wetter-Entität wird über ``weather.get_forecasts``
+geholt und pro Entität mit TTL gecacht (geteilt von allen Einträgen über den
+Koordinator). Gleichzeitige Abrufe derselben Entität werden gebündelt.
+
+Die Berechnung liest nur den Cache (``hourly``, ohne ``await``): ist er
+abgelaufen, läuft die Abfrage als Hintergrund-Task und bis dahin gilt der
+letzte Stand. Wer mit ``on_update`` fragt, wird nach der Abfrage einmal
+zurückgerufen und kann mit der frischen Prognose neu rechnen.
+
+Die Auswertung der Slots (``HourlyForecast``, ``LuxForecaster``) liegt ohne
+Home-Assistant-Importe in ``forecaster.py``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .forecaster import EMPTY_FORECAST, HourlyForecast, Slot
+from .parsing import as_float
+
+_LOGGER = logging.getLogger(__name__)
+
+FORECAST_TTL = 1800          # s, Cache-Dauer einer erfolgreichen Abfrage
+FORECAST_RETRY = 300         # s, Cache-Dauer nach Fehler/leerer Antwort
+
+
+def _parse(items: list[dict[str, Any]], inch: bool) -> HourlyForecast:
+    slots: list[Slot] = []
+    for item in items or ():
+        when = dt_util.parse_datetime(str(item.get("datetime", "")))
+        if when is None:
+            continue
+        precip = as_float(item.get("precipitation"))
+        if precip is not None and inch:
+            precip *= 25.4
+        slots.append(
+            (when.timestamp(), as_float(item.get("cloud_coverage")), precip, item.get("condition"))
+        )
+    return HourlyForecast(slots)
+
+
+class ForecastCache:
+    """TTL-Cache für ``weather.get_forecasts`` (type=hourly), geteilt über alle Einträge."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._cache: dict[str, tuple[float, HourlyForecast]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        # je Entität: einmalige Rückrufe nach der laufenden Hintergrund-Abfrage
+        self._waiters: dict[str, list[Callable[[str], None]]] = {}
+
+    @callback
+    def hourly(
+        self, entity_id: str | None, on_update: Callable[[str], None] | None = None
+    ) -> HourlyForecast:
+        """Gecachte Prognose sofort; abgelaufen/fehlend -> Abfrage im Hintergrund anstoßen."""
+        if not entity_id:
+            return EMPTY_FORECAST
+        hit = self._cache.get(entity_id)
+        if hit is not None and hit[0] > dt_util.utcnow().timestamp():
+            return hit[1]
+        if on_update is not None:
+            waiters = self._waiters.setdefault(entity_id, [])
+            if on_update not in waiters:
+                waiters.append(on_update)
+        if entity_id not in self._inflight:
+            self.hass.async_create_background_task(
+                self._async_refresh(entity_id), f"illuminance_plus forecast {entity_id}"
+            )
+        return EMPTY_FORECAST if hit is None else hit[1]
+
+    async def _async_refresh(self, entity_id: str) -> None:
+        await self.async_hourly(entity_id)
+        for notify in self._waiters.pop(entity_id, ()):
+            notify(entity_id)
+
+    async def async_hourly(self, entity_id: str | None) -> HourlyForecast:
+        if not entity_id:
+            return EMPTY_FORECAST
+        now = dt_util.utcnow().timestamp()
+        hit = self._cache.get(entity_id)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        pending = self._inflight.get(entity_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = self._inflight[entity_id] = self.hass.loop.create_future()
+        try:
+            result, ttl = await self._async_fetch(entity_id)
+            self._cache[entity_id] = (now + ttl, result)
+            fut.set_result(result)
+            return result
+        finally:
+            if not fut.done():
+                fut.set_result(EMPTY_FORECAST)
+            del self._inflight[entity_id]
+
+    async def _async_fetch(self, entity_id: str) -> tuple[HourlyForecast, int]:
+        try:
+            resp = await self.hass.services.async_call(
+                "weather",
+                "get_forecasts",
+                {"entity_id": entity_id, "type": "hourly"},
+                blocking=True,
+                return_response=True,
+            )
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("Hourly forecast for %s unavailable: %s", entity_id, err)
+            return EMPTY_FORECAST, FORECAST_RETRY
+        st = self.hass.states.get(entity_id)
+        inch = st is not None and str(st.attributes.get("precipitation_unit", "")).lower() == "in"
+        items = ((resp or {}).get(entity_id) or {}).get("forecast") or []
+        parsed = _parse(items, inch)
+        return parsed, (FORECAST_TTL if parsed.slots else FORECAST_RETRY)
+
+    def forget(self, on_update: Callable[[str], None]) -> None:
+        """Rückruf einer entladenen Entität entfernen."""
+        for waiters in self._waiters.values():
+            if on_update in waiters:
+                waiters.remove(on_update)
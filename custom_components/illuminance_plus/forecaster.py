@@ -0,0 +1,96 @@
+# Illuminance Plus – Prognose auswerten
+# © 2025 Martin Kluger – MIT
+
+"""Lux-Modell zu künftigen Zeitpunkten aus Sonnenkurve + stündlichen Prognose-Slots.
+
+Die Slots kommen aus dem Cache in ``forecast.py``; dieses Modul kommt ohne
+Home-Assistant-Importe aus.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+
+from .model import LuxModel
+from .solar import SolarEphemeris
+
+TRANSITION_STEP = 300        # s, Raster für die Suche nach dem nächsten is_dark-Wechsel
+TRANSITION_HORIZON = 86400   # s, maximal so weit vorausschauen
+
+# (start_ts, cloud %, precip mm/h, condition)
+Slot = tuple[float, "float | None", "float | None", "str | None"]
+
+
+class HourlyForecast:
+    """Geparste, nach Zeit sortierte Prognose-Slots einer Wetter-Entität."""
+
+    __slots__ = ("starts", "slots")
+
+    def __init__(self, slots: list[Slot]) -> None:
+        slots.sort(key=lambda s: s[0])
+        self.slots = slots
+        self.starts = [s[0] for s in slots]
+
+    def at(self, ts: float) -> Slot | None:
+        """Slot, der ``ts`` abdeckt (letzter Start <= ts, max. 1 h alt)."""
+        i = bisect_right(self.starts, ts) - 1
+        if i < 0:
+            return None
+        slot = self.slots[i]
+        return slot if ts - slot[0] <= 3600 else None
+
+
+EMPTY_FORECAST = HourlyForecast([])
+
+
+class LuxForecaster:
+    """Wertet das Lux-Modell zu künftigen Zeitpunkten aus."""
+
+    def __init__(
+        self,
+        eph: SolarEphemeris,
+        model: LuxModel,
+        hourly: HourlyForecast,
+        current: tuple[float | None, float, float, str | None],
+    ) -> None:
+        self._eph = eph
+        self._model = model
+        self._hourly = hourly
+        # aktuelle Eingaben (cloud, precip, vis, condition) als Persistenz-Fallback
+        self._cur = current
+
+    def inputs_at(self, ts: float) -> tuple[float | None, float, float, str | None]:
+        """(cloud, precip, vis, condition) zum Zeitpunkt ``ts`` (Prognose-Slot vor aktuellem Wert)."""
+        cloud, precip, vis, cond = self._cur
+        slot = self._hourly.at(ts)
+        if slot is not None:
+            if slot[1] is not None:
+                cloud = slot[1]
+            if slot[2] is not None:
+                precip = slot[2]
+            if slot[3] is not None:
+                cond = slot[3]
+        return cloud, precip, vis, cond
+
+    def lux_at(self, ts: float) -> float:
+        elev, _az = self._eph.position(ts)
+        return self._model.raw(elev, *self.inputs_at(ts))
+
+    def lux_series(self, timestamps: list[float]):
+        """Prognose-Lux zu vielen Zeitpunkten in einem Modellaufruf."""
+        cols = list(zip(*(self.inputs_at(ts) for ts in timestamps))) or [(), (), (), ()]
+        return self._model.series(self._eph, timestamps, *cols)
+
+    def next_dark_change(
+        self, now_ts: float, is_dark: bool, on_eff: float, off_eff: float
+    ) -> float | None:
+        """Zeitpunkt des nächsten is_dark-Wechsels (Hysterese auf Prognose-Lux) oder None."""
+        # Raster an absoluten Grenzen ausrichten -> Ergebnis bleibt zwischen Zyklen stabil
+        start = math.ceil(now_ts / TRANSITION_STEP) * TRANSITION_STEP
+        end = now_ts + TRANSITION_HORIZON
+        grid = [float(ts) for ts in range(int(start), int(end) + 1, TRANSITION_STEP)]
+        for ts, lux in zip(grid, self.lux_series(grid)):
+            if (lux >= off_eff) if is_dark else (lux <= on_eff):
+                return ts
+        return None
@@ -0,0 +1,172 @@
+# Illuminance Plus – Eingangsfilter
+# © 2025 Martin Kluger – MIT
+
+"""Robuste Eingangsstufe je numerischer Quelle.
+
+Pro (Quelle, Art) ein kleines Fenster fester Größe über die letzten Werte.
+Der Koordinator arbeitet jedes neue State-Objekt genau einmal ein – direkt
+bei der State-Änderung, nicht erst bei der nächsten Berechnung.
+
+* **Hampel-Test mit Bestätigung**: weicht ein Wert um mehr als ``HAMPEL_K``
+  robuste Standardabweichungen (1.4826 · MAD, mindestens die Toleranz der
+  Art) vom Median des Fensters ab, gilt er zunächst als verdächtig und der
+  bisherige Wert bleibt. Kehrt die Quelle zurück, war es ein Ausreißer.
+  Bestätigt das nächste Sample den neuen Wert oder hält er
+  ``CONFIRM_AFTER`` Sekunden, ist es ein echter Sprung: er wird übernommen
+  und das Fenster beginnt beim neuen Niveau.
+* **Letzten guten Wert halten**: ``unavailable``/``unknown`` bzw.
+  Unparsebares liefert bis ``STALE_AFTER`` nach dem Ausfall den letzten
+  akzeptierten Wert statt sofort ``None`` (und damit Defaults wie 99 km
+  Sichtweite). Läuft die Haltezeit ab, stößt der Koordinator eine
+  Neuberechnung an (``stale_in``).
+
+Der Koordinator begrenzt außerdem, wie oft eine Quelle eine Neuberechnung
+auslösen darf (``SOURCE_MIN_TRIGGER_INTERVAL``), und meldet die Gesundheit
+je Quelle (``health``) in Diagnose und Attributen.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any
+
+WINDOW = 7                    # Werte im Fenster
+MIN_SAMPLES = 3               # erst ab so vielen Werten wird getestet
+HAMPEL_K = 3.0                # Schwelle in robusten Standardabweichungen
+CONFIRM_AFTER = 120.0         # s; so lange hält ein verdächtiger Wert, bis er als Sprung gilt
+STALE_AFTER = 1800.0          # s nach Ausfall; so lange wird der letzte gute Wert gehalten
+SOURCE_MIN_TRIGGER_INTERVAL = 30.0   # s; höchstens ein Auslöser je Quelle und Intervall
+
+# Mindest-Toleranz je Art: (absolut, relativ zum Median)
+TOLERANCE: dict[str, tuple[float, float]] = {
+    "number": (20.0, 0.1),        # Bewölkung % (Referenz-Lux läuft ungefiltert)
+    "precip": (1.0, 0.5),         # mm/h
+    "visibility": (2.0, 0.25),    # km
+}
+_DEFAULT_TOLERANCE = (0.0, 0.1)
+_UNSEEN = object()
+
+
+def _median(values: list[float]) -> float:
+    n = len(values)
+    mid = n // 2
+    return values[mid] if n % 2 else 0.5 * (values[mid - 1] + values[mid])
+
+
+class SourceFilter:
+    """Hampel-Test mit Sprung-Bestätigung + Halten des letzten guten Werts."""
+
+    __slots__ = (
+        "kind", "_abs_tol", "_rel_tol", "_buf", "_head", "_len", "_seen",
+        "value", "pending", "pending_ts", "failing_since",
+        "samples", "outliers", "steps", "dropouts",
+    )
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._abs_tol, self._rel_tol = TOLERANCE.get(kind, _DEFAULT_TOLERANCE)
+        self._buf = array("d", bytes(8 * WINDOW))
+        self._head = 0
+        self._len = 0
+        self._seen: Any = _UNSEEN
+        self.value: float | None = None
+        # verdächtiger Wert, der auf Bestätigung wartet
+        self.pending: float | None = None
+        self.pending_ts: float | None = None
+        self.failing_since: float | None = None
+        self.samples = 0
+        self.outliers = 0
+        self.steps = 0
+        self.dropouts = 0
+
+    def observe(self, state: Any, ts: float, value: float | None) -> bool:
+        """Ein State-Objekt genau einmal einarbeiten; True, wenn es neu war."""
+        if state is self._seen:
+            return False
+        self._seen = state
+        self.push(ts, value)
+        return True
+
+    def _tolerance(self, window: list[float], med: float) -> float:
+        mad = _median(sorted(abs(v - med) for v in window))
+        return max(HAMPEL_K * 1.4826 * mad, self._abs_tol, self._rel_tol * abs(med))
+
+    def _append(self, value: float) -> None:
+        self._buf[self._head] = value
+        self._head = (self._head + 1) % WINDOW
+        if self._len < WINDOW:
+            self._len += 1
+
+    def _accept(self, value: float) -> None:
+        self.value = value
+        self.pending = self.pending_ts = None
+
+    def _accept_step(self, value: float) -> None:
+        """Bestätigter Sprung: Fenster auf das neue Niveau zurücksetzen."""
+        self.steps += 1
+        self._head = self._len = 0
+        self._append(value)
+        self._accept(value)
+
+    def push(self, ts: float, value: float | None) -> None:
+        """Neuen Rohwert einarbeiten (``None`` = Ausfall)."""
+        if value is None:
+            self.dropouts += 1
+            if self.failing_since is None:
+                self.failing_since = ts
+            return
+        self.samples += 1
+        self.failing_since = None
+        pending = self.pending
+        if self._len >= MIN_SAMPLES:
+            window = sorted(self._buf[:self._len])
+            med = _median(window)
+            tol = self._tolerance(window, med)
+            if abs(value - med) > tol:
+                if pending is not None and abs(value - pending) <= max(tol, self._rel_tol * abs(pending)):
+                    # zweites Sample auf dem neuen Niveau
+                    self._accept_step(value)
+                    return
+                if pending is not None:
+                    self.outliers += 1
+                self.pending, self.pending_ts = value, ts
+                return
+        if pending is not None:
+            # Quelle ist zurückgekehrt -> der verdächtige Wert war ein Ausreißer
+            self.outliers += 1
+        self._append(value)
+        self._accept(value)
+
+    def current(self, now: float) -> float | None:
+        """Akzeptierter Wert; bei Ausfall gehalten, bis ``STALE_AFTER`` überschritten ist."""
+        if self.pending is not None and now - self.pending_ts >= CONFIRM_AFTER:
+            self._accept_step(self.pending)
+        if self.failing_since is not None and now - self.failing_since > STALE_AFTER:
+            return None
+        return self.value
+
+    def confirm_in(self, now: float) -> float | None:
+        """Sekunden, bis ein verdächtiger Wert als Sprung gilt (None = nichts offen)."""
+        if self.pending is None:
+            return None
+        return max(0.0, self.pending_ts + CONFIRM_AFTER - now)
+
+    def stale_in(self, now: float) -> float | None:
+        """Sekunden, bis ein gehaltener Wert verfällt (None = nichts gehalten)."""
+        if self.failing_since is None or self.value is None:
+            return None
+        wait = self.failing_since + STALE_AFTER - now
+        return wait if wait >= 0 else None
+
+    def health(self, now: float) -> dict[str, Any]:
+        failing = None if self.failing_since is None else max(0.0, now - self.failing_since)
+        return {
+            "value": self.value,
+            "pending": self.pending,
+            "failing_s": None if failing is None else round(failing),
+            "stale": self.value is None or (failing is not None and failing > STALE_AFTER),
+            "samples": self.samples,
+            "outliers": self.outliers,
+            "steps": self.steps,
+            "dropouts": self.dropouts,
+        }
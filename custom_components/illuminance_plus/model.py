@@ -0,0 +1,244 @@
+# Illuminance Plus – Dämpfungsmodell
+# © 2025 Martin Kluger – MIT
+
+"""Lux-Modell ohne HA-Abhängigkeiten: Clear-Sky-Kurve geteilt durch Wetterfaktoren.
+
+Skalare Helfer für den Hot-Path der Entität und eine Stapel-API
+(``LuxModel.batch``) für Prognose, Backfill, Kalibrierung und Benchmark:
+ganze Tage in einem Aufruf statt Sample für Sample. Mit NumPy wird
+vektorisiert gerechnet, ohne NumPy fällt die Stapel-API auf eine Schleife
+über die skalaren Helfer zurück (gleiche Ergebnisse).
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+
+from .clearsky import TABLE_MIN, TABLE_STEP, clear_sky_lux, table
+from .const import WEATHER_FACTORS
+from .solar import SolarEphemeris
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - HA bringt NumPy mit, Skripte evtl. nicht
+    np = None
+
+# Skalar oder Folge (wird auf die Länge der Elevationen gestreckt)
+Column = Any
+
+
+def condition_divisor(weather: Optional[str], max_div: float, fallback: float) -> float:
+    """Divisor aus dem Wetterzustand (``WEATHER_FACTORS``), wenn kein Bewölkungsgrad vorliegt."""
+    factor = WEATHER_FACTORS.get(weather) if weather else None
+    return fallback if factor is None else min(max(1.0, max_div), factor)
+
+
+def cloud_divisor(cloud: float | None, weather: Optional[str], max_div: float, fallback: float) -> float:
+    if cloud is None:
+        return condition_divisor(weather, max_div, fallback)
+    c = max(0.0, min(100.0, float(cloud)))
+    return 1.0 + (max_div - 1.0) * (c / 100.0)
+
+
+def gain_rain(mm_h: float) -> float:
+    if mm_h <= 0:
+        return 1.0
+    return 1.0 + min(0.7, mm_h * 0.3)
+
+
+def gain_visibility(km: float, weather: Optional[str]) -> float:
+    if km >= 10:
+        return 1.0
+    return max(0.6, km / 10.0)
+
+
+def gain_low_sun(elev: float) -> float:
+    if elev >= 10:
+        return 1.0
+    if elev <= 0:
+        return 1.2
+    return 1.0 + (10 - elev) * 0.02
+
+
+def raw_lux(
+    elev: float,
+    cloud: float | None,
+    precip: float,
+    vis: float,
+    weather: Optional[str],
+    mode: str,
+    max_div: float,
+    fallback: float,
+) -> float:
+    """Komplettes Dämpfungsmodell für ein Sample."""
+    clear = clear_sky_lux(elev, mode)
+    if clear <= 0:
+        return 0.0
+    div = (
+        cloud_divisor(cloud, weather, max_div, fallback)
+        * gain_rain(precip)
+        * gain_visibility(vis, weather)
+        * gain_low_sun(elev)
+    )
+    return clear / max(1.0, div)
+
+
+# ---------- log-lineare Form (Kalibrierung) ----------
+# ln(Divisor) ≈ θ · x mit x = (1, Wolken, Regen, Sichtweite, tiefe Sonne), alle Merkmale in [0, 1]
+FEATURES: tuple[str, ...] = ("offset", "cloud", "rain", "visibility", "low_sun")
+
+
+def features(
+    elev: float,
+    cloud: float | None,
+    precip: float,
+    vis: float,
+    weather: Optional[str],
+    max_div: float,
+    fallback: float,
+) -> tuple[float, ...]:
+    """Merkmalsvektor eines Samples; fehlende Bewölkung zählt wie der Divisor des Wetterzustands."""
+    if cloud is None:
+        cf = (condition_divisor(weather, max_div, fallback) - 1.0) / max(1e-9, max_div - 1.0)
+    else:
+        cf = max(0.0, min(100.0, float(cloud))) / 100.0
+    rain = 0.0 if precip <= 0 else min(0.7, precip * 0.3) / 0.7
+    visf = (1.0 - max(0.6, min(1.0, vis / 10.0))) / 0.4
+    low = max(0.0, min(10.0, 10.0 - elev)) / 10.0
+    return (1.0, cf, rain, visf, low)
+
+
+def prior(max_div: float) -> tuple[float, ...]:
+    """Koeffizienten, die das feste Modell log-linear nachbilden (Startwert der Kalibrierung)."""
+    return (0.0, math.log(max(1.0, max_div)), math.log(1.7), math.log(0.6), math.log(1.2))
+
+
+def elevations(eph: SolarEphemeris, timestamps: Iterable[float]) -> array:
+    """Sonnenhöhen zu UNIX-Zeitstempeln (aus den Tagestabellen der Ephemeride)."""
+    return array("d", (eph.position(ts)[0] for ts in timestamps))
+
+
+def _column(value: Column, n: int) -> Sequence:
+    if isinstance(value, (str, bytes)) or not hasattr(value, "__len__"):
+        return [value] * n
+    if len(value) != n:
+        raise ValueError(f"column has {len(value)} values, expected {n}")
+    return value
+
+
+# NumPy-Stützstellen der Clear-Sky-Tabellen (lazy, je Modus)
+_NP_TABLES: dict[str, tuple] = {}
+
+
+def _np_table(mode: str) -> tuple:
+    hit = _NP_TABLES.get(mode)
+    if hit is None:
+        lux = np.frombuffer(table(mode), dtype=np.float64)
+        xs = TABLE_MIN + np.arange(len(lux)) * TABLE_STEP
+        hit = _NP_TABLES[mode] = (xs, lux)
+    return hit
+
+
+def _batch_numpy(elev, cloud, precip, vis, mode: str, max_div: float, fallback: Column):
+    e = np.asarray(elev, dtype=np.float64)
+    xs, lux = _np_table(mode)
+    clear = np.interp(e, xs, lux, left=0.0)
+    # None -> NaN -> Fallback-Divisor
+    c = np.asarray(cloud, dtype=np.float64)
+    div = np.where(np.isnan(c), fallback, 1.0 + (max_div - 1.0) * np.clip(c, 0.0, 100.0) / 100.0)
+    p = np.asarray(precip, dtype=np.float64)
+    div = div * np.where(p <= 0.0, 1.0, 1.0 + np.minimum(0.7, p * 0.3))
+    v = np.asarray(vis, dtype=np.float64)
+    div = div * np.where(v >= 10.0, 1.0, np.maximum(0.6, v / 10.0))
+    div = div * np.where(e >= 10.0, 1.0, np.where(e <= 0.0, 1.2, 1.0 + (10.0 - e) * 0.02))
+    return np.where(clear <= 0.0, 0.0, clear / np.maximum(1.0, div))
+
+
+def _batch_numpy_calibrated(elev, cloud, precip, vis, mode: str, max_div: float, fallback: Column, coef):
+    e = np.asarray(elev, dtype=np.float64)
+    xs, lux = _np_table(mode)
+    clear = np.interp(e, xs, lux, left=0.0)
+    c = np.asarray(cloud, dtype=np.float64)
+    cf = np.where(np.isnan(c), (fallback - 1.0) / max(1e-9, max_div - 1.0), np.clip(c, 0.0, 100.0) / 100.0)
+    p = np.asarray(precip, dtype=np.float64)
+    rain = np.where(p <= 0.0, 0.0, np.minimum(0.7, p * 0.3) / 0.7)
+    v = np.asarray(vis, dtype=np.float64)
+    visf = (1.0 - np.clip(v / 10.0, 0.6, 1.0)) / 0.4
+    low = np.clip(10.0 - e, 0.0, 10.0) / 10.0
+    log_div = coef[0] + coef[1] * cf + coef[2] * rain + coef[3] * visf + coef[4] * low
+    return np.where(clear <= 0.0, 0.0, clear * np.exp(-log_div))
+
+
+@dataclass(frozen=True, slots=True)
+class LuxModel:
+    """Modus und Wolken-Parameter eines Eintrags (einmal mit den Optionen kompiliert)."""
+
+    mode: str
+    max_div: float
+    fallback: float
+    # kalibrierte Koeffizienten (siehe ``features``); None = festes Modell
+    coef: tuple[float, ...] | None = None
+
+    def clear_sky(self, elev: float) -> float:
+        return clear_sky_lux(elev, self.mode)
+
+    def raw(
+        self, elev: float, cloud: float | None, precip: float, vis: float, weather: Optional[str] = None
+    ) -> float:
+        """Roh-Lux für ein Sample."""
+        if self.coef is None:
+            return raw_lux(elev, cloud, precip, vis, weather, self.mode, self.max_div, self.fallback)
+        clear = clear_sky_lux(elev, self.mode)
+        if clear <= 0:
+            return 0.0
+        x = features(elev, cloud, precip, vis, weather, self.max_div, self.fallback)
+        return clear * math.exp(-sum(c * f for c, f in zip(self.coef, x)))
+
+    def batch(
+        self,
+        elev: Sequence[float],
+        cloud: Column = None,
+        precip: Column = 0.0,
+        vis: Column = 99.0,
+        weather: Column = None,
+    ) -> Sequence[float]:
+        """Roh-Lux für viele Samples in einem Aufruf.
+
+        ``elev`` ist eine Folge von Sonnenhöhen; alle anderen Eingaben sind
+        Folgen gleicher Länge oder Skalare (gelten dann für alle Samples).
+        ``cloud`` darf ``None`` enthalten (Divisor aus ``weather`` bzw.
+        Fallback). Liefert ein ``numpy.ndarray`` bzw. ohne NumPy ein ``array('d')``.
+        """
+        n = len(elev)
+        if np is not None:
+            # Fallback je Sample aus dem Wetterzustand (nur dort wirksam, wo cloud fehlt)
+            fallback = self.fallback if weather is None else np.fromiter(
+                (condition_divisor(w, self.max_div, self.fallback) for w in _column(weather, n)),
+                dtype=np.float64, count=n,
+            )
+            if self.coef is None:
+                return _batch_numpy(elev, cloud, precip, vis, self.mode, self.max_div, fallback)
+            return _batch_numpy_calibrated(
+                elev, cloud, precip, vis, self.mode, self.max_div, fallback, self.coef
+            )
+        return array("d", (
+            self.raw(e, c, p, v, w)
+            for e, c, p, v, w in zip(
+                elev, _column(cloud, n), _column(precip, n), _column(vis, n), _column(weather, n)
+            )
+        ))
+
+    def series(
+        self,
+        eph: SolarEphemeris,
+        timestamps: Sequence[float],
+        cloud: Column = None,
+        precip: Column = 0.0,
+        vis: Column = 99.0,
+        weather: Column = None,
+    ) -> Sequence[float]:
+        """Wie ``batch``, aber zu Zeitstempeln (Sonnenhöhe aus der Ephemeride)."""
+        return self.batch(elevations(eph, timestamps), cloud, precip, vis, weather)
@@ -0,0 +1,200 @@
+# Illuminance Plus – kompilierte Optionen
+# © 2025 Martin Kluger – MIT
+
+"""Unveränderlicher Options-Schnappschuss.
+
+Wird einmal beim Laden des Eintrags bzw. bei einer Options-Änderung aus
+``{**entry.data, **entry.options}`` gebaut. Alle Casts, Clamps und
+abgeleiteten Schwellen passieren hier; der Hot-Path liest nur Felder.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Mapping
+
+from .const import (
+    CONF_NAME, DEFAULT_NAME,
+    CONF_MODE, DEFAULT_MODE,
+    CONF_SCAN, DEFAULT_SCAN_SECONDS,
+    CONF_SMOOTH_SECONDS, DEFAULT_SMOOTH_SECONDS,
+    CONF_WEATHER, CONF_CLOUD, CONF_PRECIP, CONF_VIS,
+    CONF_ON, CONF_OFF,
+    CONF_MAX_CLOUD_DIV, DEFAULT_MAX_CLOUD_DIV, DEFAULT_FALLBACK,
+    CONF_DARK_SENSITIVITY, DEFAULT_DARK_SENSITIVITY,
+    CONF_TREND_ENABLED, DEFAULT_TREND_ENABLED,
+    CONF_TREND_WIN_5M, DEFAULT_TREND_WIN_5M,
+    CONF_TREND_WIN_15M, DEFAULT_TREND_WIN_15M,
+    CONF_TREND_TH_DOWN, DEFAULT_TREND_TH_DOWN,
+    CONF_TREND_TH_UP, DEFAULT_TREND_TH_UP,
+    CONF_FORECAST_ENABLED, DEFAULT_FORECAST_ENABLED,
+    CONF_FORECAST_15M, DEFAULT_FORECAST_15M,
+    CONF_FORECAST_30M, DEFAULT_FORECAST_30M,
+    CONF_FORECAST_60M, DEFAULT_FORECAST_60M,
+    CONF_DARK_SOON_MARGIN, DEFAULT_DARK_SOON_MARGIN,
+    CONF_TWILIGHT_ENABLED, DEFAULT_TWILIGHT_ENABLED,
+    CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED,
+    CONF_WINDOWS_ENABLED, DEFAULT_WINDOWS_ENABLED,
+    CONF_WINDOWS_YAML, DEFAULT_WINDOWS_YAML,
+    CONF_GLARE_ENABLED, DEFAULT_GLARE_ENABLED,
+    CONF_EVENT_DRIVEN, DEFAULT_EVENT_DRIVEN,
+    CONF_DEBOUNCE_SECONDS, DEFAULT_DEBOUNCE_SECONDS,
+    CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN,
+    SAFETY_SCAN_SECONDS,
+    CONF_DIAGNOSTIC_ENTITY, DEFAULT_DIAGNOSTIC_ENTITY,
+    CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION,
+    CONF_REFERENCE_ENTITY,
+    CONF_ROOMS_YAML, DEFAULT_ROOMS_YAML,
+    CONF_DAILY_SUMMARY, DEFAULT_DAILY_SUMMARY,
+)
+from .coordinator import SUN_ENTITY
+from .model import LuxModel
+from .rooms import EMPTY_ROOMS, RoomConfigError, RoomTable, parse_rooms
+from .scheduler import ADAPTIVE_MAX_SECONDS, forecast_cap, trend_cap
+from .windows import EMPTY_WINDOWS, WindowConfigError, WindowTable, parse_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+# Felder, die Entitäten anlegen/entfernen bzw. benennen -> nur diese erzwingen einen Reload
+RELOAD_KEYS: tuple[str, ...] = (
+    "name", "helpers_enabled", "diagnostic_entity", "daily_summary", "room_names",
+)
+
+
+def _f(data: Mapping[str, Any], key: str, default: float) -> float:
+    try:
+        return float(data.get(key, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+class CompiledOptions:
+    """Typisierter, unveränderlicher Schnappschuss der Eintrags-Optionen."""
+
+    __slots__ = (
+        "name", "mode",
+        "scan_secs", "timer_secs", "tau", "event_driven", "min_gap", "adaptive",
+        "weather", "cloud", "precip", "vis", "sources", "reference",
+        "max_cloud_div", "fallback", "model",
+        "sens_pct", "on_base", "off_base", "on_eff", "off_eff", "dark_soon_margin",
+        "trend_enabled", "trend_win_short", "trend_win_long", "trend_th_down", "trend_th_up",
+        "scan_cap",
+        "forecast_enabled", "forecast_horizons",
+        "twilight_enabled", "helpers_enabled", "diagnostic_entity", "daily_summary", "instrumentation",
+        "windows_enabled", "windows_yaml", "glare_enabled", "windows",
+        "rooms_yaml", "rooms", "room_names",
+    )
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        s = object.__setattr__
+        s(self, "name", data.get(CONF_NAME) or DEFAULT_NAME)
+        s(self, "mode", data.get(CONF_MODE, DEFAULT_MODE))
+
+        # Takt / Ereignisse
+        scan = _f(data, CONF_SCAN, DEFAULT_SCAN_SECONDS)
+        event_driven = bool(data.get(CONF_EVENT_DRIVEN, DEFAULT_EVENT_DRIVEN))
+        s(self, "scan_secs", scan)
+        s(self, "event_driven", event_driven)
+        s(self, "timer_secs", max(scan, float(SAFETY_SCAN_SECONDS)) if event_driven else scan)
+        s(self, "tau", _f(data, CONF_SMOOTH_SECONDS, DEFAULT_SMOOTH_SECONDS))
+        s(self, "min_gap", _f(data, CONF_DEBOUNCE_SECONDS, DEFAULT_DEBOUNCE_SECONDS))
+        s(self, "adaptive", bool(data.get(CONF_ADAPTIVE_SCAN, DEFAULT_ADAPTIVE_SCAN)))
+
+        # Quellen
+        s(self, "weather", data.get(CONF_WEATHER) or None)
+        s(self, "cloud", data.get(CONF_CLOUD) or None)
+        s(self, "precip", data.get(CONF_PRECIP) or None)
+        s(self, "vis", data.get(CONF_VIS) or None)
+        # adaptiver Takt folgt der Sonnenkurve selbst -> sun.sun nicht mehr als Auslöser
+        sources = [] if self.adaptive else [SUN_ENTITY]
+        for ent in (self.weather, self.cloud, self.precip, self.vis):
+            if ent and ent not in sources:
+                sources.append(ent)
+        s(self, "sources", tuple(sources))
+        # Referenz-Lux nur zum Kalibrieren (löst keine Neuberechnung aus)
+        s(self, "reference", data.get(CONF_REFERENCE_ENTITY) or None)
+
+        # Dämpfung
+        s(self, "max_cloud_div", _f(data, CONF_MAX_CLOUD_DIV, DEFAULT_MAX_CLOUD_DIV))
+        s(self, "fallback", DEFAULT_FALLBACK)
+        s(self, "model", LuxModel(self.mode, self.max_cloud_div, self.fallback))
+
+        # Schwellen: Empfindlichkeit robust clampen (5–300 %) und effektiv vorrechnen
+        sens = max(5.0, min(300.0, _f(data, CONF_DARK_SENSITIVITY, DEFAULT_DARK_SENSITIVITY)))
+        on_base = _f(data, CONF_ON, 1000)
+        off_base = _f(data, CONF_OFF, 3000)
+        s(self, "sens_pct", sens)
+        s(self, "on_base", on_base)
+        s(self, "off_base", off_base)
+        s(self, "on_eff", on_base * sens / 100.0)
+        s(self, "off_eff", off_base * sens / 100.0)
+        s(self, "dark_soon_margin", _f(data, CONF_DARK_SOON_MARGIN, DEFAULT_DARK_SOON_MARGIN))
+
+        # Trend
+        s(self, "trend_enabled", bool(data.get(CONF_TREND_ENABLED, DEFAULT_TREND_ENABLED)))
+        s(self, "trend_win_short", _f(data, CONF_TREND_WIN_5M, DEFAULT_TREND_WIN_5M))
+        s(self, "trend_win_long", _f(data, CONF_TREND_WIN_15M, DEFAULT_TREND_WIN_15M))
+        s(self, "trend_th_down", _f(data, CONF_TREND_TH_DOWN, DEFAULT_TREND_TH_DOWN))
+        s(self, "trend_th_up", _f(data, CONF_TREND_TH_UP, DEFAULT_TREND_TH_UP))
+
+        # Prognose
+        s(self, "forecast_enabled", bool(data.get(CONF_FORECAST_ENABLED, DEFAULT_FORECAST_ENABLED)))
+        horizons = (
+            (15, data.get(CONF_FORECAST_15M, DEFAULT_FORECAST_15M)),
+            (30, data.get(CONF_FORECAST_30M, DEFAULT_FORECAST_30M)),
+            (60, data.get(CONF_FORECAST_60M, DEFAULT_FORECAST_60M)),
+        )
+        s(self, "forecast_horizons", tuple(m for m, on in horizons if on))
+
+        # adaptiver Takt: tagsüber so dicht, dass Trendfenster und Prognose aktuell bleiben
+        cap = ADAPTIVE_MAX_SECONDS
+        if self.trend_enabled:
+            cap = min(cap, trend_cap(self.trend_win_short * 60))
+        if self.forecast_enabled and self.forecast_horizons:
+            cap = min(cap, forecast_cap(min(self.forecast_horizons) * 60))
+        s(self, "scan_cap", cap)
+
+        # Zusatzfunktionen
+        s(self, "twilight_enabled", bool(data.get(CONF_TWILIGHT_ENABLED, DEFAULT_TWILIGHT_ENABLED)))
+        s(self, "helpers_enabled", bool(data.get(CONF_HELPERS_ENABLED, DEFAULT_HELPERS_ENABLED)))
+        s(self, "diagnostic_entity", bool(data.get(CONF_DIAGNOSTIC_ENTITY, DEFAULT_DIAGNOSTIC_ENTITY)))
+        s(self, "daily_summary", bool(data.get(CONF_DAILY_SUMMARY, DEFAULT_DAILY_SUMMARY)))
+        s(self, "instrumentation", bool(data.get(CONF_INSTRUMENTATION, DEFAULT_INSTRUMENTATION)))
+        s(self, "windows_enabled", bool(data.get(CONF_WINDOWS_ENABLED, DEFAULT_WINDOWS_ENABLED)))
+        s(self, "windows_yaml", str(data.get(CONF_WINDOWS_YAML, DEFAULT_WINDOWS_YAML) or ""))
+        s(self, "glare_enabled", bool(data.get(CONF_GLARE_ENABLED, DEFAULT_GLARE_ENABLED)))
+        windows: WindowTable = EMPTY_WINDOWS
+        if self.windows_enabled:
+            try:
+                windows = parse_windows(self.windows_yaml)
+            except WindowConfigError as err:
+                _LOGGER.warning("Ignoring invalid windows configuration: %s", err)
+        s(self, "windows", windows)
+
+        # Räume: Schwellen je Raum aus den Basisschwellen vorrechnen
+        s(self, "rooms_yaml", str(data.get(CONF_ROOMS_YAML, DEFAULT_ROOMS_YAML) or ""))
+        rooms: RoomTable = EMPTY_ROOMS
+        try:
+            rooms = parse_rooms(self.rooms_yaml).compile(on_base, off_base, sens)
+        except RoomConfigError as err:
+            _LOGGER.warning("Ignoring invalid rooms configuration: %s", err)
+        s(self, "rooms", rooms)
+        s(self, "room_names", rooms.names)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompiledOptions):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def requires_reload(self, other: "CompiledOptions") -> bool:
+        """True, wenn ``other`` Entitäten hinzufügt/entfernt (kein In-Place-Update möglich)."""
+        return any(getattr(self, k) != getattr(other, k) for k in RELOAD_KEYS)
+
+
+def compile_options(data: Mapping[str, Any]) -> CompiledOptions:
+    return CompiledOptions(data)
@@ -0,0 +1,78 @@
+# Illuminance Plus – Eingaben parsen
+# © 2025 Martin Kluger – MIT
+
+"""States der Quellen in normalisierte Zahlen zerlegen (mm/h, km, %).
+
+Wird vom Koordinator bei jeder State-Änderung und von Backfill/Simulation
+auf der Recorder-Historie benutzt. Ohne Home-Assistant-Importe: ein State
+ist hier alles mit ``state`` und ``attributes``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from homeassistant.core import State
+
+MILES = ("mi", "mile", "miles")
+INCH_RATES = ("in/h", "inch/h", "inches/hour", "in")
+METERS = ("m",)
+
+
+def as_float(value: Any) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherInputs:
+    """Eingaben aus einem State der Wetter-Entität (normalisiert, fehlend = None)."""
+
+    condition: str | None
+    cloud: float | None
+    precip: float | None
+    vis: float | None
+
+
+def parse_number(st: State) -> float | None:
+    """Zahl aus dem Zustand eines States (nicht numerisch -> None)."""
+    return as_float(st.state)
+
+
+def parse_weather(st: State) -> WeatherInputs:
+    """Wetter-State in Zustand + Attribute zerlegen (auch für die Recorder-Historie)."""
+    attrs = st.attributes
+    cloud = as_float(attrs.get("cloud_coverage"))
+    vis = as_float(attrs.get("visibility"))
+    if vis is not None:
+        unit = str(attrs.get("visibility_unit") or "").lower()
+        if unit in MILES:
+            vis *= 1.60934
+        elif unit in METERS:
+            vis /= 1000.0
+    precip = as_float(attrs.get("precipitation"))
+    if precip is not None and str(attrs.get("precipitation_unit") or "").lower() in INCH_RATES:
+        precip *= 25.4
+    return WeatherInputs(st.state, cloud, precip, vis)
+
+
+def parse_precip_mm_h(st: State) -> float | None:
+    """Niederschlag eines States in mm/h (auch für die Recorder-Historie)."""
+    val = as_float(st.state)
+    unit = st.attributes.get("unit_of_measurement")
+    if val is not None and unit and str(unit).lower() in INCH_RATES:
+        val *= 25.4
+    return val
+
+
+def parse_visibility_km(st: State) -> float | None:
+    """Sichtweite eines States in km (auch für die Recorder-Historie)."""
+    val = as_float(st.state)
+    unit = st.attributes.get("unit_of_measurement")
+    if val is not None and unit and str(unit).lower() in MILES:
+        val *= 1.60934
+    return val
@@ -0,0 +1,35 @@
+# Illuminance Plus – Berechnungsergebnis
+# © 2025 Martin Kluger – MIT
+
+"""Typisiertes Ergebnis einer Berechnung.
+
+Wird nach jeder Berechnung über ``SIGNAL_RESULT`` (Dispatcher, pro Eintrag)
+verteilt – unabhängig davon, ob der Hauptsensor schreibt. Abnehmer (z. B. die
+Helper-Binärsensoren, Websocket-Abonnenten) lesen damit keine
+State-Attribute mehr zurück.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class IlluminanceResult:
+    """Kernwerte einer Berechnung (Lux gerundet, Flags nach Hysterese)."""
+
+    ts: float
+    lux: float
+    control_lux: float
+    is_dark: bool
+    dark_soon: bool
+    darkening_fast: bool
+    brightening_fast: bool
+    elevation: float
+    azimuth: float
+    # is_dark je konfiguriertem Raum (Reihenfolge wie ``CompiledOptions.rooms``)
+    rooms: tuple[bool, ...] = ()
+    # Trend-Steigung (lx/min, kurzes Fenster) und Kurzfrist-Prognose ((Schlüssel, lx), …)
+    slope: float | None = None
+    forecast: tuple[tuple[str, float], ...] = ()
+    next_dark_change: str | None = None
@@ -0,0 +1,160 @@
+# Illuminance Plus – Räume
+# © 2025 Martin Kluger – MIT
+
+"""Kompilierte Raum-Tabelle: eigene Schwellen und Hysterese je Raum.
+
+``rooms_yaml`` wird einmal pro Options-Änderung geparst und validiert. Pro
+Raum werden die effektiven Schwellen (``on/off_threshold · k · Empfindlichkeit``)
+vorberechnet; ein Update-Zyklus braucht dann je Raum nur zwei Vergleiche
+gegen ``control_lux`` – statt eines Template-Renders je Automation.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any
+
+import yaml
+
+try:
+    from homeassistant.util import slugify
+except ImportError:  # pragma: no cover - nur außerhalb von HA (Skripte/Tests)
+    import re
+    import unicodedata
+
+    def slugify(text: str | None, *, separator: str = "_") -> str:
+        """Vereinfachte HA-Variante: ASCII-Transliteration, alles andere -> Trenner."""
+        ascii_text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+        slug = re.sub(r"[^a-z0-9]+", separator, ascii_text.lower()).strip(separator)
+        return slug or "unknown"
+
+DEFAULT_K = 1.0
+
+
+class RoomConfigError(ValueError):
+    """Ungültige Raum-Konfiguration."""
+
+
+def _num(item: dict[str, Any], key: str, default: float | None, lo: float, hi: float) -> float | None:
+    raw = item.get(key, default)
+    if raw is None:
+        # nur optionale Werte (ohne Default) dürfen fehlen; explizites null bei k ist ein Fehler
+        if default is None:
+            return None
+        raise RoomConfigError(f"'{key}' must be a number")
+    if isinstance(raw, bool):
+        raise RoomConfigError(f"'{key}' must be a number")
+    try:
+        val = float(raw)
+    except (TypeError, ValueError) as err:
+        raise RoomConfigError(f"'{key}' must be a number") from err
+    if not lo <= val <= hi:
+        raise RoomConfigError(f"'{key}' must be between {lo:g} and {hi:g}")
+    return val
+
+
+class RoomTable:
+    """Spaltenorientierte Raum-Tabelle (ein Eintrag pro Raum).
+
+    ``sensitivity`` ist ``None``, wenn der Raum die Empfindlichkeit des
+    Eintrags übernimmt; ``on_eff``/``off_eff`` werden erst mit ``compile``
+    aus den Schwellen des Eintrags gefüllt.
+    """
+
+    __slots__ = ("names", "k", "sensitivity", "on_eff", "off_eff")
+
+    def __init__(self, rows: list[tuple[str, float, float | None]]) -> None:
+        self.names = tuple(r[0] for r in rows)
+        self.k = array("d", (r[1] for r in rows))
+        self.sensitivity = tuple(r[2] for r in rows)
+        self.on_eff = array("d", bytes(8 * len(rows)))
+        self.off_eff = array("d", bytes(8 * len(rows)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoomTable):
+            return NotImplemented
+        return (
+            self.names == other.names
+            and self.k == other.k
+            and self.sensitivity == other.sensitivity
+            and self.on_eff == other.on_eff
+            and self.off_eff == other.off_eff
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def compile(self, on_base: float, off_base: float, sens_pct: float) -> "RoomTable":
+        """Effektive Schwellen je Raum vorberechnen (Empfindlichkeit des Raums oder des Eintrags)."""
+        for i, k in enumerate(self.k):
+            sens = self.sensitivity[i]
+            factor = k * (sens_pct if sens is None else sens) / 100.0
+            self.on_eff[i] = on_base * factor
+            self.off_eff[i] = off_base * factor
+        return self
+
+    def evaluate(self, control: float, state: list[bool | None]) -> bool:
+        """Hysterese aller Räume in einem Durchlauf fortschreiben; True, wenn ein Raum kippt."""
+        changed = False
+        on_eff, off_eff = self.on_eff, self.off_eff
+        for i in range(len(self.names)):
+            prev = state[i]
+            if prev is None:
+                dark = control <= on_eff[i]
+            elif control <= on_eff[i]:
+                dark = True
+            elif control >= off_eff[i]:
+                dark = False
+            else:
+                continue
+            if dark != prev:
+                state[i] = dark
+                changed = True
+        return changed
+
+    def attributes(self, i: int) -> dict[str, Any]:
+        return {
+            "k": self.k[i],
+            "sensitivity_pct": self.sensitivity[i],
+            "on_threshold_eff": round(self.on_eff[i], 0),
+            "off_threshold_eff": round(self.off_eff[i], 0),
+        }
+
+
+EMPTY_ROOMS = RoomTable([])
+
+
+def parse_rooms(text: str | None) -> RoomTable:
+    """YAML-Liste (name, k, optional sensitivity in %) parsen und validieren."""
+    if not text or not str(text).strip():
+        return EMPTY_ROOMS
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as err:
+        raise RoomConfigError(f"invalid YAML: {err}") from err
+    if data is None:
+        return EMPTY_ROOMS
+    if not isinstance(data, list):
+        raise RoomConfigError("expected a list of rooms")
+    rows: list[tuple[str, float, float | None]] = []
+    seen: dict[str, str] = {}
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise RoomConfigError(f"room #{idx + 1}: expected a mapping")
+        name = str(item.get("name") or "").strip()
+        if not name:
+            raise RoomConfigError(f"room #{idx + 1}: missing 'name'")
+        # Namen werden zu unique_ids (slugify) -> gleiche Slugs sind Duplikate
+        slug = slugify(name)
+        if slug in seen:
+            raise RoomConfigError(f"duplicate room name '{name}' (same id as '{seen[slug]}')")
+        seen[slug] = name
+        try:
+            k = _num(item, "k", DEFAULT_K, 0.1, 10.0)
+            sens = _num(item, "sensitivity", None, 5.0, 300.0)
+        except RoomConfigError as err:
+            raise RoomConfigError(f"room '{name}': {err}") from err
+        rows.append((name, k, sens))
+    return RoomTable(rows)
@@ -0,0 +1,185 @@
+# Illuminance Plus – adaptiver Takt
+# © 2025 Martin Kluger – MIT
+
+"""Nächster sinnvoller Auswertungszeitpunkt statt festem Intervall.
+
+Nachts (Sonne unter ``NIGHT_ELEV``, Clear-Sky-Lux konstant 0) wird bis zur
+nächsten Morgendämmerung geschlafen. Tagsüber wird die erwartete Zeit bis
+zum nächsten Überschreiten der effektiven Hysterese-Schwelle geschätzt – aus
+der Modellkurve mit den aktuellen Wetter-Eingaben und aus der Trend-Steigung –
+und das Intervall auf die Hälfte davon gesetzt (begrenzt auf
+``ADAPTIVE_MIN_SECONDS`` … ``ADAPTIVE_MAX_SECONDS``). Fern jeder Schwelle
+(Mittag) ergibt das lange, kurz vor einem Wechsel kurze Abstände. Ziel ist
+der nächste Wechsel unter allen Hysteresen – Hauptsensor und jeder Raum mit
+seinen eigenen (um ``k`` skalierten) Schwellen; geschlafen wird nachts erst,
+wenn alle dunkel sind.
+
+Mit aktivem Trend begrenzt ``trend_cap`` den Abstand tagsüber, damit im
+kurzen Trendfenster stets ``TREND_SAMPLES`` Werte liegen – sonst bliebe die
+Steigung ``None`` und ``darkening_fast``/``brightening_fast`` stumm. Sind
+Prognose aktiv, begrenzt ``forecast_cap`` den Abstand ebenso auf einen Teil
+des kürzesten Prognose-Horizonts. Sind Fenster konfiguriert, wird zusätzlich
+bei der nächsten Kante gerechnet (Sonne tritt in ein Fenster ein oder aus,
+Blendung kippt).
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from .solar import SolarEphemeris
+
+NIGHT_ELEV = -6.0             # darunter liefert das Modell konstant 0 lx
+ADAPTIVE_MIN_SECONDS = 20.0   # kürzester Abstand kurz vor einem Wechsel
+ADAPTIVE_MAX_SECONDS = 1800.0 # längster Abstand tagsüber
+NIGHT_MAX_SECONDS = 6 * 3600.0  # Obergrenze für den Nachtschlaf (Polarregionen)
+# s, Stützstellen auf der Modellkurve; geometrisch, da nur eta/2 gebraucht wird
+CURVE_PROBES: tuple[float, ...] = (60.0, 120.0, 240.0, 480.0, 960.0, 1920.0, 3600.0)
+APPROACH_FACTOR = 0.5         # Anteil der Restzeit bis zum Wechsel
+TREND_SAMPLES = 3             # Werte, die mindestens im kurzen Trendfenster liegen sollen
+FORECAST_REFRESHES = 3        # Auswertungen je kürzestem Prognose-Horizont
+WINDOW_STEP = 60.0            # s, Raster der Suche nach der nächsten Fenster-Kante
+
+REASON_NIGHT = "night"
+REASON_APPROACH = "approach"
+REASON_IDLE = "idle"
+REASON_CAP = "cap"
+REASON_WINDOW = "window"
+
+_DAY = 86400
+
+# lux_fn(elev) -> lx mit den aktuellen Wetter-Eingaben
+LuxFn = Callable[[float], float]
+# window_fn(elev, az) -> Bitmaske der Fenster-Flags (Sonne/Blendung)
+WindowFn = Callable[[float, float], int]
+# (on_eff, off_eff, dunkel) eines Raums
+RoomState = tuple[float, float, "bool | None"]
+
+
+def trend_cap(window_seconds: float) -> float:
+    """Längster Abstand, bei dem das Trendfenster noch ``TREND_SAMPLES`` Werte hält."""
+    return max(ADAPTIVE_MIN_SECONDS, min(ADAPTIVE_MAX_SECONDS, window_seconds / TREND_SAMPLES))
+
+
+def forecast_cap(horizon_seconds: float) -> float:
+    """Längster Abstand, bei dem ``lux_in_*`` je Horizont ``FORECAST_REFRESHES``-mal erneuert wird."""
+    return max(ADAPTIVE_MIN_SECONDS, min(ADAPTIVE_MAX_SECONDS, horizon_seconds / FORECAST_REFRESHES))
+
+
+class ScanPlanner:
+    """Berechnet nach jeder Auswertung das Intervall bis zur nächsten."""
+
+    __slots__ = ("_dawn",)
+
+    def __init__(self) -> None:
+        # Tag -> Zeitpunkte, an denen die Sonne NIGHT_ELEV steigend kreuzt
+        self._dawn: dict[int, list[float]] = {}
+
+    def _next_dawn(self, eph: SolarEphemeris, now: float) -> float | None:
+        day = int(now // _DAY)
+        for d in (day, day + 1):
+            rises = self._dawn.get(d)
+            if rises is None:
+                tbl = eph.table(d * _DAY + 1)
+                rises = [ts for ts, _thr, rising in tbl.crossings((NIGHT_ELEV,)) if rising]
+                self._dawn = {k: v for k, v in self._dawn.items() if k >= day}
+                self._dawn[d] = rises
+            for ts in rises:
+                if ts > now:
+                    return ts
+        return None
+
+    def plan(
+        self,
+        eph: SolarEphemeris,
+        now: float,
+        elev: float,
+        control: float,
+        is_dark: bool,
+        on_eff: float,
+        off_eff: float,
+        slope: float | None,
+        lux_fn: LuxFn,
+        max_secs: float = ADAPTIVE_MAX_SECONDS,
+        rooms: Iterable[RoomState] = (),
+        window_fn: WindowFn | None = None,
+    ) -> tuple[float, str]:
+        """(Sekunden bis zur nächsten Auswertung, Grund); tagsüber höchstens ``max_secs``.
+
+        Ziel ist der nächste Wechsel unter allen Hysteresen: Hauptsensor und
+        jeder Raum (``rooms``: je ``(on_eff, off_eff, dunkel)``).
+        """
+        targets = [(off_eff if is_dark else on_eff, is_dark)]
+        all_dark = is_dark
+        for room_on, room_off, room_dark in rooms:
+            room_dark = bool(room_dark)
+            all_dark = all_dark and room_dark
+            targets.append((room_off if room_dark else room_on, room_dark))
+
+        # Nacht: erst zur Morgendämmerung wieder rechnen (alle Hysteresen müssen bereits stehen)
+        if elev <= NIGHT_ELEV and all_dark:
+            dawn = self._next_dawn(eph, now)
+            wait = NIGHT_MAX_SECONDS if dawn is None else min(NIGHT_MAX_SECONDS, dawn - now)
+            return max(ADAPTIVE_MIN_SECONDS, wait), REASON_NIGHT
+
+        # Modellkurve einmal abtasten, für alle Schwellen gemeinsam
+        curve = [(0.0, lux_fn(elev))]
+        curve.extend((t, lux_fn(eph.position(now + t)[0])) for t in CURVE_PROBES)
+
+        eta: float | None = None
+        for target, dark in targets:
+            t = _eta(curve, control, slope, target, dark)
+            if t is not None and (eta is None or t < eta):
+                eta = t
+
+        if eta is None:
+            secs, reason = ADAPTIVE_MAX_SECONDS, REASON_IDLE
+        else:
+            secs = max(ADAPTIVE_MIN_SECONDS, min(ADAPTIVE_MAX_SECONDS, eta * APPROACH_FACTOR))
+            reason = REASON_APPROACH
+        if secs > max_secs:
+            secs, reason = max_secs, REASON_CAP
+
+        # Fenster: nächste Kante (Azimut/Elevation) im geplanten Intervall
+        if window_fn is not None:
+            edge = _window_edge(eph, now, secs, window_fn)
+            if edge is not None:
+                return max(ADAPTIVE_MIN_SECONDS, edge), REASON_WINDOW
+        return secs, reason
+
+
+def _eta(
+    curve: list[tuple[float, float]], control: float, slope: float | None, target: float, dark: bool
+) -> float | None:
+    """Erwartete Sekunden bis zum Wechsel einer Hysterese (None = nicht absehbar)."""
+    eta: float | None = None
+    # Modellkurve: erste Stützstelle jenseits der Schwelle, dazwischen linear interpolieren
+    prev_t, prev_lux = curve[0]
+    if (prev_lux >= target) if dark else (prev_lux <= target):
+        eta = 0.0
+    else:
+        for t, lux in curve[1:]:
+            if (lux >= target) if dark else (lux <= target):
+                eta = prev_t + (t - prev_t) * (target - prev_lux) / (lux - prev_lux)
+                break
+            prev_t, prev_lux = t, lux
+
+    # Trend: lineare Extrapolation, nur wenn sie auf die Schwelle zuläuft
+    if slope is not None and slope != 0.0:
+        dist = (target - control) if dark else (control - target)
+        rate = slope if dark else -slope
+        if rate > 0.0:
+            eta_trend = max(0.0, dist) / rate * 60.0
+            eta = eta_trend if eta is None else min(eta, eta_trend)
+    return eta
+
+
+def _window_edge(eph: SolarEphemeris, now: float, horizon: float, window_fn: WindowFn) -> float | None:
+    """Sekunden bis sich die Sonne-im-Fenster-Maske ändert (Raster ``WINDOW_STEP``)."""
+    mask = window_fn(*eph.position(now))
+    t = WINDOW_STEP
+    while t < horizon:
+        if window_fn(*eph.position(now + t)) != mask:
+            return t
+        t += WINDOW_STEP
+    return None
@@ -1,278 +1,950 @@
 from __future__ import annotations
 
-import math
-from datetime import timedelta
-from typing import Any, Optional
+import asyncio
+import time
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Callable
+
+import voluptuous as vol
 
 from homeassistant.components.sensor import SensorEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later, async_track_time_change, async_track_time_interval
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    UNIT_LUX,
-    CONF_NAME,
-    DEFAULT_NAME,
-    CONF_MODE,
-    DEFAULT_MODE,
-    CONF_SCAN,
-    DEFAULT_SCAN_SECONDS,
+    DOMAIN, UNIT_LUX, SIGNAL_RESULT, SIGNAL_RESULT_ANY,
+    TRIGGER_START, TRIGGER_TIMER, TRIGGER_SOURCE, TRIGGER_OPTIONS, TRIGGER_SERVICE, SERVICE_REFRESH,
+    SERVICE_BACKFILL, ATTR_START, ATTR_END, ATTR_OVERWRITE,
+    SERVICE_SIMULATE, ATTR_SOURCE, ATTR_CANDIDATES, CONF_ON, CONF_OFF, CONF_DARK_SENSITIVITY,
     CONF_SMOOTH_SECONDS,
-    DEFAULT_SMOOTH_SECONDS,
-    CONF_ON,
-    CONF_OFF,
-    CONF_WEATHER,
-    CONF_CLOUD,
-    CONF_PRECIP,
-    CONF_VIS,
-    CONF_MAX_CLOUD_DIV,
-    DEFAULT_MAX_CLOUD_DIV,
-    CONF_DARK_SENSITIVITY,
-    DEFAULT_DARK_SENSITIVITY,
-    # Zusatz für dark_soon / Trend:
-    CONF_FORECAST_ENABLED,
-    DEFAULT_FORECAST_ENABLED,
-    CONF_DARK_SOON_MARGIN,
-    DEFAULT_DARK_SOON_MARGIN,
-    CONF_TREND_ENABLED,
-    DEFAULT_TREND_ENABLED,
-    CONF_TREND_TH_DOWN,
-    DEFAULT_TREND_TH_DOWN,
-    DEFAULT_FALLBACK,
+    WRITE_DEADBAND_LUX, WRITE_DEADBAND_REL, WRITE_MAX_SILENCE, DIAG_MIN_INTERVAL,
+    RESTORE_MAX_AGE, STARTUP_WAIT_SECONDS, SAFETY_SCAN_SECONDS,
 )
+from .backfill import async_backfill, async_import_daily
+from .calibration import RlsCalibrator
+from .control import dark_step, ema_step
+from .coordinator import SUN_ENTITY, IlluminanceCoordinator, async_get_coordinator
+from .daily import DailyAccumulator
+from .forecaster import LuxForecaster
+from .model import cloud_divisor, features, gain_low_sun, gain_rain, gain_visibility
+from .scheduler import ADAPTIVE_MAX_SECONDS, ScanPlanner
+from .simulate import MAX_CANDIDATES, MAX_SPAN, SOURCE_MODEL, SOURCES, async_simulate
+from .trend import TrendWindow
+from .options import CompiledOptions
+from .result import IlluminanceResult
+from .stats import EntryStats
 
 # ---------- kleine Helfer ----------
 
-def _state(hass: HomeAssistant, entity_id: str | None) -> Any:
-    if not entity_id:
-        return None
-    st = hass.states.get(entity_id)
-    return None if st is None else st.state
-
-def _attr(hass: HomeAssistant, entity_id: str | None, attr: str) -> Any:
-    if not entity_id:
-        return None
-    st = hass.states.get(entity_id)
-    return None if st is None else st.attributes.get(attr)
-
-def _state_as_float(hass: HomeAssistant, entity_id: str | None) -> float | None:
-    s = _state(hass, entity_id)
+def _trend_attrs(win: TrendWindow, slope: float | None) -> dict[str, Any]:
+    mean, lo, hi = win.mean(), win.min(), win.max()
+    return {
+        "window_min": round(win.window / 60.0, 1),
+        "slope": None if slope is None else round(slope, 1),
+        "min": None if lo is None else round(lo, 0),
+        "max": None if hi is None else round(hi, 0),
+        "mean": None if mean is None else round(mean, 0),
+        "samples": len(win),
+    }
+
+def _within_deadband(a: float | None, b: float | None) -> bool:
+    """True, wenn sich zwei Lux-Werte nur innerhalb der Totzone unterscheiden."""
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= max(WRITE_DEADBAND_LUX, WRITE_DEADBAND_REL * max(abs(a), abs(b)))
+
+
+def _opt_float(value: Any) -> float | None:
     try:
-        return float(s) if s is not None else None
-    except Exception:  # noqa: BLE001
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
         return None
 
-def _clear_sky_lux(elev: float, mode: str) -> float:
-    """Klares-Himmel-Modell (vereinfacht/pnbruckner-kompatibel)."""
-    if elev <= -6:
-        return 0.0
-    return max(0.0, 120000.0 * math.sin(math.radians(max(0.0, elev))) ** 1.5)
-
-def _cloud_divisor(cloud: float | None, weather: Optional[str], max_div: float, fallback: float) -> float:
-    if cloud is None:
-        return fallback
-    c = max(0.0, min(100.0, float(cloud)))
-    return 1.0 + (max_div - 1.0) * (c / 100.0)
 
-def _gain_rain(mm_h: float) -> float:
-    if mm_h <= 0:
-        return 1.0
-    return 1.0 + min(0.7, mm_h * 0.3)
-
-def _gain_visibility(km: float, weather: Optional[str]) -> float:
-    if km >= 10:
-        return 1.0
-    return max(0.6, km / 10.0)
+# State-Attribute, die HA selbst setzt (beim Restore nicht übernehmen)
+_ENTITY_ATTRS = frozenset({
+    "unit_of_measurement", "device_class", "state_class", "friendly_name", "icon",
+})
+
+# Attribute, die nicht in den Recorder gehen (statisch bzw. reine Diagnose)
+_STATIC_ATTRS = frozenset({
+    "on_threshold", "off_threshold", "dark_sensitivity_pct",
+    "on_threshold_eff", "off_threshold_eff", "mode", "smooth_seconds",
+})
+_DIAG_ATTRS = frozenset({
+    "elevation", "azimuth", "clear_sky_lux", "cloud_divisor",
+    "rain_gain", "visibility_gain", "low_sun_gain",
+    "weather_state", "cloud_input", "precip_mm_h", "visibility_km",
+    "raw_lux", "recompute_triggers", "writes", "writes_suppressed",
+    "trend_short", "trend_long", "next_update_seconds", "scan_reason", "calibration",
+    "sources",
+})
+
+
+class IlluminancePlusExtraData(ExtraStoredData):
+    """Zusätzlich gesicherter Zustand (Trend-Puffer, EMA, Hysterese, Kalibrierung) über Neustarts hinweg."""
+
+    def __init__(
+        self,
+        trend: list[list[float]],
+        ema: float | None = None,
+        is_dark: bool | None = None,
+        dark_soon: bool | None = None,
+        ts: float | None = None,
+        calibration: dict[str, Any] | None = None,
+        rooms: list[bool] | None = None,
+        daily: dict[str, Any] | None = None,
+        trend_short: list[list[float]] | None = None,
+    ) -> None:
+        # ``trend`` = langes Fenster (Schlüssel aus älteren Versionen beibehalten)
+        self.trend = trend
+        self.ema = ema
+        self.is_dark = is_dark
+        self.dark_soon = dark_soon
+        self.ts = ts
+        self.calibration = calibration
+        self.rooms = rooms
+        self.daily = daily
+        self.trend_short = trend_short
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "trend": self.trend,
+            "ema": self.ema,
+            "is_dark": self.is_dark,
+            "dark_soon": self.dark_soon,
+            "ts": self.ts,
+            "calibration": self.calibration,
+            "rooms": self.rooms,
+            "daily": self.daily,
+            "trend_short": self.trend_short,
+        }
 
-def _gain_low_sun(elev: float) -> float:
-    if elev >= 10:
-        return 1.0
-    if elev <= 0:
-        return 1.2
-    return 1.0 + (10 - elev) * 0.02
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "IlluminancePlusExtraData | None":
+        if not isinstance(data, dict):
+            return None
+        trend = data.get("trend")
+        is_dark = data.get("is_dark")
+        dark_soon = data.get("dark_soon")
+        calibration = data.get("calibration")
+        rooms = data.get("rooms")
+        daily = data.get("daily")
+        trend_short = data.get("trend_short")
+        return cls(
+            trend if isinstance(trend, list) else [],
+            _opt_float(data.get("ema")),
+            is_dark if isinstance(is_dark, bool) else None,
+            dark_soon if isinstance(dark_soon, bool) else None,
+            _opt_float(data.get("ts")),
+            calibration if isinstance(calibration, dict) else None,
+            rooms if isinstance(rooms, list) and all(isinstance(r, bool) for r in rooms) else None,
+            daily if isinstance(daily, dict) else None,
+            trend_short if isinstance(trend_short, list) else None,
+        )
 
 
 # --------------------------- Entity --------------------------- #
-class IlluminancePlus(SensorEntity):
+class IlluminancePlus(RestoreEntity, SensorEntity):
     """Lux-Sensor mit wetterabhängiger Dämpfung + Attributen; is_dark basiert auf geglätteter Steuergröße."""
 
     _attr_device_class = "illuminance"
     _attr_state_class = "measurement"
     _attr_native_unit_of_measurement = UNIT_LUX
     _attr_should_poll = False
-
-    def __init__(self, hass: HomeAssistant, name: str, cfg: dict[str, Any], entry_id: str) -> None:
+    _unrecorded_attributes = _STATIC_ATTRS | _DIAG_ATTRS | frozenset({"windows"})
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        opts: CompiledOptions,
+        entry_id: str,
+        coordinator: IlluminanceCoordinator,
+        diagnostics: "IlluminancePlusDiagnostics | None" = None,
+        daily: "IlluminancePlusDaily | None" = None,
+    ) -> None:
         self.hass = hass
-        self._attr_name = name or DEFAULT_NAME
+        self._coord = coordinator
+        self._diag = diagnostics
+        self._daily_entity = daily
+        self._opts = opts
+        self._attr_name = opts.name
         self._attr_unique_id = f"{entry_id}_lux"
-        self.cfg: dict[str, Any] = cfg
         self._entry_id = entry_id
+        self._entry_data: dict[str, Any] = {}
+        self._signal = SIGNAL_RESULT.format(entry_id)
 
-        # Hysterese & Glättung
+        # Hysterese & Glättung (Räume: eigene Hysterese je Raum)
         self._is_dark: bool | None = None
+        self._rooms_dark: list[bool | None] = [None] * len(opts.rooms)
         self._ema: float | None = None  # geglättete Lux für Steuerung
-        self._tau: float = float(cfg.get(CONF_SMOOTH_SECONDS, DEFAULT_SMOOTH_SECONDS))
-        self._scan_secs: float = float(cfg.get(CONF_SCAN, DEFAULT_SCAN_SECONDS))
 
-        # Trend
-        self._last_control: float | None = None
+        # Trend: Ringpuffer-Fenster über control_lux (kurz/lang)
+        self._trend_short = TrendWindow(opts.trend_win_short * 60)
+        self._trend_long = TrendWindow(opts.trend_win_long * 60)
         self._slope_lx_min: float | None = None
 
-        self._unsub = async_track_time_interval(
-            hass, self._update, timedelta(seconds=int(self._scan_secs))
-        )
+        # Zeitpunkt der letzten Berechnung (für EMA/Trend bei variablen Abständen)
+        self._last_run: float | None = None
 
-    async def async_added_to_hass(self) -> None:
-        await self._update(None)
+        # Start: erste Berechnung ggf. aufschieben, bis die Quellen da sind
+        self._start_pending = False
+        self._unsub_start: list = []
 
-    async def async_will_remove_from_hass(self) -> None:
+        # Tageswerte: laufende Integrale, Abschluss zur lokalen Mitternacht
+        self._daily: DailyAccumulator | None = DailyAccumulator(dt_util.DEFAULT_TIME_ZONE) if daily is not None else None
+        self._unsub_midnight = None
+
+        # Online-Kalibrierung gegen einen echten Lux-Sensor (None = keine Referenz)
+        self._calib: RlsCalibrator | None = RlsCalibrator(opts.max_cloud_div) if opts.reference else None
+        self._unsub_reference = None
+
+        # Dämmerungs-Flags (vom Koordinator zu exakten Übergangszeitpunkten geliefert)
+        self._unsub_twilight = None
+
+        # Ereignisgesteuert: Quell-Änderungen bündeln (Debounce + Mindestabstand)
+        self._unsub_sources = None
+        self._unsub_pending = None
+        self._triggers: dict[str, int] = {
+            TRIGGER_START: 0, TRIGGER_TIMER: 0, TRIGGER_SOURCE: 0, TRIGGER_OPTIONS: 0, TRIGGER_SERVICE: 0,
+            "coalesced": 0, "refresh_coalesced": 0,
+        }
+
+        # Schreib-Unterdrückung: zuletzt geschriebene Kernwerte
+        self._written: tuple | None = None
+        self._last_write: float = 0.0
+        self._writes = 0
+        self._writes_suppressed = 0
+
+        # Adaptiver Takt: nach jeder Berechnung genau einen Rückruf neu setzen
+        self._planner = ScanPlanner()
+        self._unsub_next = None
+        self._next_secs: float | None = None
+        self._scan_reason: str | None = None
+
+        # Instrumentierung (None = aus; kommt aus den Eintragsdaten)
+        self._stats: EntryStats | None = None
+
+        # Dienst refresh/refresh_all: höchstens eine laufende Neuberechnung, parallele Aufrufe warten mit
+        self._refresh_task: asyncio.Task | None = None
+        # Timer, Quell-Debounce, Optionen und Dienste rechnen nie verschränkt
+        self._compute_lock = asyncio.Lock()
+        self._backfilling = False
+
+        self._unsub = None
+        self._timer_secs: float = 0.0
+        self._schedule_timer()
+
+    def _schedule_timer(self) -> None:
+        """Fester Intervall-Timer; im Event- und adaptiven Modus nur als Sicherheitsnetz."""
+        secs = float(SAFETY_SCAN_SECONDS) if self._opts.adaptive else self._opts.timer_secs
+        if secs == self._timer_secs and (self._unsub or not secs):
+            return
         if self._unsub:
             self._unsub()
             self._unsub = None
+        self._timer_secs = secs
+        if secs:
+            self._unsub = async_track_time_interval(
+                self.hass, self._on_timer, timedelta(seconds=int(secs))
+            )
+            if self._stats is not None:
+                self._stats.timer_reschedules += 1
+
+    def _arm_next(self, secs: float) -> None:
+        """Nächste adaptive Auswertung einplanen (ersetzt einen offenen Rückruf)."""
+        if self._unsub_next:
+            self._unsub_next()
+        self._unsub_next = async_call_later(self.hass, secs, self._on_next)
+        if self._stats is not None:
+            self._stats.timer_reschedules += 1
+
+    def _subscribe_sources(self) -> None:
+        """Quellen beim Koordinator anmelden (Rückruf nur im Event-Modus)."""
+        if self._unsub_sources:
+            self._unsub_sources()
+        self._unsub_sources = self._coord.async_track(
+            list(self._opts.sources), self._on_source_change if self._opts.event_driven else None
+        )
+
+    def _subscribe_reference(self) -> None:
+        """Referenz-Lux beim Koordinator anmelden (nur Kalibrierung, keine Neuberechnung)."""
+        if self._unsub_reference:
+            self._unsub_reference()
+            self._unsub_reference = None
+        if self._opts.reference:
+            self._unsub_reference = self._coord.async_track([self._opts.reference], self._on_reference)
+
+    @callback
+    def _on_reference(self, _entity_id: str) -> None:
+        """Neuer Referenzwert: ein RLS-Schritt mit den aktuellen Eingaben (O(1))."""
+        calib, opts, coord = self._calib, self._opts, self._coord
+        ref = coord.lux(opts.reference)
+        if calib is None or ref is None:
+            return
+        now_ts = dt_util.utcnow().timestamp()
+        elev, _az = coord.sun(now_ts)
+        clear = opts.model.clear_sky(elev)
+        if not calib.accepts(now_ts, elev, clear, ref):
+            return
+        weather, cloud, precip, vis = coord.inputs(opts.weather, opts.cloud, opts.precip, opts.vis)
+        x = features(elev, cloud, precip, vis, weather, opts.max_cloud_div, opts.fallback)
+        calib.update(now_ts, x, clear, ref)
+
+    @callback
+    def _on_midnight(self, now: datetime) -> None:
+        """Tag abschließen, auch wenn der adaptive Takt gerade schläft (letzter Wert gehalten)."""
+        daily = self._daily
+        if daily is None or daily.last_lux is None:
+            return
+        # ungerundeter Wert der letzten Berechnung, nicht das gerundete ``result.lux``
+        self._feed_daily(now.timestamp(), daily.last_lux, daily.last_dark)
+
+    def _feed_daily(self, ts: float, lux: float, is_dark: bool | None) -> None:
+        for summary in self._daily.add(ts, lux, is_dark):
+            if self._daily_entity is not None:
+                self._daily_entity.async_publish(summary)
+            async_import_daily(self.hass, self._entry_id, self._opts.name, summary)
+
+    def _listen_twilight(self) -> None:
+        if self._unsub_twilight:
+            self._unsub_twilight()
+            self._unsub_twilight = None
+        if self._opts.twilight_enabled:
+            self._unsub_twilight = self._coord.twilight.async_listen(self._on_twilight)
+
+    @callback
+    def _on_twilight(self, state: dict[str, Any]) -> None:
+        """Übergang erreicht: nur die Flags aktualisieren und schreiben (keine Neuberechnung)."""
+        attrs = getattr(self, "_attr_extra_state_attributes", None)
+        if attrs is None:
+            return
+        self._attr_extra_state_attributes = {**attrs, **state}
+        self._writes += 1
+        self.async_write_ha_state()
 
-    def _smooth(self, raw: float) -> float:
+    @property
+    def extra_restore_state_data(self) -> IlluminancePlusExtraData:
+        result = self._entry_data.get("result")
+        return IlluminancePlusExtraData(
+            self._trend_long.samples(),
+            self._ema,
+            self._is_dark,
+            None if result is None else result.dark_soon,
+            self._last_run,
+            None if self._calib is None else self._calib.as_dict(),
+            None if None in self._rooms_dark else list(self._rooms_dark),
+            None if self._daily is None else self._daily.as_dict(),
+            self._trend_short.samples(),
+        )
+
+    async def _async_restore(self) -> None:
+        """Trend, EMA und Hysterese übernehmen; die EMA zerfällt über die echte Pause."""
+        extra = await self.async_get_last_extra_data()
+        data = IlluminancePlusExtraData.from_dict(extra.as_dict()) if extra else None
+        if data is None:
+            return
+        now_ts = dt_util.utcnow().timestamp()
+        # ältere Stände ohne ``trend_short``: kurzes Fenster füllt sich neu
+        if data.trend_short is not None:
+            self._trend_short.load(data.trend_short, now_ts)
+        self._trend_long.load(data.trend, now_ts)
+        # Tageswerte: laufender Tag geht beim Neustart nicht verloren
+        if self._daily is not None and data.daily is not None:
+            self._daily = DailyAccumulator.from_dict(data.daily, dt_util.DEFAULT_TIME_ZONE)
+        # Kalibrierung altert nicht mit der Pause (Vergessensfaktor regelt die Drift)
+        if self._calib is not None and data.calibration is not None:
+            self._calib = RlsCalibrator.from_dict(data.calibration, self._opts.max_cloud_div)
+        if data.ts is None or not 0 <= now_ts - data.ts <= RESTORE_MAX_AGE:
+            return
+        # _last_run = Zeitpunkt der letzten Berechnung -> erster Zyklus glättet mit
+        # dt = tatsächlicher Pause (alpha -> 1 bei langer Pause, kein Sprung bei kurzer)
+        self._ema = data.ema
+        self._is_dark = data.is_dark
+        self._last_run = data.ts
+        if data.rooms is not None and len(data.rooms) == len(self._rooms_dark):
+            self._rooms_dark = list(data.rooms)
+
+        # bis zur ersten Berechnung den letzten State zeigen und Helper damit vorbelegen
+        last = await self.async_get_last_state()
+        lux = None if last is None else _opt_float(last.state)
+        if lux is None or data.is_dark is None:
+            return
+        self._attr_native_value = lux
+        self._attr_extra_state_attributes = {
+            k: v for k, v in last.attributes.items() if k not in _ENTITY_ATTRS
+        }
+        elev, az = self._coord.sun(data.ts)
+        self._entry_data["result"] = IlluminanceResult(
+            data.ts, lux, round(data.ema if data.ema is not None else lux, 0),
+            data.is_dark, bool(data.dark_soon), False, False, round(elev, 2), round(az, 1),
+            tuple(self._rooms_dark) if None not in self._rooms_dark else (),
+        )
+
+    def _missing_inputs(self) -> list[str]:
+        opts = self._opts
+        return [
+            eid for eid in (opts.weather, opts.cloud, opts.precip, opts.vis)
+            if eid and not self._coord.available(eid)
+        ]
+
+    async def async_added_to_hass(self) -> None:
+        self._entry_data = self.hass.data[DOMAIN][self._entry_id]
+        self._entry_data["sensor"] = self
+        self._stats = self._entry_data.get("stats")
+        await self._async_restore()
+        self._subscribe_sources()
+        self._subscribe_reference()
+        self._listen_twilight()
+        if self._daily is not None:
+            self._unsub_midnight = async_track_time_change(
+                self.hass, self._on_midnight, hour=0, minute=0, second=0
+            )
+        missing = self._missing_inputs()
+        if missing and not self.hass.is_running:
+            # HA startet noch: erst rechnen, wenn alle Quellen da sind (oder nach Timeout)
+            self._start_pending = True
+            self._unsub_start = [
+                self._coord.async_track(missing, self._on_start_input),
+                async_call_later(self.hass, STARTUP_WAIT_SECONDS, self._on_start_timeout),
+            ]
+            return
+        await self._update(None, TRIGGER_START)
+
+    @callback
+    def _on_start_input(self, _entity_id: str) -> None:
+        if self._start_pending and not self._missing_inputs():
+            self._async_start()
+
+    @callback
+    def _on_start_timeout(self, _now) -> None:
+        if self._start_pending:
+            self._async_start()
+
+    def _cancel_start_wait(self) -> None:
+        self._start_pending = False
+        for unsub in self._unsub_start:
+            unsub()
+        self._unsub_start = []
+
+    @callback
+    def _async_start(self) -> None:
+        """Aufgeschobene erste Berechnung auslösen."""
+        self._cancel_start_wait()
+        self.hass.async_create_task(self._update(None, TRIGGER_START))
+
+    async def async_will_remove_from_hass(self) -> None:
+        entry_data = self.hass.data.get(DOMAIN, {}).get(self._entry_id)
+        if entry_data and entry_data.get("sensor") is self:
+            entry_data.pop("sensor")
+        for unsub in (
+            self._unsub, self._unsub_sources, self._unsub_pending, self._unsub_twilight, self._unsub_next,
+            self._unsub_reference, self._unsub_midnight,
+        ):
+            if unsub:
+                unsub()
+        self._unsub = self._unsub_sources = self._unsub_pending = self._unsub_twilight = None
+        self._unsub_next = self._unsub_reference = self._unsub_midnight = None
+        self._coord.forecasts.forget(self._on_forecast)
+        self._cancel_start_wait()
+
+    async def async_apply_options(self, opts: CompiledOptions) -> None:
+        """Neue Optionen ohne Reload übernehmen (Zustand bleibt erhalten)."""
+        old, self._opts = self._opts, opts
+        self._stats = self._entry_data.get("stats")
+        self._cancel_start_wait()
+        self._trend_short.set_window(opts.trend_win_short * 60)
+        self._trend_long.set_window(opts.trend_win_long * 60)
+        if old.sources != opts.sources or old.event_driven != opts.event_driven:
+            self._subscribe_sources()
+        if old.twilight_enabled != opts.twilight_enabled:
+            self._listen_twilight()
+        if old.reference != opts.reference:
+            # anderer Referenzsensor -> neu lernen
+            self._calib = RlsCalibrator(opts.max_cloud_div) if opts.reference else None
+            self._subscribe_reference()
+        if not opts.adaptive and self._unsub_next:
+            self._unsub_next()
+            self._unsub_next = None
+            self._next_secs = self._scan_reason = None
+        self._schedule_timer()
+        await self._update(None, TRIGGER_OPTIONS)
+
+    async def _on_timer(self, now) -> None:
+        if self._start_pending:
+            return
+        await self._update(now, TRIGGER_TIMER)
+
+    async def _on_next(self, now) -> None:
+        self._unsub_next = None
+        await self._update(now, TRIGGER_TIMER)
+
+    @callback
+    def _on_source_change(self, _entity_id: str) -> None:
+        """Quell-Änderung: genau eine verzögerte Neuberechnung einplanen."""
+        if self._start_pending:
+            return
+        if self._unsub_pending is not None:
+            self._triggers["coalesced"] += 1
+            return
+        delay = 0.0
+        if self._last_run is not None:
+            delay = max(0.0, self._last_run + self._opts.min_gap - dt_util.utcnow().timestamp())
+        self._unsub_pending = async_call_later(self.hass, delay, self._on_debounced)
+        if self._stats is not None:
+            self._stats.timer_reschedules += 1
+
+    @callback
+    def _on_forecast(self, entity_id: str) -> None:
+        """Neue stündliche Prognose im Cache: wie eine Quell-Änderung neu rechnen."""
+        if self._opts.forecast_enabled and entity_id == self._opts.weather:
+            self._on_source_change(entity_id)
+
+    async def _on_debounced(self, now) -> None:
+        self._unsub_pending = None
+        await self._update(now, TRIGGER_SOURCE)
+
+    async def async_refresh(self) -> dict[str, Any]:
+        """Sofort neu rechnen und das Ergebnis liefern (Dienste ``refresh``/``refresh_all``).
+
+        Trifft ein Aufruf auf eine noch laufende Neuberechnung, wartet er auf
+        deren Ergebnis statt eine zweite zu starten.
+        """
+        task = self._refresh_task
+        if task is None:
+            task = self._refresh_task = self.hass.async_create_task(self._async_refresh_once())
+        else:
+            self._triggers["refresh_coalesced"] += 1
+        return dict(await asyncio.shield(task))
+
+    async def _async_refresh_once(self) -> dict[str, Any]:
+        try:
+            # expliziter Auftrag: nicht länger auf fehlende Quellen warten
+            if self._start_pending:
+                self._cancel_start_wait()
+            await self._update(None, TRIGGER_SERVICE)
+        finally:
+            self._refresh_task = None
+        result = self._entry_data.get("result")
+        return {} if result is None else asdict(result)
+
+    async def async_backfill(
+        self, start: datetime, end: datetime | None = None, overwrite: bool = False
+    ) -> dict[str, Any]:
+        """Dienst ``backfill``: Zeitraum aus der Recorder-Historie in die Langzeitstatistik rechnen."""
+        if "recorder" not in self.hass.config.components:
+            raise HomeAssistantError("Backfill requires the recorder integration")
+        end = end or dt_util.utcnow()
+        if dt_util.as_utc(start) >= dt_util.as_utc(end):
+            raise ServiceValidationError("Backfill start must be before end")
+        if self._backfilling:
+            raise HomeAssistantError(f"Backfill for {self.entity_id} is already running")
+        self._backfilling = True
+        try:
+            return await async_backfill(self.hass, self.entity_id, self._opts, start, end, overwrite)
+        finally:
+            self._backfilling = False
+
+    async def async_simulate(
+        self,
+        start: datetime,
+        candidates: list[dict[str, Any]],
+        end: datetime | None = None,
+        source: str = SOURCE_MODEL,
+    ) -> dict[str, Any]:
+        """Dienst ``simulate``: Kandidaten-Schwellen über einen vergangenen Zeitraum durchspielen."""
+        if "recorder" not in self.hass.config.components:
+            raise HomeAssistantError("Simulation requires the recorder integration")
+        end = end or (start + timedelta(days=1))
+        span = dt_util.as_utc(end) - dt_util.as_utc(start)
+        if span <= timedelta(0):
+            raise ServiceValidationError("Simulation start must be before end")
+        if span > MAX_SPAN:
+            raise ServiceValidationError(f"Simulation is limited to {MAX_SPAN.days} days")
+        model = self._opts.model
+        if self._calib is not None and self._calib.ready:
+            model = replace(model, coef=self._calib.coefficients())
+        try:
+            return await async_simulate(
+                self.hass, self.entity_id, self._opts, model, start, end, source, candidates
+            )
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+
+    def _window_fn(self, model, cloud, precip, vis, weather) -> Callable[[float, float], int] | None:
+        """Fenster-Flags zu einem Sonnenstand (Lux aus dem Modell mit den aktuellen Eingaben)."""
+        opts = self._opts
+        if not opts.windows_enabled or not len(opts.windows):
+            return None
+        windows, glare = opts.windows, opts.glare_enabled
+
+        def _mask(elev: float, az: float) -> int:
+            lux = model.raw(elev, cloud, precip, vis, weather) if glare else 0.0
+            return windows.mask(elev, az, lux, glare)
+
+        return _mask
+
+    def _smooth(self, raw: float, dt: float) -> float:
         """Exponentiell gleitender Mittelwert (EMA) über 'tau' Sekunden."""
-        if self._tau is None or self._tau <= 0:
+        tau = self._opts.tau
+        if tau <= 0:
             return raw
-        alpha = 1.0 - math.exp(-self._scan_secs / max(1.0, self._tau))
-        if self._ema is None:
-            self._ema = raw
-        else:
-            self._ema = (1.0 - alpha) * self._ema + alpha * raw
+        self._ema = ema_step(self._ema, raw, dt, tau)
         return self._ema
 
-    async def _update(self, _now) -> None:
-        # >>> Optionen pro Zyklus frisch einlesen (greift sofort)
-        entry = self.hass.config_entries.async_get_entry(self._entry_id)
-        if entry is not None:
-            self.cfg = {**entry.data, **entry.options}
-            # auch Änderungen an Intervall/Glättung mitnehmen
-            self._tau = float(self.cfg.get(CONF_SMOOTH_SECONDS, DEFAULT_SMOOTH_SECONDS))
-            new_scan = float(self.cfg.get(CONF_SCAN, DEFAULT_SCAN_SECONDS))
-            if new_scan != self._scan_secs:
-                self._scan_secs = new_scan
-                if self._unsub:
-                    self._unsub()
-                self._unsub = async_track_time_interval(
-                    self.hass, self._update, timedelta(seconds=int(self._scan_secs))
-                )
-
-        # Eingaben/Sonne
-        elev = float(_attr(self.hass, "sun.sun", "elevation") or -90.0)
-        az_raw = _attr(self.hass, "sun.sun", "azimuth")
-        try:
-            az = float(az_raw) if az_raw is not None else None
-        except Exception:  # noqa: BLE001
-            az = None
-
-        mode = self.cfg.get(CONF_MODE, DEFAULT_MODE)
-        clear = _clear_sky_lux(elev, mode)
-
-        weather_state = _state(self.hass, self.cfg.get(CONF_WEATHER))
-        cloud_val = _state_as_float(self.hass, self.cfg.get(CONF_CLOUD))
-        precip = _state_as_float(self.hass, self.cfg.get(CONF_PRECIP)) or 0.0
-        vis = _state_as_float(self.hass, self.cfg.get(CONF_VIS)) or 99.0
-
-        # Einheiten-Normalisierung
-        vis_u = _attr(self.hass, self.cfg.get(CONF_VIS), "unit_of_measurement")
-        if vis_u and isinstance(vis, (int, float)) and str(vis_u).lower() in ("mi", "mile", "miles"):
-            vis = float(vis) * 1.60934
-        pr_u = _attr(self.hass, self.cfg.get(CONF_PRECIP), "unit_of_measurement")
-        if pr_u and isinstance(precip, (int, float)) and str(pr_u).lower() in ("in/h", "inch/h", "inches/hour", "in"):
-            precip = float(precip) * 25.4
+    def diagnostic_counters(self) -> dict[str, Any]:
+        """Immer mitlaufende Zähler (auch ohne Instrumentierung) für den Diagnose-Download."""
+        return {
+            "recompute_triggers": dict(self._triggers),
+            "writes": self._writes,
+            "writes_suppressed": self._writes_suppressed,
+            "last_run": self._last_run,
+            "next_update_seconds": self._next_secs,
+            "scan_reason": self._scan_reason,
+            "calibration": None if self._calib is None else self._calib.attributes(),
+            "today": None if self._daily is None else self._daily.summary(),
+            "sources": self._coord.source_health(s for s in self._opts.sources if s != SUN_ENTITY),
+        }
 
-        # Dämpfungen
-        div_cloud = _cloud_divisor(
-            cloud_val, weather_state,
-            float(self.cfg.get(CONF_MAX_CLOUD_DIV, DEFAULT_MAX_CLOUD_DIV)),
-            DEFAULT_FALLBACK,
+    async def _update(self, _now, trigger: str = TRIGGER_TIMER) -> None:
+        async with self._compute_lock:
+            try:
+                stats = self._stats
+                if stats is None:
+                    await self._compute(trigger)
+                    return
+                started = time.perf_counter()
+                await self._compute(trigger)
+                stats.record_update(trigger, self._last_run or 0.0, time.perf_counter() - started)
+            finally:
+                # Berechnung vor _arm_next abgebrochen: adaptiven Takt trotzdem weiterführen
+                if self._opts.adaptive and self._unsub_next is None and self._unsub is not None:
+                    self._arm_next(self._next_secs or ADAPTIVE_MAX_SECONDS)
+
+    def _count_inputs(self, stats: EntryStats) -> None:
+        """Quell-Lookups und fehlende Quellen zählen (nur mit Instrumentierung)."""
+        opts = self._opts
+        for eid in (opts.weather, opts.cloud, opts.precip, opts.vis):
+            if not eid:
+                continue
+            stats.state_reads += 1
+            if not self._coord.available(eid):
+                stats.unavailable[eid] = stats.unavailable.get(eid, 0) + 1
+
+    async def _compute(self, trigger: str) -> None:
+        opts = self._opts
+        self._triggers[trigger] += 1
+        now_ts = dt_util.utcnow().timestamp()
+        # tatsächlicher Abstand zur letzten Berechnung (Event-Modus: variabel)
+        dt = opts.scan_secs if self._last_run is None else max(1.0, now_ts - self._last_run)
+        self._last_run = now_ts
+
+        # Eingaben/Sonne (geteilt über den Koordinator, pro State einmal geparst)
+        coord = self._coord
+        elev, az = coord.sun(now_ts)
+
+        model = opts.model
+        calib = self._calib
+        if calib is not None and calib.ready:
+            model = replace(model, coef=calib.coefficients())
+        clear = model.clear_sky(elev)
+
+        # ein Read der Wetter-Entität; fehlende Sensoren aus deren Attributen
+        weather_state, cloud_val, precip, vis = coord.inputs(
+            opts.weather, opts.cloud, opts.precip, opts.vis
         )
-        gain_rain = _gain_rain(precip)
-        gain_vis = _gain_visibility(vis, weather_state)
-        gain_low = _gain_low_sun(elev)
+        if self._stats is not None:
+            self._count_inputs(self._stats)
+
+        # Dämpfungen
+        div_cloud = cloud_divisor(cloud_val, weather_state, model.max_div, model.fallback)
+        g_rain = gain_rain(precip)
+        g_vis = gain_visibility(vis, weather_state)
+        g_low = gain_low_sun(elev)
 
         # Roh-Lux (für Charts/State)
-        raw_lux = 0.0 if clear <= 0 else clear / max(1.0, (div_cloud * gain_rain * gain_vis * gain_low))
-        self._attr_native_value = round(raw_lux, 0)
+        if model.coef is not None:
+            raw_lux = model.raw(elev, cloud_val, precip, vis, weather_state)
+        else:
+            raw_lux = 0.0 if clear <= 0 else clear / max(1.0, (div_cloud * g_rain * g_vis * g_low))
+        raw_rounded = round(raw_lux, 0)
 
         # Steuer-Lux (geglättet) für is_dark
-        control_lux = self._smooth(raw_lux)
-
-        # >>> Empfindlichkeit robust clampen: 5–300 %
-        sens_pct = float(self.cfg.get(CONF_DARK_SENSITIVITY, DEFAULT_DARK_SENSITIVITY))
-        sens_pct = max(5.0, min(300.0, sens_pct))
+        control_lux = self._smooth(raw_lux, dt)
 
-        on_base = float(self.cfg.get(CONF_ON, 1000))
-        off_base = float(self.cfg.get(CONF_OFF, 3000))
-        on_eff = on_base * (sens_pct / 100.0)
-        off_eff = off_base * (sens_pct / 100.0)
+        on_eff = opts.on_eff
+        off_eff = opts.off_eff
 
         # Hysterese
-        if self._is_dark is None:
-            self._is_dark = (control_lux <= on_eff)
-        else:
-            if control_lux <= on_eff:
-                self._is_dark = True
-            elif control_lux >= off_eff:
-                self._is_dark = False
-
-        # Trend (lx/min)
-        if self._last_control is None:
-            slope = None
-        else:
-            minutes = max(1e-9, self._scan_secs / 60.0)
-            slope = (control_lux - self._last_control) / minutes
-        self._last_control = control_lux
-        self._slope_lx_min = slope
+        self._is_dark = dark_step(self._is_dark, control_lux, on_eff, off_eff)
 
-        # dark_soon (einfach + optional Trend/Forecast einbeziehen)
-        margin = float(self.cfg.get(CONF_DARK_SOON_MARGIN, DEFAULT_DARK_SOON_MARGIN))
-        dark_soon = control_lux <= (on_eff + margin)
+        # Räume: Hysterese je Raum im selben Durchlauf (Schwellen vorkompiliert)
+        if self._rooms_dark:
+            opts.rooms.evaluate(control_lux, self._rooms_dark)
 
-        if bool(self.cfg.get(CONF_TREND_ENABLED, DEFAULT_TREND_ENABLED)) and slope is not None:
-            th_down = float(self.cfg.get(CONF_TREND_TH_DOWN, DEFAULT_TREND_TH_DOWN))
-            if slope <= th_down:
-                dark_soon = True
+        # Trend (lx/min): Kleinste-Quadrate-Steigung über die konfigurierten Fenster
+        self._trend_short.push(now_ts, control_lux)
+        self._trend_long.push(now_ts, control_lux)
+        slope = self._trend_short.slope_per_min()
+        slope_long = self._trend_long.slope_per_min()
+        self._slope_lx_min = slope
 
-        if bool(self.cfg.get(CONF_FORECAST_ENABLED, DEFAULT_FORECAST_ENABLED)) and slope is not None:
-            # einfache Heuristik: bereits in Nähe der OFF-Schwelle und fallender Trend
-            if slope < 0 and control_lux <= (off_eff + margin):
-                dark_soon = True
+        darkening_fast = brightening_fast = False
+        if opts.trend_enabled and slope is not None:
+            darkening_fast = slope <= opts.trend_th_down
+            brightening_fast = slope >= opts.trend_th_up
+
+        # Adaptiver Takt: nächsten sinnvollen Zeitpunkt bestimmen (auch wenn nicht geschrieben wird)
+        if opts.adaptive:
+            self._next_secs, self._scan_reason = self._planner.plan(
+                coord.ephemeris, now_ts, elev, control_lux, self._is_dark, on_eff, off_eff, slope,
+                partial(model.raw, cloud=cloud_val, precip=precip, vis=vis, weather=weather_state),
+                opts.scan_cap,
+                zip(opts.rooms.on_eff, opts.rooms.off_eff, self._rooms_dark),
+                self._window_fn(model, cloud_val, precip, vis, weather_state),
+            )
+            self._arm_next(self._next_secs)
 
-        # Attribute
-        self._attr_extra_state_attributes = {
-            "is_dark": self._is_dark,
-            "dark_soon": dark_soon,
-            "on_threshold": on_base,
-            "off_threshold": off_base,
-            "dark_sensitivity_pct": round(sens_pct, 1),
-            "on_threshold_eff": round(on_eff, 0),
-            "off_threshold_eff": round(off_eff, 0),
+        # dark_soon (einfach + optional Trend/Forecast einbeziehen)
+        margin = opts.dark_soon_margin
+        dark_soon = control_lux <= (on_eff + margin) or darkening_fast
+
+        # Kurzfrist-Prognose: Clear-Sky-Kurve + stündliche Wetterprognose zu künftigen Zeitpunkten
+        forecast: dict[str, float] = {}
+        next_change: str | None = None
+        if opts.forecast_enabled:
+            # nur Cache lesen; eine abgelaufene Prognose wird im Hintergrund geholt
+            hourly = coord.forecasts.hourly(opts.weather, self._on_forecast)
+            fc = LuxForecaster(
+                coord.ephemeris,
+                model,
+                hourly,
+                (cloud_val, precip, vis, weather_state),
+            )
+            for minutes in opts.forecast_horizons:
+                lux = fc.lux_at(now_ts + minutes * 60)
+                forecast[f"lux_in_{minutes}m"] = round(lux, 0)
+                if lux <= on_eff:
+                    dark_soon = True
+            change_ts = fc.next_dark_change(now_ts, self._is_dark, on_eff, off_eff)
+            if change_ts is not None:
+                next_change = datetime.fromtimestamp(change_ts, timezone.utc).isoformat()
+
+        # Fenster/Blendung: ein Durchlauf über die kompilierte Fenster-Tabelle
+        windows = None
+        window_flags: tuple = ()
+        if opts.windows_enabled and len(opts.windows):
+            windows = opts.windows.evaluate(elev, az, raw_lux, opts.glare_enabled)
+            window_flags = tuple((w["sun"], w.get("glare")) for w in windows.values())
+
+        # Ergebnis an Abnehmer (Helper) verteilen – auch wenn der Sensor selbst nicht schreibt
+        control_rounded = round(control_lux, 0)
+        result = IlluminanceResult(
+            now_ts, raw_rounded, control_rounded, self._is_dark, dark_soon,
+            darkening_fast, brightening_fast, round(elev, 2), round(az, 1), tuple(self._rooms_dark),
+            None if slope is None else round(slope, 1), tuple(forecast.items()), next_change,
+        )
+        self._entry_data["result"] = result
+        async_dispatcher_send(self.hass, self._signal, result)
+        async_dispatcher_send(self.hass, SIGNAL_RESULT_ANY, self._entry_id, result)
+        if self._daily is not None:
+            self._feed_daily(now_ts, raw_lux, self._is_dark)
+
+        # Nur schreiben, wenn sich etwas Relevantes geändert hat
+        flags = (
+            self._is_dark, dark_soon, weather_state, next_change,
+            darkening_fast, brightening_fast, window_flags,
+        )
+        if not self._significant(trigger, now_ts, raw_rounded, control_rounded, flags):
+            self._writes_suppressed += 1
+            return
+
+        diag = {
             "elevation": round(elev, 2),
-            "azimuth": round(az, 1) if isinstance(az, (int, float)) else az,
+            "azimuth": round(az, 1),
             "clear_sky_lux": round(clear, 0),
             "cloud_divisor": round(div_cloud, 2),
-            "rain_gain": gain_rain,
-            "visibility_gain": gain_vis,
-            "low_sun_gain": gain_low,
+            "rain_gain": g_rain,
+            "visibility_gain": g_vis,
+            "low_sun_gain": g_low,
             "weather_state": weather_state,
             "cloud_input": cloud_val,
             "precip_mm_h": precip,
             "visibility_km": vis,
-            "mode": mode,
-            "raw_lux": round(raw_lux, 0),
-            "control_lux": round(control_lux, 0),
+            "raw_lux": raw_rounded,
+            "recompute_triggers": dict(self._triggers),
+            "writes": self._writes + 1,
+            "writes_suppressed": self._writes_suppressed,
+            "sources": coord.source_health(s for s in opts.sources if s != SUN_ENTITY),
+        }
+        if calib is not None:
+            diag["calibration"] = calib.attributes()
+        if opts.adaptive:
+            diag["next_update_seconds"] = round(self._next_secs or 0.0)
+            diag["scan_reason"] = self._scan_reason
+
+        # Attribute
+        attrs = {
+            "is_dark": self._is_dark,
+            "dark_soon": dark_soon,
+            "on_threshold": opts.on_base,
+            "off_threshold": opts.off_base,
+            "dark_sensitivity_pct": round(opts.sens_pct, 1),
+            "on_threshold_eff": round(on_eff, 0),
+            "off_threshold_eff": round(off_eff, 0),
+            "mode": opts.mode,
+            "control_lux": control_rounded,
             "slope_lx_per_min": None if slope is None else round(slope, 1),
-            "smooth_seconds": self._tau,
+            "smooth_seconds": opts.tau,
         }
+        if opts.trend_enabled:
+            attrs["darkening_fast"] = darkening_fast
+            attrs["brightening_fast"] = brightening_fast
+            diag["trend_short"] = _trend_attrs(self._trend_short, slope)
+            diag["trend_long"] = _trend_attrs(self._trend_long, slope_long)
+        if opts.forecast_enabled:
+            attrs.update(forecast)
+            attrs["next_dark_change"] = next_change
+            attrs["next_dark_state"] = None if next_change is None else not self._is_dark
+        if windows is not None:
+            attrs["windows"] = windows
+        if opts.twilight_enabled:
+            attrs.update(coord.twilight.state)
+        if self._diag is None:
+            attrs.update(diag)
+        else:
+            if self._stats is not None:
+                diag["perf"] = self._stats.as_dict()
+            self._diag.async_publish(round(clear, 0), diag, now_ts)
+
+        self._attr_native_value = raw_rounded
+        self._attr_extra_state_attributes = attrs
+        self._writes += 1
+        self._last_write = now_ts
+        self._written = (raw_rounded, control_rounded, flags)
+        self.async_write_ha_state()
+
+    def _significant(
+        self,
+        trigger: str,
+        now_ts: float,
+        raw: float,
+        control: float,
+        flags: tuple,
+    ) -> bool:
+        """Signifikanz-Filter: Flags/Wetter geändert oder Lux außerhalb der Totzone."""
+        last = self._written
+        if last is None or trigger in (TRIGGER_START, TRIGGER_OPTIONS):
+            return True
+        if now_ts - self._last_write >= WRITE_MAX_SILENCE:
+            return True
+        if last[2] != flags:
+            return True
+        return not (_within_deadband(last[0], raw) and _within_deadband(last[1], control))
+
+
+class IlluminancePlusDiagnostics(SensorEntity):
+    """Diagnose-Entität: volle Diagnose-Attribute, selten geschrieben (State = Clear-Sky-Lux)."""
+
+    _attr_device_class = "illuminance"
+    _attr_native_unit_of_measurement = UNIT_LUX
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
 
+    def __init__(self, name: str, entry_id: str) -> None:
+        self._attr_name = f"{name} – Diagnostics"
+        self._attr_unique_id = f"{entry_id}_diagnostics"
+        self._last_write: float | None = None
+
+    @callback
+    def async_publish(self, clear_sky: float, attrs: dict, now_ts: float) -> None:
+        self._attr_native_value = clear_sky
+        self._attr_extra_state_attributes = attrs
+        if self.hass is None or self.entity_id is None:
+            return
+        if self._last_write is not None and now_ts - self._last_write < DIAG_MIN_INTERVAL:
+            return
+        self._last_write = now_ts
         self.async_write_ha_state()
 
 
+class IlluminancePlusDaily(RestoreEntity, SensorEntity):
+    """Tageswerte des Vortags (State = Lux-Stunden), einmal pro Tag geschrieben."""
+
+    _attr_native_unit_of_measurement = f"{UNIT_LUX}h"
+    _attr_should_poll = False
+    _attr_icon = "mdi:white-balance-sunny"
+
+    def __init__(self, name: str, entry_id: str) -> None:
+        self._attr_name = f"{name} – Daily"
+        self._attr_unique_id = f"{entry_id}_daily"
+
+    async def async_added_to_hass(self) -> None:
+        last = await self.async_get_last_state()
+        if last is not None and getattr(self, "_attr_native_value", None) is None:
+            self._attr_native_value = _opt_float(last.state)
+            self._attr_extra_state_attributes = {
+                k: v for k, v in last.attributes.items() if k not in _ENTITY_ATTRS
+            }
+
+    @callback
+    def async_publish(self, summary: dict[str, Any]) -> None:
+        self._attr_native_value = summary["lux_hours"]
+        self._attr_extra_state_attributes = {k: v for k, v in summary.items() if k != "start"}
+        if self.hass is not None and self.entity_id is not None:
+            self.async_write_ha_state()
+
+
 # --------------- REQUIRED: async_setup_entry (Fix) ---------------
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> None:
     """Set up the sensor platform from a config entry."""
-    data = {**entry.data, **entry.options}
-    name = data.get(CONF_NAME, DEFAULT_NAME)
-    entity = IlluminancePlus(hass, name, data, entry.entry_id)
-    async_add_entities([entity])
+    opts: CompiledOptions = hass.data[DOMAIN][entry.entry_id]["options"]
+    diag = IlluminancePlusDiagnostics(opts.name, entry.entry_id) if opts.diagnostic_entity else None
+    daily = IlluminancePlusDaily(opts.name, entry.entry_id) if opts.daily_summary else None
+    entity = IlluminancePlus(hass, opts, entry.entry_id, async_get_coordinator(hass), diag, daily)
+    async_add_entities([e for e in (entity, diag, daily) if e is not None])
+
+    # Entity-Dienste refresh/backfill (Antwort optional) und simulate (nur Antwort)
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_REFRESH, {}, "async_refresh", supports_response=SupportsResponse.OPTIONAL
+    )
+    platform.async_register_entity_service(
+        SERVICE_BACKFILL,
+        {
+            vol.Required(ATTR_START): cv.datetime,
+            vol.Optional(ATTR_END): cv.datetime,
+            vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+        },
+        "async_backfill",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        SERVICE_SIMULATE,
+        {
+            vol.Required(ATTR_START): cv.datetime,
+            vol.Optional(ATTR_END): cv.datetime,
+            vol.Optional(ATTR_SOURCE, default=SOURCE_MODEL): vol.In(SOURCES),
+            vol.Required(ATTR_CANDIDATES): vol.All(
+                cv.ensure_list,
+                [vol.Schema({
+                    vol.Optional(CONF_ON): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_OFF): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(CONF_DARK_SENSITIVITY): vol.All(vol.Coerce(float), vol.Range(min=5, max=300)),
+                    vol.Optional(CONF_SMOOTH_SECONDS): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                })],
+                vol.Length(min=1, max=MAX_CANDIDATES),
+            ),
+        },
+        "async_simulate",
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,109 @@
+# Illuminance Plus – Schwellen-Simulation
+# © 2025 Martin Kluger – MIT
+
+"""Schwellen und Glättung an vergangenen Tagen durchspielen, ohne Reload.
+
+Glättung, Hysterese und das Replay vieler Kandidaten stecken in
+``control.py`` (dieselben Funktionen wie in der Entität); hier nur der
+Dienst: Zeitraum tageweise einlesen und durchspielen.
+
+Die Roh-Lux-Reihe kommt entweder aus dem Modell über die Historie der
+Quellen (``model``, wie beim Backfill) oder aus den gespeicherten Zuständen
+des Sensors selbst (``recorded``).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
+
+from .backfill import CHUNK, STEP, modeled_lux, read_history, recorded_lux
+from .control import candidate, replay
+from .model import LuxModel
+from .options import CompiledOptions
+from .solar import SolarEphemeris
+
+SOURCE_MODEL = "model"
+SOURCE_RECORDED = "recorded"
+SOURCES = (SOURCE_MODEL, SOURCE_RECORDED)
+
+MAX_SPAN = timedelta(days=7)
+MAX_CANDIDATES = 50
+
+
+# ---------- Dienst ----------
+
+def _raw_chunk(
+    eph: SolarEphemeris,
+    grid: list[float],
+    states: dict[str, list[State]],
+    opts: CompiledOptions,
+    model: LuxModel,
+    source: str,
+    entity_id: str,
+) -> list[float | None]:
+    if source == SOURCE_RECORDED:
+        return recorded_lux(states.get(entity_id), grid)
+    return [float(v) for v in modeled_lux(eph, grid, states, opts, model)]
+
+
+async def async_simulate(
+    hass: HomeAssistant,
+    entity_id: str,
+    opts: CompiledOptions,
+    model: LuxModel,
+    start: datetime,
+    end: datetime,
+    source: str,
+    params: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Zeitraum einlesen (tageweise) und alle Kandidaten plus aktuelle Optionen durchspielen."""
+    candidates = [candidate(opts, p) for p in params]
+    try:
+        baseline: dict[str, float] | None = candidate(opts, {})
+    except ValueError as err:
+        # Altbestand mit on >= off: Kandidaten trotzdem rechnen, Baseline nur melden
+        baseline, baseline_error = None, str(err)
+    else:
+        candidates.insert(0, baseline)
+    start = dt_util.as_utc(start)
+    end = min(dt_util.as_utc(end), dt_util.utcnow())
+    recorder = get_instance(hass)
+    if source == SOURCE_RECORDED:
+        entity_ids = [entity_id]
+    else:
+        entity_ids = [eid for eid in (opts.weather, opts.cloud, opts.precip, opts.vis) if eid]
+    eph = SolarEphemeris(hass.config.latitude, hass.config.longitude)
+
+    ts: list[float] = []
+    raw: list[float | None] = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + CHUNK, end)
+        grid = [float(t) for t in range(int(chunk_start.timestamp()), int(chunk_end.timestamp()), STEP)]
+        states: dict[str, list[State]] = {}
+        if entity_ids:
+            states = await recorder.async_add_executor_job(
+                read_history, hass, chunk_start, chunk_end, entity_ids
+            )
+        raw.extend(await hass.async_add_executor_job(
+            _raw_chunk, eph, grid, states, opts, model, source, entity_id
+        ))
+        ts.extend(grid)
+        chunk_start = chunk_end
+
+    results = await hass.async_add_executor_job(replay, ts, raw, candidates)
+    if baseline is None:
+        results.insert(0, {"error": baseline_error})
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "source": source,
+        "samples": sum(1 for v in raw if v is not None),
+        "baseline": results[0],
+        "candidates": results[1:],
+    }
@@ -0,0 +1,156 @@
+# Illuminance Plus – lokale Sonnen-Ephemeride
+# © 2025 Martin Kluger – MIT
+
+"""Sonnenstand ohne ``sun.sun``.
+
+Sonnenposition nach dem NOAA-Algorithmus (Genauigkeit ~0,01° im relevanten
+Zeitraum, inkl. atmosphärischer Refraktion). Pro UTC-Tag wird eine kompakte
+Tabelle (Elevation/Azimut im Raster von ``TABLE_STEP`` Sekunden, ``array('f')``)
+vorberechnet; Abfragen für beliebige Zeitpunkte sind danach O(1) per linearer
+Interpolation.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+
+TABLE_STEP = 60                       # Sekunden zwischen zwei Tabellenpunkten
+_DAY = 86400
+_POINTS = _DAY // TABLE_STEP + 1      # inkl. Endpunkt (nächste Mitternacht)
+_MAX_TABLES = 3                       # gestern/heute/morgen genügt (Prognosen über Mitternacht)
+
+
+def _refraction(elev: float) -> float:
+    """Atmosphärische Refraktion in Grad (NOAA-Näherung)."""
+    if elev > 85.0:
+        return 0.0
+    te = math.tan(math.radians(elev))
+    if elev > 5.0:
+        r = 58.1 / te - 0.07 / te ** 3 + 0.000086 / te ** 5
+    elif elev > -0.575:
+        r = 1735.0 + elev * (-518.2 + elev * (103.4 + elev * (-12.79 + elev * 0.711)))
+    else:
+        r = -20.774 / te
+    return r / 3600.0
+
+
+def solar_position(ts: float, lat: float, lon: float) -> tuple[float, float]:
+    """(Elevation, Azimut) in Grad für einen UNIX-Zeitstempel (UTC)."""
+    jc = (ts / _DAY + 2440587.5 - 2451545.0) / 36525.0
+
+    l0 = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360.0
+    m = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+    ecc = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    m_r = math.radians(m)
+    ctr = (
+        math.sin(m_r) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + math.sin(2 * m_r) * (0.019993 - 0.000101 * jc)
+        + math.sin(3 * m_r) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * jc)
+    app_long = l0 + ctr - 0.00569 - 0.00478 * math.sin(omega)
+    obliq = 23.0 + (26.0 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60.0) / 60.0
+    obliq_r = math.radians(obliq + 0.00256 * math.cos(omega))
+    decl = math.asin(math.sin(obliq_r) * math.sin(math.radians(app_long)))
+
+    y = math.tan(obliq_r / 2.0) ** 2
+    l0_r = math.radians(l0)
+    eq_time = 4.0 * math.degrees(
+        y * math.sin(2 * l0_r)
+        - 2 * ecc * math.sin(m_r)
+        + 4 * ecc * y * math.sin(m_r) * math.cos(2 * l0_r)
+        - 0.5 * y * y * math.sin(4 * l0_r)
+        - 1.25 * ecc * ecc * math.sin(2 * m_r)
+    )
+
+    true_solar = ((ts % _DAY) / 60.0 + eq_time + 4.0 * lon) % 1440.0
+    hour_angle = true_solar / 4.0 - 180.0
+    lat_r = math.radians(lat)
+    cos_zen = (
+        math.sin(lat_r) * math.sin(decl)
+        + math.cos(lat_r) * math.cos(decl) * math.cos(math.radians(hour_angle))
+    )
+    zen = math.acos(max(-1.0, min(1.0, cos_zen)))
+    elev = 90.0 - math.degrees(zen)
+
+    denom = math.cos(lat_r) * math.sin(zen)
+    if abs(denom) < 1e-12:
+        az = 180.0 if lat > math.degrees(decl) else 0.0
+    else:
+        c = max(-1.0, min(1.0, (math.sin(lat_r) * math.cos(zen) - math.sin(decl)) / denom))
+        a = math.degrees(math.acos(c))
+        az = (a + 180.0) % 360.0 if hour_angle > 0 else (540.0 - a) % 360.0
+
+    return elev + _refraction(elev), az
+
+
+class SolarDayTable:
+    """Elevation/Azimut eines UTC-Tages im festen Raster."""
+
+    __slots__ = ("start", "elev", "az")
+
+    def __init__(self, day_start: float, lat: float, lon: float) -> None:
+        self.start = day_start
+        self.elev = array("f", bytes(4 * _POINTS))
+        self.az = array("f", bytes(4 * _POINTS))
+        for i in range(_POINTS):
+            e, a = solar_position(day_start + i * TABLE_STEP, lat, lon)
+            self.elev[i] = e
+            self.az[i] = a
+
+    def position(self, ts: float) -> tuple[float, float]:
+        pos = (ts - self.start) / TABLE_STEP
+        i = min(int(pos), _POINTS - 2)
+        frac = pos - i
+        e0 = self.elev[i]
+        a0 = self.az[i]
+        da = self.az[i + 1] - a0
+        # Azimut über 0°/360° hinweg interpolieren
+        if da > 180.0:
+            da -= 360.0
+        elif da < -180.0:
+            da += 360.0
+        return e0 + (self.elev[i + 1] - e0) * frac, (a0 + da * frac) % 360.0
+
+    def crossings(self, thresholds: tuple[float, ...]) -> list[tuple[float, float, bool]]:
+        """Alle Zeitpunkte, an denen die Elevation eine der Schwellen kreuzt.
+
+        Liefert ``(ts, schwelle, steigend)`` sortiert nach Zeit; die Lage
+        innerhalb eines Rasterschritts wird linear interpoliert (< 1 s Fehler).
+        """
+        out: list[tuple[float, float, bool]] = []
+        elev = self.elev
+        for i in range(_POINTS - 1):
+            e0, e1 = elev[i], elev[i + 1]
+            lo, hi = (e0, e1) if e0 < e1 else (e1, e0)
+            for thr in thresholds:
+                # halboffen, damit eine exakt getroffene Schwelle nur einmal zählt
+                if lo < thr <= hi:
+                    frac = (thr - e0) / (e1 - e0)
+                    out.append((self.start + (i + frac) * TABLE_STEP, thr, e1 > e0))
+        out.sort()
+        return out
+
+
+class SolarEphemeris:
+    """Sonnenposition für beliebige Zeitpunkte über tageweise Tabellen."""
+
+    def __init__(self, lat: float, lon: float) -> None:
+        self.lat = lat
+        self.lon = lon
+        self._tables: dict[int, SolarDayTable] = {}
+
+    def table(self, ts: float) -> SolarDayTable:
+        day = int(ts // _DAY)
+        tbl = self._tables.get(day)
+        if tbl is None:
+            if len(self._tables) >= _MAX_TABLES:
+                # am weitesten entfernten Tag verwerfen
+                del self._tables[max(self._tables, key=lambda d: abs(d - day))]
+            tbl = self._tables[day] = SolarDayTable(day * _DAY, self.lat, self.lon)
+        return tbl
+
+    def position(self, ts: float) -> tuple[float, float]:
+        """(Elevation, Azimut) in Grad, interpoliert aus der Tagestabelle."""
+        return self.table(ts).position(ts)
@@ -0,0 +1,108 @@
+# Illuminance Plus – Instrumentierung
+# © 2025 Martin Kluger – MIT
+
+"""Zähler und Laufzeit-Histogramme für den Hot-Path.
+
+Pro Eintrag ein ``EntryStats`` (nur wenn die Option ``instrumentation`` an
+ist), dazu ein ``CoordinatorStats`` für die geteilten Eingaben. Ist die
+Instrumentierung aus, halten Sensor, Helper und Koordinator ``None`` – der
+Hot-Path kostet dann genau eine ``is not None``-Prüfung.
+
+Ausgabe über den Diagnose-Download (``diagnostics.py``) und – falls aktiv –
+das Attribut ``perf`` der Diagnose-Entität.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Obergrenzen der Laufzeit-Buckets in µs (letzter Bucket offen)
+DURATION_BUCKETS_US: tuple[int, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+
+class DurationHistogram:
+    """Feste, logarithmisch gestufte Buckets; Einfügen ist O(log #Buckets)."""
+
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(DURATION_BUCKETS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def add(self, us: float) -> None:
+        self.counts[bisect_left(DURATION_BUCKETS_US, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"<={b}us" for b in DURATION_BUCKETS_US] + [f">{DURATION_BUCKETS_US[-1]}us"]
+        return {
+            "count": self.count,
+            "mean_us": round(self.total_us / self.count, 1) if self.count else None,
+            "max_us": round(self.max_us, 1),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class EntryStats:
+    """Zähler eines Eintrags (Sensor + Helper + Setup)."""
+
+    __slots__ = (
+        "update_duration", "state_reads", "timer_reschedules", "unavailable",
+        "last_trigger", "last_update", "helper_results", "helper_writes",
+        "setup_seconds", "options_applied",
+    )
+
+    def __init__(self) -> None:
+        self.update_duration = DurationHistogram()
+        self.state_reads = 0                    # Quell-Lookups über den Koordinator
+        self.timer_reschedules = 0              # gesetzte Timer/Rückrufe (Takt + Debounce)
+        self.unavailable: dict[str, int] = {}   # entity_id -> Updates mit fehlender Quelle
+        self.last_trigger: str | None = None
+        self.last_update: float | None = None
+        self.helper_results = 0                 # an Helper verteilte Ergebnisse
+        self.helper_writes = 0                  # davon tatsächlich geschrieben
+        self.setup_seconds: float | None = None
+        self.options_applied = 0                # In-Place-Options-Änderungen
+
+    def record_update(self, trigger: str, now_ts: float, seconds: float) -> None:
+        self.update_duration.add(seconds * 1e6)
+        self.last_trigger = trigger
+        self.last_update = now_ts
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "update_duration": self.update_duration.as_dict(),
+            "state_reads": self.state_reads,
+            "timer_reschedules": self.timer_reschedules,
+            "sources_unavailable": dict(self.unavailable),
+            "last_trigger": self.last_trigger,
+            "last_update": self.last_update,
+            "helper_results": self.helper_results,
+            "helper_writes": self.helper_writes,
+            "setup_ms": None if self.setup_seconds is None else round(self.setup_seconds * 1000, 1),
+            "options_applied": self.options_applied,
+        }
+
+
+class CoordinatorStats:
+    """Zähler der geteilten Eingaben (über alle Einträge)."""
+
+    __slots__ = ("state_machine_reads", "parses", "unit_conversions")
+
+    def __init__(self) -> None:
+        self.state_machine_reads = 0   # hass.states.get()
+        self.parses = 0                # Parse-Cache-Fehlgriffe (State neu ausgewertet)
+        self.unit_conversions = 0      # in/h -> mm/h, mi -> km
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state_machine_reads": self.state_machine_reads,
+            "parses": self.parses,
+            "unit_conversions": self.unit_conversions,
+        }
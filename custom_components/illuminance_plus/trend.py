@@ -0,0 +1,156 @@
+# Illuminance Plus – Trend-Fenster
+# © 2025 Martin Kluger – MIT
+
+"""Gleitende Zeitfenster über die Steuergröße.
+
+Jedes Fenster ist ein Ringpuffer fester Kapazität (``array('d')``) mit
+laufenden Summen für die Kleinste-Quadrate-Steigung und den Mittelwert sowie
+monotonen Deques für Min/Max. Ein neues Sample kostet damit (amortisiert)
+konstante Zeit, unabhängig von Fensterlänge und Abtastrate.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from typing import Iterable
+
+DEFAULT_CAPACITY = 512
+_REBASE_AFTER = 6 * 3600.0   # s; danach Summen relativ zum ältesten Sample neu aufbauen
+
+
+class TrendWindow:
+    """Zeitfenster (Sekunden) über (t, y)-Samples mit O(1)-Statistik."""
+
+    __slots__ = (
+        "window", "_cap", "_t", "_y", "_head", "_len", "_seq",
+        "_base", "_st", "_sy", "_stt", "_sty", "_minq", "_maxq",
+    )
+
+    def __init__(self, window_s: float, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.window = float(window_s)
+        self._cap = capacity
+        self._t = array("d", bytes(8 * capacity))
+        self._y = array("d", bytes(8 * capacity))
+        self._head = 0        # Index des ältesten Samples
+        self._len = 0
+        self._seq = 0         # laufende Nummer des nächsten Samples
+        self._base = 0.0      # Zeitbasis der Summen (numerische Stabilität)
+        self._st = self._sy = self._stt = self._sty = 0.0
+        # (seq, y) monoton steigend bzw. fallend
+        self._minq: deque[tuple[int, float]] = deque()
+        self._maxq: deque[tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        return self._len
+
+    # ---------- Pflege ----------
+
+    def _pop_oldest(self) -> None:
+        i = self._head
+        t = self._t[i] - self._base
+        y = self._y[i]
+        self._st -= t
+        self._sy -= y
+        self._stt -= t * t
+        self._sty -= t * y
+        oldest_seq = self._seq - self._len
+        if self._minq and self._minq[0][0] == oldest_seq:
+            self._minq.popleft()
+        if self._maxq and self._maxq[0][0] == oldest_seq:
+            self._maxq.popleft()
+        self._head = (i + 1) % self._cap
+        self._len -= 1
+
+    def _rebase(self) -> None:
+        """Summen relativ zum ältesten Sample neu berechnen (selten, O(n))."""
+        self._base = self._t[self._head] if self._len else 0.0
+        self._st = self._sy = self._stt = self._sty = 0.0
+        for k in range(self._len):
+            i = (self._head + k) % self._cap
+            t = self._t[i] - self._base
+            y = self._y[i]
+            self._st += t
+            self._sy += y
+            self._stt += t * t
+            self._sty += t * y
+
+    def _evict(self, now: float) -> None:
+        limit = now - self.window
+        while self._len and self._t[self._head] < limit:
+            self._pop_oldest()
+
+    def push(self, t: float, y: float) -> None:
+        """Sample anhängen (t monoton steigend, Sekunden)."""
+        if self._len and t < self._t[(self._head + self._len - 1) % self._cap]:
+            return
+        self._evict(t)
+        if self._len == self._cap:
+            self._pop_oldest()
+        if not self._len:
+            self._base = t
+            self._st = self._sy = self._stt = self._sty = 0.0
+        elif t - self._base > _REBASE_AFTER:
+            self._rebase()
+        i = (self._head + self._len) % self._cap
+        self._t[i] = t
+        self._y[i] = y
+        self._len += 1
+        rt = t - self._base
+        self._st += rt
+        self._sy += y
+        self._stt += rt * rt
+        self._sty += rt * y
+        seq = self._seq
+        self._seq += 1
+        while self._minq and self._minq[-1][1] >= y:
+            self._minq.pop()
+        self._minq.append((seq, y))
+        while self._maxq and self._maxq[-1][1] <= y:
+            self._maxq.pop()
+        self._maxq.append((seq, y))
+
+    def set_window(self, window_s: float) -> None:
+        self.window = float(window_s)
+        if self._len:
+            self._evict(self._t[(self._head + self._len - 1) % self._cap])
+
+    # ---------- Statistik ----------
+
+    def slope_per_min(self) -> float | None:
+        """Kleinste-Quadrate-Steigung in Einheiten/Minute (None bei < 2 Samples)."""
+        n = self._len
+        if n < 2:
+            return None
+        den = n * self._stt - self._st * self._st
+        if den <= 1e-9:
+            return None
+        return (n * self._sty - self._st * self._sy) / den * 60.0
+
+    def mean(self) -> float | None:
+        return self._sy / self._len if self._len else None
+
+    def min(self) -> float | None:
+        return self._minq[0][1] if self._minq else None
+
+    def max(self) -> float | None:
+        return self._maxq[0][1] if self._maxq else None
+
+    # ---------- Persistenz ----------
+
+    def samples(self) -> list[list[float]]:
+        out = []
+        for k in range(self._len):
+            i = (self._head + k) % self._cap
+            out.append([self._t[i], self._y[i]])
+        return out
+
+    def load(self, samples: Iterable[Iterable[float]], now: float) -> None:
+        """Samples (z. B. aus dem Restore) übernehmen; zu alte werden verworfen."""
+        for item in samples:
+            try:
+                t, y = (float(v) for v in item)
+            except (TypeError, ValueError):
+                continue
+            if t >= now - self.window:
+                self.push(t, y)
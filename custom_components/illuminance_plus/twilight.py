@@ -0,0 +1,119 @@
+# Illuminance Plus – Dämmerungs-Flags
+# © 2025 Martin Kluger – MIT
+
+"""Dämmerungs-Flags aus vorberechneten Übergangszeitpunkten.
+
+Die Zeitpunkte, an denen die Sonne eine der Band-Grenzen kreuzt, werden
+einmal pro Tag aus der Ephemeriden-Tabelle bestimmt. Statt bei jedem
+Intervall neu zu prüfen, wird genau ein Punkt-Rückruf auf den nächsten
+Übergang gesetzt; dazwischen fällt keinerlei Arbeit an. Der Tracker hängt
+am Koordinator und wird von allen Einträgen geteilt.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .solar import SolarEphemeris
+
+# Band-Grenzen (Grad); -0.833 = Sonnenauf-/-untergang inkl. Refraktion und Sonnenradius
+SUNRISE_ELEV = -0.833
+BOUNDARIES: tuple[float, ...] = (-18.0, -12.0, -6.0, -4.0, SUNRISE_ELEV, 6.0)
+
+_DAY = 86400
+_SETTLE = 1.0   # s nach dem Übergang auswerten -> eindeutig auf der neuen Seite
+
+
+def twilight_flags(elev: float) -> dict[str, bool]:
+    """Flags für eine gegebene Sonnenhöhe."""
+    return {
+        "twilight_civil": -6.0 <= elev < SUNRISE_ELEV,
+        "twilight_nautical": -12.0 <= elev < -6.0,
+        "twilight_astronomical": -18.0 <= elev < -12.0,
+        "blue_hour": -6.0 <= elev < -4.0,
+        "golden_hour": -4.0 <= elev < 6.0,
+    }
+
+
+class TwilightTracker:
+    """Hält die aktuellen Flags und plant den nächsten Übergang exakt ein."""
+
+    def __init__(self, hass: HomeAssistant, ephemeris: Callable[[], SolarEphemeris]) -> None:
+        self.hass = hass
+        self._ephemeris = ephemeris
+        self._listeners: list[Callable[[dict[str, bool | str | None]], None]] = []
+        self._transitions: dict[int, list[float]] = {}
+        self._unsub_point: CALLBACK_TYPE | None = None
+        self.state: dict[str, bool | str | None] = {}
+
+    def _day_transitions(self, day: int) -> list[float]:
+        cached = self._transitions.get(day)
+        if cached is None:
+            tbl = self._ephemeris().table(day * _DAY + 1)
+            cached = [ts for ts, _thr, _rising in tbl.crossings(BOUNDARIES)]
+            # nur heute/morgen vorhalten
+            self._transitions = {d: v for d, v in self._transitions.items() if d >= day - 1}
+            self._transitions[day] = cached
+        return cached
+
+    def _next_transition(self, now: float) -> float | None:
+        day = int(now // _DAY)
+        for d in (day, day + 1, day + 2):
+            for ts in self._day_transitions(d):
+                if ts > now:
+                    return ts
+        return None   # Polarregion ohne Übergänge in den nächsten Tagen
+
+    def _refresh(self, now: float) -> None:
+        elev, _az = self._ephemeris().position(now + _SETTLE)
+        nxt = self._next_transition(now + _SETTLE)
+        state: dict[str, bool | str | None] = dict(twilight_flags(elev))
+        state["twilight_next_change"] = (
+            None if nxt is None else datetime.fromtimestamp(round(nxt), timezone.utc).isoformat()
+        )
+        self.state = state
+        if self._unsub_point:
+            self._unsub_point()
+            self._unsub_point = None
+        if nxt is not None:
+            when = datetime.fromtimestamp(nxt, timezone.utc)
+            self._unsub_point = async_track_point_in_utc_time(self.hass, self._on_transition, when)
+
+    @callback
+    def _on_transition(self, now: datetime) -> None:
+        self._unsub_point = None
+        old = self.state
+        self._refresh(now.timestamp())
+        if self.state != old:
+            for action in tuple(self._listeners):
+                action(self.state)
+
+    @callback
+    def async_listen(
+        self, action: Callable[[dict[str, bool | str | None]], None]
+    ) -> CALLBACK_TYPE:
+        """Bei jedem Übergang benachrichtigen; aktueller Zustand steht in ``state``."""
+        if not self._listeners:
+            self._refresh(dt_util.utcnow().timestamp())
+        self._listeners.append(action)
+
+        @callback
+        def _remove() -> None:
+            if action in self._listeners:
+                self._listeners.remove(action)
+            if not self._listeners:
+                self.async_shutdown()
+
+        return _remove
+
+    @callback
+    def async_shutdown(self) -> None:
+        if self._unsub_point:
+            self._unsub_point()
+            self._unsub_point = None
+        self._listeners.clear()
@@ -0,0 +1,154 @@
+# Illuminance Plus – Websocket-Abonnement
+# © 2025 Martin Kluger – MIT
+
+"""Ergebnisse jeder Berechnung live per Websocket.
+
+``illuminance_plus/subscribe`` hängt sich an ``SIGNAL_RESULT`` der gewählten
+Einträge bzw. ohne Auswahl an ``SIGNAL_RESULT_ANY`` (alle Einträge, auch
+nach dem Abonnieren hinzugefügte oder neu geladene) und schickt nach jeder Berechnung ein kompaktes
+Event – auch wenn der Sensor wegen Schreib-Unterdrückung nicht schreibt.
+Abnehmer mit hoher Frequenz belasten damit weder State-Machine noch Recorder.
+
+Mit ``throttle`` (Sekunden) wird je Abonnent und Eintrag höchstens ein Event
+pro Intervall gesendet; dazwischen liegende Ergebnisse werden verworfen, das
+jeweils letzte folgt am Ende des Intervalls.
+"""
+
+from __future__ import annotations
+
+import time
+from functools import partial
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_COORDINATOR, DOMAIN, SIGNAL_RESULT, SIGNAL_RESULT_ANY, WS_SUBSCRIBE
+from .result import IlluminanceResult
+
+MAX_THROTTLE = 3600.0
+
+
+def payload(entry_id: str, result: IlluminanceResult) -> dict[str, Any]:
+    """Kompaktes Event eines Ergebnisses (feste Schlüssel, keine State-Attribute)."""
+    return {
+        "entry_id": entry_id,
+        "ts": result.ts,
+        "raw": result.lux,
+        "control": result.control_lux,
+        "slope": result.slope,
+        "is_dark": result.is_dark,
+        "dark_soon": result.dark_soon,
+        "darkening_fast": result.darkening_fast,
+        "brightening_fast": result.brightening_fast,
+        "elevation": result.elevation,
+        "azimuth": result.azimuth,
+        "rooms": list(result.rooms),
+        "forecast": dict(result.forecast),
+        "next_dark_change": result.next_dark_change,
+    }
+
+
+class _Subscription:
+    """Ein Abonnent: Versand mit optionaler Drosselung je Eintrag."""
+
+    __slots__ = ("hass", "connection", "msg_id", "throttle", "last_sent", "pending", "timers")
+
+    def __init__(self, hass: HomeAssistant, connection, msg_id: int, throttle: float) -> None:
+        self.hass = hass
+        self.connection = connection
+        self.msg_id = msg_id
+        self.throttle = throttle
+        self.last_sent: dict[str, float] = {}
+        self.pending: dict[str, IlluminanceResult] = {}
+        self.timers: dict[str, CALLBACK_TYPE] = {}
+
+    @callback
+    def send(self, entry_id: str, result: IlluminanceResult) -> None:
+        self.last_sent[entry_id] = time.monotonic()
+        self.connection.send_message(websocket_api.event_message(self.msg_id, payload(entry_id, result)))
+
+    @callback
+    def on_result(self, entry_id: str, result: IlluminanceResult) -> None:
+        if self.throttle <= 0:
+            self.send(entry_id, result)
+            return
+        wait = self.last_sent.get(entry_id, -self.throttle) + self.throttle - time.monotonic()
+        if wait <= 0 and entry_id not in self.timers:
+            self.send(entry_id, result)
+            return
+        # innerhalb des Intervalls: nur das jüngste Ergebnis merken
+        self.pending[entry_id] = result
+        if entry_id not in self.timers:
+            self.timers[entry_id] = async_call_later(self.hass, wait, partial(self._flush, entry_id))
+
+    @callback
+    def _flush(self, entry_id: str, _now) -> None:
+        self.timers.pop(entry_id, None)
+        result = self.pending.pop(entry_id, None)
+        if result is not None:
+            self.send(entry_id, result)
+
+    @callback
+    def cancel(self) -> None:
+        for unsub in self.timers.values():
+            unsub()
+        self.timers.clear()
+        self.pending.clear()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_SUBSCRIBE,
+        vol.Optional("entry_ids"): [str],
+        vol.Optional("throttle", default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=MAX_THROTTLE)
+        ),
+    }
+)
+@callback
+def ws_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Ergebnisse eines oder mehrerer Einträge abonnieren (zuerst das jeweils letzte)."""
+    domain_data = hass.data.get(DOMAIN, {})
+    entries = [key for key in domain_data if key != DATA_COORDINATOR]
+    entry_ids = msg.get("entry_ids")
+    unknown = [eid for eid in entry_ids or () if eid not in entries]
+    if unknown:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"Unknown entries: {', '.join(unknown)}"
+        )
+        return
+
+    sub = _Subscription(hass, connection, msg["id"], msg["throttle"])
+    if entry_ids:
+        unsubs = [
+            async_dispatcher_connect(hass, SIGNAL_RESULT.format(eid), partial(sub.on_result, eid))
+            for eid in entry_ids
+        ]
+    else:
+        # Einträge erst beim Versand auflösen: neue oder neu geladene kommen automatisch dazu
+        unsubs = [async_dispatcher_connect(hass, SIGNAL_RESULT_ANY, sub.on_result)]
+        entry_ids = entries
+
+    @callback
+    def _unsubscribe() -> None:
+        for unsub in unsubs:
+            unsub()
+        sub.cancel()
+
+    connection.subscriptions[msg["id"]] = _unsubscribe
+    connection.send_result(msg["id"])
+    for eid in entry_ids:
+        result = domain_data[eid].get("result")
+        if result is not None:
+            sub.send(eid, result)
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Websocket-Befehle registrieren (einmal pro Domain)."""
+    websocket_api.async_register_command(hass, ws_subscribe)
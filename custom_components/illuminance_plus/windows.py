@@ -0,0 +1,145 @@
+# Illuminance Plus – Fenster / Blendung
+# © 2025 Martin Kluger – MIT
+
+"""Kompilierter Fenster-Index für Direktsonne und Blend-Risiko.
+
+``windows_yaml`` wird einmal pro Options-Änderung geparst und validiert.
+Pro Fenster werden die horizontale Normale (sin/cos Azimut) und der Kosinus
+des halben Sichtfelds vorberechnet; ein Update-Zyklus braucht dann je Fenster
+nur ein Skalarprodukt mit dem Sonnenvektor und zwei Vergleiche.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any
+
+import yaml
+
+DEFAULT_FOV = 90.0          # Grad, gesamtes horizontales Sichtfeld
+DEFAULT_ELEV_MIN = 0.0      # Grad, Sonne muss mindestens so hoch stehen
+GLARE_LUX = 20000.0         # lx, ab hier volles Blend-Potenzial
+GLARE_RISK_ON = 0.5         # Risiko-Schwelle für glare=True
+
+
+class WindowConfigError(ValueError):
+    """Ungültige Fenster-Konfiguration."""
+
+
+def _num(item: dict[str, Any], key: str, default: float | None, lo: float, hi: float) -> float:
+    raw = item.get(key, default)
+    if raw is None:
+        raise WindowConfigError(f"missing '{key}'")
+    try:
+        val = float(raw)
+    except (TypeError, ValueError) as err:
+        raise WindowConfigError(f"'{key}' must be a number") from err
+    if not lo <= val <= hi:
+        raise WindowConfigError(f"'{key}' must be between {lo:g} and {hi:g}")
+    return val
+
+
+class WindowTable:
+    """Spaltenorientierte Fenster-Tabelle (ein Eintrag pro Fenster)."""
+
+    __slots__ = ("names", "azimuth", "fov", "elev_min", "_nx", "_ny", "_cos_half")
+
+    def __init__(self, rows: list[tuple[str, float, float, float]]) -> None:
+        self.names = tuple(r[0] for r in rows)
+        self.azimuth = array("d", (r[1] for r in rows))
+        self.fov = array("d", (r[2] for r in rows))
+        self.elev_min = array("d", (r[3] for r in rows))
+        self._nx = array("d", (math.sin(math.radians(a)) for a in self.azimuth))
+        self._ny = array("d", (math.cos(math.radians(a)) for a in self.azimuth))
+        self._cos_half = array("d", (math.cos(math.radians(f / 2.0)) for f in self.fov))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WindowTable):
+            return NotImplemented
+        return (
+            self.names == other.names
+            and self.azimuth == other.azimuth
+            and self.fov == other.fov
+            and self.elev_min == other.elev_min
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def mask(self, elev: float, az: float, lux: float, glare: bool) -> int:
+        """Bitmaske der Flags (``sun``, ggf. ``glare``) aller Fenster – für die Kantensuche des Takts."""
+        az_r = math.radians(az)
+        sx, sy = math.sin(az_r), math.cos(az_r)
+        cos_el = math.cos(math.radians(elev))
+        lux_factor = max(0.0, min(1.0, lux / GLARE_LUX)) if glare else 0.0
+        bits = 0
+        for i in range(len(self.names)):
+            cos_daz = sx * self._nx[i] + sy * self._ny[i]
+            if elev > 0.0 and elev >= self.elev_min[i] and cos_daz >= self._cos_half[i]:
+                bits |= 1 << (2 * i)
+                if glare and cos_el * cos_daz * lux_factor >= GLARE_RISK_ON:
+                    bits |= 2 << (2 * i)
+        return bits
+
+    def evaluate(
+        self, elev: float, az: float, lux: float, glare: bool
+    ) -> dict[str, dict[str, Any]]:
+        """Ein Durchlauf über alle Fenster für den aktuellen Sonnenstand."""
+        out: dict[str, dict[str, Any]] = {}
+        if not self.names:
+            return out
+        az_r = math.radians(az)
+        sx, sy = math.sin(az_r), math.cos(az_r)
+        cos_el = math.cos(math.radians(elev))
+        lux_factor = max(0.0, min(1.0, lux / GLARE_LUX)) if glare else 0.0
+        nx, ny, cos_half, elev_min = self._nx, self._ny, self._cos_half, self.elev_min
+        for i, name in enumerate(self.names):
+            cos_daz = sx * nx[i] + sy * ny[i]          # cos(Azimut-Differenz)
+            sun = elev > 0.0 and elev >= elev_min[i] and cos_daz >= cos_half[i]
+            incidence = cos_el * cos_daz if sun else 0.0
+            res: dict[str, Any] = {"sun": sun, "incidence": round(incidence, 2)}
+            if glare:
+                risk = incidence * lux_factor
+                res["glare_risk"] = round(risk, 2)
+                res["glare"] = risk >= GLARE_RISK_ON
+            out[name] = res
+        return out
+
+
+EMPTY_WINDOWS = WindowTable([])
+
+
+def parse_windows(text: str | None) -> WindowTable:
+    """YAML-Liste (name, azimuth, fov, elev_min) parsen und validieren."""
+    if not text or not str(text).strip():
+        return EMPTY_WINDOWS
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as err:
+        raise WindowConfigError(f"invalid YAML: {err}") from err
+    if data is None:
+        return EMPTY_WINDOWS
+    if not isinstance(data, list):
+        raise WindowConfigError("expected a list of windows")
+    rows: list[tuple[str, float, float, float]] = []
+    seen: set[str] = set()
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise WindowConfigError(f"window #{idx + 1}: expected a mapping")
+        name = str(item.get("name") or "").strip()
+        if not name:
+            raise WindowConfigError(f"window #{idx + 1}: missing 'name'")
+        if name in seen:
+            raise WindowConfigError(f"duplicate window name '{name}'")
+        seen.add(name)
+        try:
+            az = _num(item, "azimuth", None, 0.0, 360.0)
+            fov = _num(item, "fov", DEFAULT_FOV, 1.0, 180.0)
+            elev_min = _num(item, "elev_min", DEFAULT_ELEV_MIN, -10.0, 90.0)
+        except WindowConfigError as err:
+            raise WindowConfigError(f"window '{name}': {err}") from err
+        rows.append((name, az % 360.0, fov, elev_min))
+    return WindowTable(rows)
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+# Illuminance Plus – Benchmark / Replay
+# © 2025 Martin Kluger – MIT
+
+"""Offline-Replay der Lux-Pipeline gegen einen Stub-``hass``.
+
+Spielt eine (synthetische oder aufgezeichnete) Zeitreihe aus Wetterzustand,
+Cloud %, Niederschlag und Sichtweite im 1-Minuten-Raster durch
+``IlluminancePlus._update`` und misst:
+
+* Latenz pro Update (p50/p90/p99/max)
+* Allokationen pro Update (Stichprobe mit ``tracemalloc``)
+* State-Writes pro Tag, unterdrückte Writes, Neuberechnungen pro Tag
+* Hysterese-Wechsel (is_dark/dark_soon) und Helper-Write-Amplification
+
+Der Sonnenstand kommt wie im Betrieb aus der lokalen Ephemeride
+(``--lat``/``--lon``). Zwei Antriebsarten:
+
+* ``minute``: jede Minute genau ein ``_update`` (Worst Case, vergleichbar)
+* ``scheduled``: virtuelle Uhr; Timer, adaptiver Takt und Quell-Ereignisse
+  laufen über den echten Code-Pfad (``_on_source_change``/Debounce)
+
+Benötigt ``homeassistant`` im Python-Pfad (nur für Importe; es wird keine
+HA-Instanz gestartet). Beispiele::
+
+    python scripts/bench_replay.py --days 365
+    python scripts/bench_replay.py --drive scheduled --json > bench_output.txt
+    python scripts/bench_replay.py --trace week.csv --max-p99-us 200
+
+CSV-Format (``--trace``): Kopfzeile ``ts,weather,cloud,precip,visibility``;
+``ts`` als UNIX-Sekunden oder ISO-8601, leere Zellen = ``unavailable``.
+Zwischen zwei Zeilen wird der letzte Wert gehalten.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import State  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.illuminance_plus import binary_sensor as ip_binary  # noqa: E402
+from custom_components.illuminance_plus import sensor as ip_sensor  # noqa: E402
+from custom_components.illuminance_plus.const import (  # noqa: E402
+    DOMAIN, DATA_COORDINATOR, TRIGGER_START,
+)
+from custom_components.illuminance_plus.coordinator import IlluminanceCoordinator  # noqa: E402
+from custom_components.illuminance_plus.options import compile_options  # noqa: E402
+from custom_components.illuminance_plus.result import IlluminanceResult  # noqa: E402
+from custom_components.illuminance_plus.stats import EntryStats  # noqa: E402
+
+ENTRY_ID = "bench"
+WEATHER = "weather.bench"
+CLOUD = "sensor.bench_cloud"
+PRECIP = "sensor.bench_precip"
+VIS = "sensor.bench_visibility"
+STEP = 60
+
+# (ts, condition, cloud %, precip mm/h, visibility km); None = unavailable
+Row = tuple[float, "str | None", "float | None", "float | None", "float | None"]
+
+
+# ---------------- virtuelle Uhr / Stub-hass ----------------
+
+class Clock:
+    now: float = 0.0
+
+
+def _utcnow() -> datetime:
+    return datetime.fromtimestamp(Clock.now, timezone.utc)
+
+
+class StubStates:
+    """Minimale State-Machine: neues ``State``-Objekt nur bei Änderung (wie HA)."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def set(self, entity_id: str, value: Any, attrs: dict[str, Any] | None = None) -> bool:
+        state = "unavailable" if value is None else str(value)
+        old = self._states.get(entity_id)
+        if old is not None and old.state == state:
+            return False
+        self._states[entity_id] = State(entity_id, state, attrs or {})
+        return True
+
+
+class StubServices:
+    async def async_call(self, *_args: Any, **_kwargs: Any) -> Any:
+        raise RuntimeError("no services in replay")
+
+
+class StubHass:
+    def __init__(self, lat: float, lon: float) -> None:
+        self.data: dict[str, Any] = {}
+        self.config = SimpleNamespace(latitude=lat, longitude=lon, time_zone="UTC")
+        self.states = StubStates()
+        self.services = StubServices()
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+
+class FakeScheduler:
+    """Ersetzt ``async_call_later``/``async_track_time_interval`` im Sensor-Modul."""
+
+    def __init__(self) -> None:
+        self._seq = 0
+        # token -> (fällig, Aktion, Intervall oder 0)
+        self.pending: dict[int, tuple[float, Callable, float]] = {}
+        self.reschedules = 0
+
+    def _add(self, due: float, action: Callable, every: float) -> Callable[[], None]:
+        self._seq += 1
+        token = self._seq
+        self.pending[token] = (due, action, every)
+
+        def _unsub() -> None:
+            self.pending.pop(token, None)
+
+        return _unsub
+
+    def call_later(self, _hass: Any, delay: float | timedelta, action: Callable) -> Callable[[], None]:
+        if isinstance(delay, timedelta):
+            delay = delay.total_seconds()
+        self.reschedules += 1
+        return self._add(Clock.now + float(delay), action, 0.0)
+
+    def track_interval(self, _hass: Any, action: Callable, interval: timedelta, **_kw: Any) -> Callable[[], None]:
+        secs = interval.total_seconds()
+        return self._add(Clock.now + secs, action, secs)
+
+    async def run_until(self, limit: float) -> None:
+        """Alle Timer mit Fälligkeit < ``limit`` in zeitlicher Reihenfolge ausführen."""
+        while self.pending:
+            token, (due, action, every) = min(self.pending.items(), key=lambda kv: kv[1][0])
+            if due >= limit:
+                return
+            if every:
+                self.pending[token] = (due + every, action, every)
+            else:
+                del self.pending[token]
+            Clock.now = due
+            res = action(_utcnow())
+            if asyncio.iscoroutine(res):
+                await res
+
+
+# ---------------- Traces ----------------
+
+# Regime: (Bedingung, mittlere Bewölkung %, mittlere Dauer in Minuten)
+_REGIMES = (
+    ("sunny", 5.0, 240), ("partlycloudy", 40.0, 180), ("cloudy", 85.0, 240),
+    ("rainy", 95.0, 120), ("pouring", 100.0, 45), ("fog", 100.0, 90),
+)
+_REGIME_WEIGHTS = (0.25, 0.25, 0.25, 0.15, 0.03, 0.07)
+_SENSOR_PERIOD = 10      # min; Cloud/Rain/Visibility-Sensoren melden alle 10 min
+
+
+def synthetic_trace(start: float, days: float, seed: int) -> Iterator[Row]:
+    """Reproduzierbare Wetter-Zeitreihe mit Regimen, AR(1)-Bewölkung und Sensortakt."""
+    rnd = random.Random(seed)
+    regime = rnd.choices(_REGIMES, _REGIME_WEIGHTS)[0]
+    cloud = regime[1]
+    precip = 0.0
+    vis = 20.0
+    steps = int(days * 86400 // STEP)
+    for k in range(steps):
+        if rnd.random() < 1.0 / regime[2]:
+            regime = rnd.choices(_REGIMES, _REGIME_WEIGHTS)[0]
+        cond, mean, _dur = regime
+        cloud += 0.05 * (mean - cloud) + rnd.gauss(0.0, 2.0)
+        cloud = max(0.0, min(100.0, cloud))
+        if k % _SENSOR_PERIOD == 0:
+            precip = round(rnd.uniform(0.2, 2.0) if cond == "rainy"
+                           else rnd.uniform(4.0, 12.0) if cond == "pouring" else 0.0, 1)
+            vis = round(rnd.uniform(0.3, 2.0) if cond == "fog" else rnd.uniform(10.0, 30.0), 1)
+            reported_cloud = round(cloud)
+        yield (start + k * STEP, cond, reported_cloud, precip, vis)
+
+
+def _cell(value: str | None) -> float | None:
+    if value is None or not value.strip():
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_ts(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        parsed = dt_util.parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"invalid ts: {value!r}") from None
+        return parsed.timestamp()
+
+
+def csv_trace(path: Path) -> Iterator[Row]:
+    """Aufgezeichnete Zeitreihe auf das 1-Minuten-Raster bringen (Sample-and-Hold)."""
+    with path.open(newline="", encoding="utf-8") as fh:
+        rows = [
+            (_parse_ts(r["ts"]), (r.get("weather") or "").strip() or None,
+             _cell(r.get("cloud")), _cell(r.get("precip")), _cell(r.get("visibility")))
+            for r in csv.DictReader(fh)
+        ]
+    if not rows:
+        return
+    rows.sort(key=lambda r: r[0])
+    ts = math.floor(rows[0][0] / STEP) * STEP
+    i = 0
+    while ts <= rows[-1][0]:
+        while i + 1 < len(rows) and rows[i + 1][0] <= ts:
+            i += 1
+        yield (ts, *rows[i][1:])
+        ts += STEP
+
+
+# ---------------- Replay ----------------
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, math.ceil(q * len(sorted_vals)) - 1))
+    return sorted_vals[idx]
+
+
+class Replay:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.hass = StubHass(args.lat, args.lon)
+        self.sched = FakeScheduler()
+        self.latency_us = array("d")
+        self.alloc_peak = array("d")
+        self.alloc_retained = array("d")
+        self.flips = {"is_dark": 0, "dark_soon": 0}
+        self.helper_writes = 0
+        self.main_writes = 0
+        self._last: IlluminanceResult | None = None
+        self._alloc_every = 0
+        self._updates = 0
+
+        data: dict[str, Any] = {
+            "name": "Bench", "weather_entity": WEATHER, "cloud_entity": CLOUD,
+            "precip_entity": PRECIP, "visibility_entity": VIS,
+        }
+        data.update(args.option)
+        self.opts = compile_options(data)
+
+        # Modul-Hooks des Sensors auf virtuelle Uhr/Scheduler/Dispatcher umbiegen
+        dt_util.utcnow = _utcnow
+        ip_sensor.async_call_later = self.sched.call_later
+        ip_sensor.async_track_time_interval = self.sched.track_interval
+        ip_sensor.async_dispatcher_send = self._dispatch
+
+        self.coord = IlluminanceCoordinator(self.hass)  # type: ignore[arg-type]
+        self.hass.data[DOMAIN] = {DATA_COORDINATOR: self.coord, ENTRY_ID: {"options": self.opts}}
+        self.entity = ip_sensor.IlluminancePlus(self.hass, self.opts, ENTRY_ID, self.coord)  # type: ignore[arg-type]
+        entry_data = self.entity._entry_data = self.hass.data[DOMAIN][ENTRY_ID]
+        # --option instrumentation=true misst die Instrumentierung mit
+        self.stats = entry_data["stats"] = EntryStats() if self.opts.instrumentation else None
+        if self.stats is not None:
+            self.coord.async_enable_stats()
+        self.entity._stats = self.stats
+        self.entity.async_write_ha_state = self._count_main  # type: ignore[method-assign]
+        self._orig_update = self.entity._update
+        self.entity._update = self._timed_update  # type: ignore[method-assign]
+
+        self.helpers: list[Any] = []
+        if self.opts.helpers_enabled:
+            for cls in (ip_binary.IllumPlusDarkHelper, ip_binary.IllumPlusDarkSoonHelper):
+                helper = cls(self.hass, cls.__name__, ENTRY_ID)  # type: ignore[arg-type]
+                helper.async_write_ha_state = self._count_helper  # type: ignore[method-assign]
+                helper._entry_data = entry_data
+                self.helpers.append(helper)
+
+    def _count_main(self) -> None:
+        self.main_writes += 1
+
+    def _count_helper(self) -> None:
+        self.helper_writes += 1
+
+    def _dispatch(self, _hass: Any, _signal: str, result: IlluminanceResult) -> None:
+        last = self._last
+        if last is not None:
+            self.flips["is_dark"] += last.is_dark != result.is_dark
+            self.flips["dark_soon"] += last.dark_soon != result.dark_soon
+        self._last = result
+        for helper in self.helpers:
+            helper._on_result(result)
+
+    async def _timed_update(self, now: Any, trigger: str = ip_sensor.TRIGGER_TIMER) -> None:
+        self._updates += 1
+        if self._alloc_every and self._updates % self._alloc_every == 0:
+            tracemalloc.start()
+            await self._orig_update(now, trigger)
+            cur, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.alloc_peak.append(peak)
+            self.alloc_retained.append(cur)
+            return
+        t0 = time.perf_counter_ns()
+        await self._orig_update(now, trigger)
+        self.latency_us.append((time.perf_counter_ns() - t0) / 1000.0)
+
+    def _apply(self, row: Row) -> list[str]:
+        _ts, cond, cloud, precip, vis = row
+        st = self.hass.states
+        changed = []
+        if st.set(WEATHER, cond):
+            changed.append(WEATHER)
+        if st.set(CLOUD, None if cloud is None else round(cloud), {"unit_of_measurement": "%"}):
+            changed.append(CLOUD)
+        if st.set(PRECIP, precip, {"unit_of_measurement": "mm/h"}):
+            changed.append(PRECIP)
+        if st.set(VIS, vis, {"unit_of_measurement": "km"}):
+            changed.append(VIS)
+        return changed
+
+    async def run(self, trace: Iterator[Row]) -> dict[str, Any]:
+        self.hass.loop = asyncio.get_running_loop()
+        args = self.args
+        first = next(trace, None)
+        if first is None:
+            raise SystemExit("empty trace")
+        Clock.now = first[0]
+        self._apply(first)
+        if args.alloc_samples:
+            # Stichprobe gleichmäßig über den Lauf verteilen
+            self._alloc_every = max(1, int(args.days * 1440 // args.alloc_samples))
+        wall0 = time.perf_counter()
+        await self.entity._update(None, TRIGGER_START)
+        start = end = first[0]
+        sources = set(self.opts.sources)
+        for row in trace:
+            end = row[0]
+            if args.drive == "minute":
+                Clock.now = end
+                self._apply(row)
+                await self.entity._update(None, ip_sensor.TRIGGER_TIMER)
+                continue
+            await self.sched.run_until(end)
+            Clock.now = end
+            changed = self._apply(row)
+            if self.opts.event_driven:
+                for eid in changed:
+                    if eid in sources:
+                        self.entity._on_source_change(eid)
+        if args.drive == "scheduled":
+            await self.sched.run_until(end + STEP)
+        wall = time.perf_counter() - wall0
+        return self._report(max(STEP, end - start + STEP) / 86400.0, wall)
+
+    def _report(self, days: float, wall: float) -> dict[str, Any]:
+        lat = sorted(self.latency_us)
+        peak = sorted(self.alloc_peak)
+        ent = self.entity
+        flips = self.flips["is_dark"] + self.flips["dark_soon"]
+        updates = self._updates
+        return {
+            "drive": self.args.drive,
+            "days": round(days, 2),
+            "updates": updates,
+            "updates_per_day": round(updates / days, 1),
+            "wall_seconds": round(wall, 2),
+            "latency_us": {
+                "p50": round(_percentile(lat, 0.50), 1),
+                "p90": round(_percentile(lat, 0.90), 1),
+                "p99": round(_percentile(lat, 0.99), 1),
+                "max": round(lat[-1] if lat else 0.0, 1),
+                "mean": round(sum(lat) / len(lat), 1) if lat else 0.0,
+            },
+            "alloc_bytes_per_update": {
+                "samples": len(peak),
+                "peak_p50": round(_percentile(peak, 0.50)),
+                "peak_p99": round(_percentile(peak, 0.99)),
+                "retained_mean": round(sum(self.alloc_retained) / len(peak)) if peak else 0,
+            },
+            "writes": self.main_writes,
+            "writes_per_day": round(self.main_writes / days, 1),
+            "writes_suppressed": ent._writes_suppressed,
+            "triggers": dict(ent._triggers),
+            "timer_reschedules": self.sched.reschedules,
+            "flips": dict(self.flips),
+            "flips_per_day": round(self.flips["is_dark"] / days, 2),
+            "helper_writes": self.helper_writes,
+            # 1.0 = Helper schreiben genau bei jedem Wechsel (+ je ein Initial-Write)
+            "helper_write_amplification": (
+                round(self.helper_writes / (flips + len(self.helpers)), 2) if self.helpers else None
+            ),
+            "instrumentation": None if self.stats is None else self.stats.as_dict(),
+        }
+
+
+# ---------------- CLI ----------------
+
+def _option(text: str) -> tuple[str, Any]:
+    key, sep, raw = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected key=value")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key.strip(), value
+
+
+def _gate(report: dict[str, Any], args: argparse.Namespace) -> list[str]:
+    failed = []
+    if args.max_p99_us is not None and report["latency_us"]["p99"] > args.max_p99_us:
+        failed.append(f"p99 latency {report['latency_us']['p99']} us > {args.max_p99_us}")
+    if args.max_writes_per_day is not None and report["writes_per_day"] > args.max_writes_per_day:
+        failed.append(f"writes/day {report['writes_per_day']} > {args.max_writes_per_day}")
+    if args.max_flips_per_day is not None and report["flips_per_day"] > args.max_flips_per_day:
+        failed.append(f"is_dark flips/day {report['flips_per_day']} > {args.max_flips_per_day}")
+    return failed
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    lat = report["latency_us"]
+    alloc = report["alloc_bytes_per_update"]
+    print(f"drive={report['drive']} days={report['days']} updates={report['updates']} "
+          f"({report['updates_per_day']}/day) wall={report['wall_seconds']} s")
+    print(f"latency us     p50={lat['p50']} p90={lat['p90']} p99={lat['p99']} max={lat['max']} mean={lat['mean']}")
+    print(f"alloc bytes    peak p50={alloc['peak_p50']} p99={alloc['peak_p99']} "
+          f"retained mean={alloc['retained_mean']} (n={alloc['samples']})")
+    print(f"writes         {report['writes']} ({report['writes_per_day']}/day), "
+          f"suppressed {report['writes_suppressed']}")
+    print(f"triggers       {report['triggers']} reschedules={report['timer_reschedules']}")
+    print(f"flips          {report['flips']} (is_dark {report['flips_per_day']}/day)")
+    print(f"helpers        writes={report['helper_writes']} "
+          f"amplification={report['helper_write_amplification']}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay weather traces through the Illuminance Plus pipeline.")
+    parser.add_argument("--trace", type=Path, help="CSV trace (ts,weather,cloud,precip,visibility)")
+    parser.add_argument("--days", type=float, default=365.0, help="length of the synthetic trace")
+    parser.add_argument("--start", default="2025-01-01T00:00:00+00:00", help="start of the synthetic trace")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic trace")
+    parser.add_argument("--lat", type=float, default=52.52)
+    parser.add_argument("--lon", type=float, default=13.40)
+    parser.add_argument("--drive", choices=("minute", "scheduled"), default="minute")
+    parser.add_argument("--option", type=_option, action="append", default=[],
+                        metavar="KEY=VALUE", help="entry option override (JSON value), repeatable")
+    parser.add_argument("--no-helpers", action="store_true", help="disable the helper binary sensors")
+    parser.add_argument("--alloc-samples", type=int, default=1000, help="updates sampled with tracemalloc (0 = off)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-p99-us", type=float, help="fail if p99 latency exceeds this")
+    parser.add_argument("--max-writes-per-day", type=float, help="fail if state writes/day exceed this")
+    parser.add_argument("--max-flips-per-day", type=float, help="fail if is_dark flips/day exceed this")
+    args = parser.parse_args(argv)
+    args.option = dict(args.option)
+    args.option.setdefault("helpers_enabled", not args.no_helpers)
+
+    if args.trace:
+        rows = list(csv_trace(args.trace))
+        args.days = max(1, len(rows)) / 1440.0
+        trace: Iterator[Row] = iter(rows)
+    else:
+        start = _parse_ts(args.start)
+        trace = synthetic_trace(start, args.days, args.seed)
+
+    report = asyncio.run(Replay(args).run(trace))
+    failed = _gate(report, args)
+    if args.json:
+        print(json.dumps({**report, "gate_failures": failed}, indent=2))
+    else:
+        _print_report(report)
+        for msg in failed:
+            print(f"GATE FAILED: {msg}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
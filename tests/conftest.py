@@ -0,0 +1,31 @@
+# Illuminance Plus – Tests
+# © 2025 Martin Kluger – MIT
+
+"""Gemeinsame Test-Einrichtung.
+
+Getestet werden nur die Module ohne Home-Assistant-Importe. Damit ihr Import
+nicht ``custom_components/illuminance_plus/__init__.py`` (Plattformen,
+Dienste, HA) ausführt, wird das Paket hier als leeres Paket mit dem echten
+Suchpfad registriert; die Untermodule werden ganz normal geladen.
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PACKAGE = "custom_components.illuminance_plus"
+
+
+def _register(name: str, path: Path) -> None:
+    if name in sys.modules:
+        return
+    module = types.ModuleType(name)
+    module.__path__ = [str(path)]
+    sys.modules[name] = module
+
+
+_register("custom_components", ROOT / "custom_components")
+_register(PACKAGE, ROOT / "custom_components" / "illuminance_plus")
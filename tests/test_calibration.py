@@ -0,0 +1,45 @@
+"""Online-Kalibrierung (RLS) gegen bekannte Koeffizienten."""
+
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.illuminance_plus.calibration import MIN_SAMPLES, RlsCalibrator
+
+
+def test_learns_site_factor() -> None:
+    rng = random.Random(3)
+    cal = RlsCalibrator(4.0)
+    truth = (0.3, 1.2, 0.4, 0.5, 0.2)
+    for k in range(600):
+        x = (1.0, rng.random(), rng.random(), rng.random(), rng.random())
+        y = sum(t * f for t, f in zip(truth, x))
+        clear = 50000.0
+        cal.update(60.0 * k, x, clear, clear / math.exp(y))
+    assert cal.ready
+    for got, want in zip(cal.coefficients(), truth):
+        assert got == pytest.approx(want, abs=0.02)
+    assert cal.attributes()["rmse_log"] < 0.01
+
+
+def test_accepts_filters_samples() -> None:
+    cal = RlsCalibrator(4.0)
+    assert cal.accepts(0.0, 20.0, 50000.0, 10000.0)
+    assert not cal.accepts(0.0, 1.0, 50000.0, 10000.0)
+    assert not cal.accepts(0.0, 20.0, 50000.0, 10.0)
+    cal.update(0.0, (1.0, 0.0, 0.0, 0.0, 0.0), 50000.0, 40000.0)
+    assert not cal.accepts(30.0, 20.0, 50000.0, 10000.0)
+    assert cal.samples < MIN_SAMPLES and not cal.ready
+
+
+def test_round_trip_and_bad_restore() -> None:
+    cal = RlsCalibrator(4.0)
+    cal.update(0.0, (1.0, 0.5, 0.0, 0.0, 0.1), 50000.0, 20000.0)
+    restored = RlsCalibrator.from_dict(cal.as_dict(), 4.0)
+    assert restored.as_dict() == cal.as_dict()
+    fresh = RlsCalibrator(4.0).as_dict()
+    assert RlsCalibrator.from_dict({"theta": [1.0], "cov": []}, 4.0).as_dict() == fresh
+    assert RlsCalibrator.from_dict(None, 4.0).as_dict() == fresh
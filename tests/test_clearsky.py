@@ -0,0 +1,52 @@
+"""Clear-Sky-Tabellen: Interpolation, Dämmerung, Modus-Fallback."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.illuminance_plus.clearsky import (
+    HORIZON_LUX,
+    MODE_NORMAL,
+    MODE_SIMPLE,
+    TABLE_MIN,
+    _normal,
+    _simple,
+    clear_sky_lux,
+)
+
+CURVES = [(MODE_SIMPLE, _simple), (MODE_NORMAL, _normal)]
+
+
+@pytest.mark.parametrize(("mode", "exact"), CURVES)
+def test_table_matches_curve(mode: str, exact) -> None:
+    for i in range(-60, 901):
+        elev = i / 10.0
+        assert clear_sky_lux(elev, mode) == pytest.approx(exact(elev), rel=1e-9, abs=1e-9)
+    # zwischen den Stützstellen: linear, höchstens 2 % bzw. 10 lx daneben
+    for i in range(-600, 9000, 7):
+        elev = i / 100.0 + 0.005
+        want = exact(elev)
+        assert abs(clear_sky_lux(elev, mode) - want) <= max(10.0, 0.02 * want)
+
+
+@pytest.mark.parametrize(("mode", "_exact"), CURVES)
+def test_monotonic_and_bounded(mode: str, _exact) -> None:
+    values = [clear_sky_lux(i / 20.0, mode) for i in range(-200, 1900)]
+    assert all(b >= a for a, b in zip(values, values[1:]))
+    assert clear_sky_lux(TABLE_MIN - 5.0, mode) == 0.0
+    assert clear_sky_lux(95.0, mode) == clear_sky_lux(90.0, mode)
+
+
+def test_twilight_only_in_normal_mode() -> None:
+    assert clear_sky_lux(0.0, MODE_SIMPLE) == 0.0
+    assert clear_sky_lux(-3.0, MODE_SIMPLE) == 0.0
+    assert clear_sky_lux(0.0, MODE_NORMAL) == pytest.approx(HORIZON_LUX)
+    assert 0.0 < clear_sky_lux(-3.0, MODE_NORMAL) < HORIZON_LUX
+    # kein Sprung am Ende der Dämmerung
+    assert clear_sky_lux(TABLE_MIN + 0.05, MODE_NORMAL) < 0.5
+    assert clear_sky_lux(TABLE_MIN, MODE_NORMAL) == 0.0
+
+
+def test_unknown_mode_falls_back_to_simple() -> None:
+    for elev in (-2.0, 5.0, 42.0):
+        assert clear_sky_lux(elev, "bogus") == clear_sky_lux(elev, MODE_SIMPLE)
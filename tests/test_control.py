@@ -0,0 +1,77 @@
+"""Glättung, Hysterese und Replay vieler Kandidaten."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.illuminance_plus.control import (
+    MAX_SWITCHES,
+    candidate,
+    dark_step,
+    ema_step,
+    replay,
+)
+
+OPTS = SimpleNamespace(on_base=1000.0, off_base=2000.0, sens_pct=100.0, tau=0.0)
+
+
+def _direct(ts, raw, cand):
+    """Dieselbe Schleife wie die Entität: ema_step + dark_step je Sample."""
+    ema = dark = last = None
+    flips = 0
+    for t, lux in zip(ts, raw):
+        if lux is None:
+            continue
+        dt = 0.0 if last is None else max(1.0, t - last)
+        ema = ema_step(ema, lux, dt, cand["smooth_seconds"])
+        now = dark_step(dark, ema, cand["on_eff"], cand["off_eff"])
+        if dark is not None and now != dark:
+            flips += 1
+        dark, last = now, t
+    return flips, dark
+
+
+def test_ema_step() -> None:
+    assert ema_step(None, 10.0, 60.0, 300.0) == 10.0
+    assert ema_step(0.0, 10.0, 60.0, 0.0) == 10.0
+    assert 0.0 < ema_step(0.0, 10.0, 60.0, 300.0) < 10.0
+
+
+def test_dark_step_hysteresis() -> None:
+    assert dark_step(None, 500.0, 1000.0, 2000.0) is True
+    assert dark_step(True, 1500.0, 1000.0, 2000.0) is True
+    assert dark_step(False, 1500.0, 1000.0, 2000.0) is False
+    assert dark_step(True, 2000.0, 1000.0, 2000.0) is False
+
+
+def test_candidate_defaults_and_validation() -> None:
+    cand = candidate(OPTS, {"dark_sensitivity": 50})
+    assert cand["on_eff"] == 500.0 and cand["off_eff"] == 1000.0
+    with pytest.raises(ValueError):
+        candidate(OPTS, {"on_threshold": 3000})
+
+
+def test_replay_matches_direct_loop() -> None:
+    ts = [60.0 * k for k in range(600)]
+    raw = [None if k % 97 == 0 else 1500.0 + 1200.0 * ((k // 40) % 2 * 2 - 1) for k in range(600)]
+    cands = [
+        candidate(OPTS, {}),
+        candidate(OPTS, {"smooth_seconds": 600}),
+        candidate(OPTS, {"on_threshold": 500, "off_threshold": 2600, "smooth_seconds": 600}),
+    ]
+    results = replay(ts, raw, cands)
+    for cand, res in zip(cands, results):
+        flips, final = _direct(ts, raw, cand)
+        assert res["flips"] == flips
+        assert res["final_is_dark"] is final
+    assert results[0]["flips"] > 0
+
+
+def test_replay_truncates_switches() -> None:
+    ts = [60.0 * k for k in range(2 * MAX_SWITCHES + 10)]
+    raw = [0.0 if k % 2 else 5000.0 for k in range(len(ts))]
+    res = replay(ts, raw, [candidate(OPTS, {})])[0]
+    assert len(res["switches"]) == MAX_SWITCHES
+    assert res["switches_truncated"]
@@ -0,0 +1,101 @@
+"""Tages-Akkumulatoren: Integration und Teilung an lokaler Mitternacht."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.illuminance_plus.daily import DailyAccumulator, bucket_start
+
+BERLIN = ZoneInfo("Europe/Berlin")
+KOLKATA = ZoneInfo("Asia/Kolkata")
+
+
+def _local(tz, *args: int) -> float:
+    return datetime(*args, tzinfo=tz).timestamp()
+
+
+def test_constant_lux_integrates_to_lux_hours() -> None:
+    acc = DailyAccumulator(BERLIN)
+    t0 = _local(BERLIN, 2024, 6, 1, 10)
+    for k in range(61):
+        assert acc.add(t0 + 60.0 * k, 1000.0, False) == []
+    summary = acc.summary()
+    assert summary["date"] == "2024-06-01"
+    assert summary["lux_hours"] == pytest.approx(1000.0)
+    assert summary["dark_minutes"] == 0.0
+
+
+def test_split_at_local_midnight() -> None:
+    acc = DailyAccumulator(BERLIN)
+    before = _local(BERLIN, 2024, 6, 1, 23, 30)
+    after = _local(BERLIN, 2024, 6, 2, 0, 30)
+    acc.add(before, 0.0, True)
+    done = acc.add(after, 120.0, True)
+    assert len(done) == 1
+    day = done[0]
+    assert day["date"] == "2024-06-01"
+    # linear 0 -> 60 lx bis Mitternacht: 30 min * 30 lx = 15 lxh
+    assert day["lux_hours"] == pytest.approx(15.0)
+    assert day["dark_minutes"] == pytest.approx(30.0)
+    today = acc.summary()
+    assert today["date"] == "2024-06-02"
+    assert today["lux_hours"] == pytest.approx(45.0)   # 60 -> 120 lx über 30 min
+    assert today["dark_minutes"] == pytest.approx(30.0)
+
+
+def test_midnight_hold_keeps_unrounded_lux() -> None:
+    # so schließt die Entität den Tag, wenn der adaptive Takt nachts schläft
+    acc = DailyAccumulator(BERLIN)
+    acc.add(_local(BERLIN, 2024, 6, 1, 21), 0.4, True)
+    done = acc.add(_local(BERLIN, 2024, 6, 2), acc.last_lux, acc.last_dark)
+    assert done[0]["lux_hours"] == pytest.approx(1.2)
+    assert done[0]["dark_minutes"] == pytest.approx(180.0)
+    assert acc.last_lux == 0.4 and acc.last_dark is True
+def test_dst_day_is_23_hours() -> None:
+    acc = DailyAccumulator(BERLIN)
+    acc.add(_local(BERLIN, 2024, 3, 31, 12), 1.0, False)
+    assert acc.day_end - acc.day_start == 23 * 3600
+
+
+def test_dark_changes_and_peak() -> None:
+    acc = DailyAccumulator(timezone.utc)
+    t0 = _local(timezone.utc, 2024, 6, 1, 6)
+    acc.add(t0, 10.0, True)
+    acc.add(t0 + 600, 500.0, False)
+    acc.add(t0 + 1200, 300.0, False)
+    acc.add(t0 + 1800, 5.0, True)
+    summary = acc.summary()
+    assert summary["first_dark_change"] == datetime.fromtimestamp(t0 + 600, timezone.utc).isoformat()
+    assert summary["last_dark_change"] == datetime.fromtimestamp(t0 + 1800, timezone.utc).isoformat()
+    assert summary["peak_lux"] == 500.0
+
+
+def test_long_gap_is_not_integrated() -> None:
+    acc = DailyAccumulator(timezone.utc)
+    t0 = _local(timezone.utc, 2024, 6, 1, 1)
+    acc.add(t0, 100.0, False)
+    acc.add(t0 + timedelta(hours=7).total_seconds(), 100.0, False)
+    assert acc.summary()["lux_hours"] == 0.0
+
+
+def test_restore_does_not_integrate_downtime() -> None:
+    acc = DailyAccumulator(BERLIN)
+    t0 = _local(BERLIN, 2024, 6, 1, 10)
+    acc.add(t0, 100.0, False)
+    acc.add(t0 + 3600, 100.0, False)
+    restored = DailyAccumulator.from_dict(acc.as_dict(), BERLIN)
+    assert restored.summary() == acc.summary()
+    restored.add(t0 + 7200, 100.0, False)
+    assert restored.summary()["lux_hours"] == pytest.approx(100.0)
+
+
+def test_bucket_start_stays_in_local_day() -> None:
+    day_start = _local(KOLKATA, 2024, 6, 1)          # 18:30 UTC am Vortag
+    start = bucket_start(day_start)
+    assert start % 3600 == 0
+    assert 0 <= start - day_start < 3600
+    assert datetime.fromtimestamp(start, KOLKATA).date().isoformat() == "2024-06-01"
+    assert bucket_start(_local(BERLIN, 2024, 6, 1)) == _local(BERLIN, 2024, 6, 1)
@@ -0,0 +1,79 @@
+"""Prognose-Slots und Suche nach dem nächsten is_dark-Wechsel."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from custom_components.illuminance_plus.clearsky import MODE_SIMPLE
+from custom_components.illuminance_plus.forecaster import (
+    EMPTY_FORECAST,
+    TRANSITION_STEP,
+    HourlyForecast,
+    LuxForecaster,
+)
+from custom_components.illuminance_plus.model import LuxModel
+from custom_components.illuminance_plus.solar import SolarEphemeris
+
+EPH = SolarEphemeris(52.52, 13.405)
+MODEL = LuxModel(MODE_SIMPLE, 4.0, 2.5)
+CLEAR = (0.0, 0.0, 99.0, "sunny")
+
+
+def _ts(*args: int) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def _first_crossing(fc: LuxForecaster, start: float, is_dark: bool, on_eff: float, off_eff: float) -> float:
+    t = start
+    while True:
+        lux = fc.lux_at(t)
+        if (lux >= off_eff) if is_dark else (lux <= on_eff):
+            return t
+        t += TRANSITION_STEP
+
+
+def test_hourly_slot_lookup() -> None:
+    base = _ts(2025, 6, 21, 12)
+    hourly = HourlyForecast([(base + 3600, 80.0, None, "cloudy"), (base, 20.0, 0.5, None)])
+    assert hourly.at(base - 1) is None
+    assert hourly.at(base + 1800)[1] == 20.0
+    assert hourly.at(base + 3600)[1] == 80.0
+    assert hourly.at(base + 2 * 3600) is not None
+    assert hourly.at(base + 2 * 3600 + 1) is None
+
+
+def test_inputs_fall_back_to_current_values() -> None:
+    base = _ts(2025, 6, 21, 12)
+    hourly = HourlyForecast([(base, None, 2.0, "rainy")])
+    fc = LuxForecaster(EPH, MODEL, hourly, (30.0, 0.0, 12.0, "partlycloudy"))
+    assert fc.inputs_at(base + 60) == (30.0, 2.0, 12.0, "rainy")
+    assert fc.inputs_at(base - 60) == (30.0, 0.0, 12.0, "partlycloudy")
+
+
+def test_next_dark_change_at_dusk_and_dawn() -> None:
+    fc = LuxForecaster(EPH, MODEL, EMPTY_FORECAST, CLEAR)
+    now = _ts(2025, 6, 21, 14, 2)
+    dusk = fc.next_dark_change(now, False, 1000.0, 3000.0)
+    assert dusk is not None and dusk % TRANSITION_STEP == 0
+    assert dusk == _first_crossing(fc, _ts(2025, 6, 21, 14, 5), False, 1000.0, 3000.0)
+    assert _ts(2025, 6, 21, 17) < dusk < _ts(2025, 6, 21, 20)
+
+    night = _ts(2025, 6, 21, 22)
+    dawn = fc.next_dark_change(night, True, 1000.0, 3000.0)
+    assert dawn == _first_crossing(fc, night, True, 1000.0, 3000.0)
+    assert _ts(2025, 6, 22, 2) < dawn < _ts(2025, 6, 22, 6)
+
+
+def test_overcast_forecast_brings_dusk_forward() -> None:
+    now = _ts(2025, 6, 21, 14)
+    clear = LuxForecaster(EPH, MODEL, EMPTY_FORECAST, CLEAR)
+    slots = [(now + h * 3600, 100.0, 4.0, "pouring") for h in range(12)]
+    overcast = LuxForecaster(EPH, MODEL, HourlyForecast(slots), CLEAR)
+    assert overcast.next_dark_change(now, False, 1000.0, 3000.0) < clear.next_dark_change(
+        now, False, 1000.0, 3000.0
+    )
+
+
+def test_no_change_within_horizon() -> None:
+    fc = LuxForecaster(EPH, MODEL, EMPTY_FORECAST, CLEAR)
+    assert fc.next_dark_change(_ts(2025, 6, 21, 22), True, 1000.0, 1e9) is None
@@ -0,0 +1,75 @@
+"""Eingangsfilter: Ausreißer, echte Sprünge, Ausfälle."""
+
+from __future__ import annotations
+
+from custom_components.illuminance_plus.inputs import (
+    CONFIRM_AFTER,
+    STALE_AFTER,
+    SourceFilter,
+)
+
+
+def _settled(values=(50.0, 52.0, 51.0, 49.0)) -> SourceFilter:
+    filt = SourceFilter("number")
+    for k, v in enumerate(values):
+        filt.push(60.0 * k, v)
+    return filt
+
+
+def test_single_spike_is_rejected() -> None:
+    filt = _settled()
+    filt.push(300.0, 100.0)
+    assert filt.current(300.0) == 49.0
+    filt.push(360.0, 51.0)
+    assert filt.current(360.0) == 51.0
+    assert filt.outliers == 1
+    assert filt.steps == 0
+
+
+def test_step_confirmed_by_next_sample() -> None:
+    filt = _settled()
+    filt.push(300.0, 100.0)
+    filt.push(360.0, 98.0)
+    assert filt.current(360.0) == 98.0
+    assert filt.steps == 1
+    # Fenster startet beim neuen Niveau: kleine Schwankung dort bleibt erhalten
+    filt.push(420.0, 97.0)
+    assert filt.current(420.0) == 97.0
+
+
+def test_step_confirmed_by_time() -> None:
+    filt = _settled()
+    filt.push(300.0, 100.0)
+    assert filt.confirm_in(300.0) == CONFIRM_AFTER
+    assert filt.current(300.0 + CONFIRM_AFTER - 1) == 49.0
+    assert filt.current(300.0 + CONFIRM_AFTER) == 100.0
+    assert filt.confirm_in(300.0 + CONFIRM_AFTER) is None
+
+
+def test_small_changes_pass() -> None:
+    filt = _settled()
+    filt.push(300.0, 60.0)
+    assert filt.current(300.0) == 60.0
+
+
+def test_dropout_holds_last_value_until_stale() -> None:
+    filt = _settled()
+    assert filt.stale_in(300.0) is None
+    filt.push(300.0, None)
+    assert filt.stale_in(400.0) == STALE_AFTER - 100.0
+    assert filt.current(300.0 + STALE_AFTER) == 49.0
+    assert filt.current(301.0 + STALE_AFTER) is None
+    assert filt.health(301.0 + STALE_AFTER)["stale"]
+    # verfallen: kein weiterer Ablauf-Timer
+    assert filt.stale_in(301.0 + STALE_AFTER) is None
+    filt.push(2400.0, 50.0)
+    assert filt.stale_in(2400.0) is None
+
+
+def test_observe_counts_each_state_once() -> None:
+    filt = _settled()
+    state = object()
+    assert filt.observe(state, 300.0, None)
+    assert not filt.observe(state, 400.0, None)
+    assert filt.dropouts == 1
+    assert filt.failing_since == 300.0
@@ -0,0 +1,43 @@
+"""Stapel-API des Lux-Modells gegen die skalare Rechnung."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.illuminance_plus.clearsky import MODE_NORMAL, MODE_SIMPLE
+from custom_components.illuminance_plus.model import LuxModel, prior
+
+np = pytest.importorskip("numpy")
+
+# Dämmerung, Taper, tiefe Sonne, Mittag und jenseits der Tabelle
+ELEV = [-8.0, -6.0, -5.5, -0.3, 0.0, 4.2, 9.99, 10.0, 23.7, 61.0, 90.0, 95.0]
+CLOUD = [None, 0.0, 35.0, None, 100.0, 140.0, None, 50.0, -5.0, 80.0, None, 10.0]
+PRECIP = [0.0, 0.4, 0.0, 3.0, 0.0, 1.2, 0.0, 0.0, 0.1, 5.0, 0.0, 0.0]
+VIS = [99.0, 10.0, 6.5, 0.5, 12.0, 9.9, 3.0, 99.0, 7.0, 0.0, 15.0, 2.5]
+WEATHER = [None, "sunny", "cloudy", "fog", None, "rainy", "partlycloudy", None, "exotic", "pouring", "cloudy", None]
+
+
+def _models(mode: str) -> list[LuxModel]:
+    coef = tuple(c * 1.1 + 0.05 for c in prior(4.0))
+    return [LuxModel(mode, 4.0, 2.5), LuxModel(mode, 4.0, 2.5, coef)]
+
+
+@pytest.mark.parametrize("mode", [MODE_SIMPLE, MODE_NORMAL])
+def test_batch_matches_raw_per_sample(mode: str) -> None:
+    for model in _models(mode):
+        got = model.batch(ELEV, CLOUD, PRECIP, VIS, WEATHER)
+        want = [model.raw(*row) for row in zip(ELEV, CLOUD, PRECIP, VIS, WEATHER)]
+        assert list(got) == pytest.approx(want, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("mode", [MODE_SIMPLE, MODE_NORMAL])
+def test_batch_broadcasts_scalars(mode: str) -> None:
+    for model in _models(mode):
+        got = model.batch(ELEV, None, 0.5, 8.0, "cloudy")
+        want = [model.raw(e, None, 0.5, 8.0, "cloudy") for e in ELEV]
+        assert list(got) == pytest.approx(want, rel=1e-9, abs=1e-9)
+
+
+def test_batch_rejects_short_column() -> None:
+    with pytest.raises(ValueError):
+        LuxModel(MODE_SIMPLE, 4.0, 2.5).batch(ELEV, None, 0.0, 99.0, WEATHER[:3])
@@ -0,0 +1,57 @@
+"""States der Quellen: Einheiten-Umrechnung und fehlende Werte."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.illuminance_plus.parsing import (
+    WeatherInputs,
+    parse_number,
+    parse_precip_mm_h,
+    parse_visibility_km,
+    parse_weather,
+)
+
+
+def _state(state: str, **attrs) -> SimpleNamespace:
+    return SimpleNamespace(state=state, attributes=attrs)
+
+
+def test_weather_metric_passthrough() -> None:
+    st = _state(
+        "rainy", cloud_coverage=75, visibility=8.5, visibility_unit="km",
+        precipitation=1.2, precipitation_unit="mm/h",
+    )
+    assert parse_weather(st) == WeatherInputs("rainy", 75.0, 1.2, 8.5)
+
+
+@pytest.mark.parametrize(
+    ("visibility", "unit", "km"),
+    [(10.0, "mi", 16.0934), (3.0, "Miles", 4.82802), (2500.0, "m", 2.5), (7.0, None, 7.0)],
+)
+def test_weather_visibility_units(visibility: float, unit: str | None, km: float) -> None:
+    wx = parse_weather(_state("cloudy", visibility=visibility, visibility_unit=unit))
+    assert wx.vis == pytest.approx(km)
+
+
+@pytest.mark.parametrize("unit", ["in", "in/h", "IN/H", "inches/hour"])
+def test_weather_precipitation_inches(unit: str) -> None:
+    wx = parse_weather(_state("pouring", precipitation=0.5, precipitation_unit=unit))
+    assert wx.precip == pytest.approx(12.7)
+
+
+def test_weather_missing_and_invalid_attributes() -> None:
+    wx = parse_weather(_state("sunny", cloud_coverage="n/a", visibility=None))
+    assert wx == WeatherInputs("sunny", None, None, None)
+
+
+def test_sensor_units() -> None:
+    assert parse_precip_mm_h(_state("0.2", unit_of_measurement="in/h")) == pytest.approx(5.08)
+    assert parse_precip_mm_h(_state("1.5", unit_of_measurement="mm/h")) == 1.5
+    assert parse_visibility_km(_state("5", unit_of_measurement="mi")) == pytest.approx(8.0467)
+    assert parse_visibility_km(_state("12", unit_of_measurement="km")) == 12.0
+    assert parse_visibility_km(_state("unknown", unit_of_measurement="mi")) is None
+    assert parse_number(_state("42.5")) == 42.5
+    assert parse_number(_state("unavailable")) is None
@@ -0,0 +1,52 @@
+"""Raum-Konfiguration (YAML) und Hysterese je Raum."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.illuminance_plus.rooms import EMPTY_ROOMS, RoomConfigError, parse_rooms
+
+
+def test_parse_and_compile() -> None:
+    rooms = parse_rooms("- name: Büro\n  k: 1.5\n- name: Flur\n  sensitivity: 50\n")
+    assert rooms.names == ("Büro", "Flur")
+    rooms.compile(1000.0, 2000.0, 100.0)
+    assert list(rooms.on_eff) == [1500.0, 500.0]
+    assert list(rooms.off_eff) == [3000.0, 1000.0]
+
+
+def test_empty_input() -> None:
+    assert parse_rooms("") is EMPTY_ROOMS
+    assert parse_rooms("   ") is EMPTY_ROOMS
+    assert parse_rooms("# nur Kommentar") is EMPTY_ROOMS
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ("name: Büro", "expected a list"),
+        ("- Büro", "expected a mapping"),
+        ("- k: 1", "missing 'name'"),
+        ("- name: Büro\n  k: null", "'k' must be a number"),
+        ("- name: Büro\n  k: true", "'k' must be a number"),
+        ("- name: Büro\n  k: abc", "'k' must be a number"),
+        ("- name: Büro\n  k: 50", "between"),
+        ("- name: Büro\n  sensitivity: 1", "between"),
+        ("- name: Büro\n- name: Büro", "duplicate room name"),
+        ("- name: Living Room\n- name: living-room", "same id as 'Living Room'"),
+        ("- name: [", "invalid YAML"),
+    ],
+)
+def test_parse_errors(text: str, message: str) -> None:
+    with pytest.raises(RoomConfigError, match=message):
+        parse_rooms(text)
+
+
+def test_evaluate_hysteresis() -> None:
+    rooms = parse_rooms("- name: A\n- name: B\n  k: 2\n").compile(100.0, 200.0, 100.0)
+    state: list[bool | None] = [None, None]
+    assert rooms.evaluate(150.0, state)
+    assert state == [False, True]
+    assert not rooms.evaluate(250.0, state)   # B hält zwischen 200 und 400
+    assert rooms.evaluate(90.0, state)
+    assert state == [True, True]
@@ -0,0 +1,131 @@
+"""Adaptiver Takt: Nachtschlaf, Annäherung, Trend-Obergrenze."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.illuminance_plus.scheduler import (
+    ADAPTIVE_MAX_SECONDS,
+    ADAPTIVE_MIN_SECONDS,
+    REASON_APPROACH,
+    REASON_IDLE,
+    REASON_NIGHT,
+    REASON_CAP,
+    REASON_WINDOW,
+    ScanPlanner,
+    forecast_cap,
+    trend_cap,
+)
+from custom_components.illuminance_plus.solar import SolarEphemeris
+from custom_components.illuminance_plus.windows import parse_windows
+
+EPH = SolarEphemeris(52.52, 13.405)
+
+
+def _ts(*args: int) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def _flat(lux: float):
+    return lambda _elev: lux
+
+
+def _ramp(elev: float) -> float:
+    """100 lx je Grad Sonnenhöhe."""
+    return max(0.0, 100.0 * elev)
+
+
+def test_night_sleeps_until_dawn() -> None:
+    now = _ts(2024, 6, 21, 22)
+    elev = EPH.position(now)[0]
+    secs, reason = ScanPlanner().plan(EPH, now, elev, 0.0, True, 1000.0, 2000.0, None, _flat(0.0))
+    assert reason == REASON_NIGHT
+    assert EPH.position(now + secs)[0] == pytest.approx(-6.0, abs=0.1)
+
+
+def test_far_from_threshold_is_idle() -> None:
+    now = _ts(2024, 6, 21, 11)
+    elev = EPH.position(now)[0]
+    secs, reason = ScanPlanner().plan(EPH, now, elev, 80000.0, False, 1000.0, 2000.0, None, _flat(80000.0))
+    assert (secs, reason) == (ADAPTIVE_MAX_SECONDS, REASON_IDLE)
+
+
+def test_trend_towards_threshold_shortens_interval() -> None:
+    now = _ts(2024, 6, 21, 11)
+    elev = EPH.position(now)[0]
+    # 1100 lx, fällt um 10 lx/min auf 1000 lx zu -> 10 min bis zum Wechsel
+    secs, reason = ScanPlanner().plan(EPH, now, elev, 1100.0, False, 1000.0, 2000.0, -10.0, _flat(1100.0))
+    assert reason == REASON_APPROACH
+    assert secs == pytest.approx(300.0)
+
+
+def test_already_past_threshold_is_minimum() -> None:
+    now = _ts(2024, 6, 21, 11)
+    elev = EPH.position(now)[0]
+    secs, _reason = ScanPlanner().plan(EPH, now, elev, 900.0, False, 1000.0, 2000.0, None, _flat(900.0))
+    assert secs == ADAPTIVE_MIN_SECONDS
+
+
+def test_trend_cap_limits_daytime_interval() -> None:
+    now = _ts(2024, 6, 21, 11)
+    elev = EPH.position(now)[0]
+    cap = trend_cap(300.0)
+    assert cap == 100.0
+    secs, reason = ScanPlanner().plan(
+        EPH, now, elev, 80000.0, False, 1000.0, 2000.0, None, _flat(80000.0), cap
+    )
+    assert (secs, reason) == (cap, REASON_CAP)
+    assert trend_cap(1.0) == ADAPTIVE_MIN_SECONDS
+    assert forecast_cap(15 * 60) == 300.0
+
+
+def test_room_threshold_ahead_while_main_is_dark() -> None:
+    now = _ts(2024, 10, 17, 15)
+    elev = EPH.position(now)[0]          # ~8.7° -> ~865 lx, fällt
+    lux = _ramp(elev)
+    planner = ScanPlanner()
+    # Hauptsensor bereits dunkel, Helligkeit steigt heute nicht mehr bis 2000 lx
+    main_only = planner.plan(EPH, now, elev, lux, True, 1000.0, 2000.0, None, _ramp)
+    assert main_only == (ADAPTIVE_MAX_SECONDS, REASON_IDLE)
+    # Raum mit k = 0.3: Schwellen 300/600 lx, noch hell
+    secs, reason = planner.plan(
+        EPH, now, elev, lux, True, 1000.0, 2000.0, None, _ramp, rooms=[(300.0, 600.0, False)]
+    )
+    assert reason == REASON_APPROACH
+    assert secs < ADAPTIVE_MAX_SECONDS
+    # geplanter Zeitpunkt liegt vor dem Wechsel des Raums
+    assert _ramp(EPH.position(now + secs)[0]) > 300.0
+    assert _ramp(EPH.position(now + 2 * secs)[0]) <= 300.0 + 50.0
+
+
+def test_night_waits_for_rooms() -> None:
+    now = _ts(2024, 6, 21, 22)
+    elev = EPH.position(now)[0]
+    planner = ScanPlanner()
+    _secs, reason = planner.plan(
+        EPH, now, elev, 0.0, True, 1000.0, 2000.0, None, _flat(0.0), rooms=[(300.0, 600.0, None)]
+    )
+    assert reason != REASON_NIGHT
+    _secs, reason = planner.plan(
+        EPH, now, elev, 0.0, True, 1000.0, 2000.0, None, _flat(0.0), rooms=[(300.0, 600.0, True)]
+    )
+    assert reason == REASON_NIGHT
+
+
+def test_wakes_at_next_window_edge() -> None:
+    # Westfenster mit 60° Sichtfeld: Sonne tritt bei Azimut 240° ein
+    windows = parse_windows("- name: West\n  azimuth: 270\n  fov: 60\n")
+    now = _ts(2024, 6, 21, 13, 30)
+    elev, az = EPH.position(now)
+    assert az < 240.0
+
+    def window_fn(e: float, a: float) -> int:
+        return windows.mask(e, a, 0.0, False)
+
+    secs, reason = ScanPlanner().plan(
+        EPH, now, elev, 80000.0, False, 1000.0, 2000.0, None, _flat(80000.0), window_fn=window_fn
+    )
+    assert reason == REASON_WINDOW
+    assert EPH.position(now + secs - 60.0)[1] < 240.0 <= EPH.position(now + secs)[1]
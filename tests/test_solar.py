@@ -0,0 +1,57 @@
+"""Sonnenstand (NOAA) und Tagestabellen."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.illuminance_plus.solar import SolarEphemeris, solar_position
+
+BERLIN = (52.52, 13.405)
+
+
+def _ts(*args: int) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_equinox_noon_at_equator_is_near_zenith() -> None:
+    elev, _az = solar_position(_ts(2024, 3, 20, 12, 7), 0.0, 0.0)
+    assert elev == pytest.approx(90.0, abs=0.5)
+
+
+def test_berlin_summer_solstice_noon() -> None:
+    # Sonnenhöchststand ~11:08 UTC; 90 - 52.52 + 23.44 = 60.9°
+    elev, az = solar_position(_ts(2024, 6, 21, 11, 8), *BERLIN)
+    assert elev == pytest.approx(60.9, abs=0.2)
+    assert az == pytest.approx(180.0, abs=2.0)
+
+
+def test_berlin_winter_midnight_is_below_horizon() -> None:
+    elev, _az = solar_position(_ts(2024, 12, 21, 23, 0), *BERLIN)
+    assert elev < -50.0
+
+
+def test_morning_azimuth_is_east() -> None:
+    _elev, az = solar_position(_ts(2024, 3, 20, 6, 0), *BERLIN)
+    assert 60.0 < az < 120.0
+
+
+def test_table_matches_direct_computation() -> None:
+    eph = SolarEphemeris(*BERLIN)
+    start = _ts(2024, 6, 21)
+    for offset in range(0, 86400, 977):
+        ts = start + offset + 13.5
+        elev, az = eph.position(ts)
+        ref_elev, ref_az = solar_position(ts, *BERLIN)
+        assert elev == pytest.approx(ref_elev, abs=0.02)
+        assert min(abs(az - ref_az), 360.0 - abs(az - ref_az)) < 0.1
+
+
+def test_crossings_sunrise_and_sunset() -> None:
+    eph = SolarEphemeris(*BERLIN)
+    table = eph.table(_ts(2024, 6, 21, 12))
+    events = table.crossings((0.0,))
+    assert [rising for _ts_, _thr, rising in events] == [True, False]
+    for ts, _thr, _rising in events:
+        assert solar_position(ts, *BERLIN)[0] == pytest.approx(0.0, abs=0.05)
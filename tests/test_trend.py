@@ -0,0 +1,74 @@
+"""Trend-Fenster gegen eine direkte Berechnung."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from custom_components.illuminance_plus.trend import TrendWindow
+
+
+def _brute_slope(samples: list[tuple[float, float]]) -> float | None:
+    n = len(samples)
+    if n < 2:
+        return None
+    mt = sum(t for t, _ in samples) / n
+    my = sum(y for _, y in samples) / n
+    den = sum((t - mt) ** 2 for t, _ in samples)
+    if den == 0:
+        return None
+    return sum((t - mt) * (y - my) for t, y in samples) / den * 60.0
+
+
+def test_slope_min_max_mean_match_brute_force() -> None:
+    rng = random.Random(7)
+    win = TrendWindow(900.0, capacity=64)
+    samples: list[tuple[float, float]] = []
+    t = 1.7e9
+    for _ in range(2000):
+        t += rng.uniform(5.0, 120.0)
+        y = rng.uniform(0.0, 20000.0)
+        win.push(t, y)
+        samples = [(st, sy) for st, sy in samples if st >= t - 900.0] + [(t, y)]
+        samples = samples[-64:]
+        assert len(win) == len(samples)
+        expected = _brute_slope(samples)
+        if expected is None:
+            assert win.slope_per_min() is None
+        else:
+            assert win.slope_per_min() == pytest.approx(expected, rel=1e-6, abs=1e-6)
+        ys = [sy for _, sy in samples]
+        assert win.min() == min(ys)
+        assert win.max() == max(ys)
+        assert win.mean() == pytest.approx(sum(ys) / len(ys))
+
+
+def test_linear_ramp() -> None:
+    win = TrendWindow(300.0)
+    for k in range(20):
+        win.push(1000.0 + 30.0 * k, 500.0 - 2.0 * k)
+    # -2 lx je 30 s = -4 lx/min
+    assert win.slope_per_min() == pytest.approx(-4.0)
+
+
+def test_single_sample_and_out_of_order() -> None:
+    win = TrendWindow(300.0)
+    win.push(100.0, 1.0)
+    assert win.slope_per_min() is None
+    win.push(50.0, 5.0)
+    assert len(win) == 1
+
+
+def test_restore_drops_old_samples() -> None:
+    win = TrendWindow(300.0)
+    win.load([[0.0, 1.0], [800.0, 2.0], [900.0, 3.0], ["x", 1]], now=1000.0)
+    assert win.samples() == [[800.0, 2.0], [900.0, 3.0]]
+
+
+def test_shrinking_window_evicts() -> None:
+    win = TrendWindow(900.0)
+    for k in range(10):
+        win.push(60.0 * k, float(k))
+    win.set_window(120.0)
+    assert [t for t, _ in win.samples()] == [420.0, 480.0, 540.0]
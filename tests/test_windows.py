@@ -0,0 +1,52 @@
+"""Fenster-Konfiguration und Sonne im Sichtfeld."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.illuminance_plus.windows import WindowConfigError, parse_windows
+
+WINDOWS = """
+- name: Süd
+  azimuth: 180
+  fov: 90
+- name: Nord
+  azimuth: 0
+  elev_min: 5
+"""
+
+
+def test_sun_in_field_of_view() -> None:
+    table = parse_windows(WINDOWS)
+    res = table.evaluate(30.0, 200.0, 50000.0, glare=False)
+    assert res["Süd"]["sun"]
+    assert not res["Nord"]["sun"]
+    assert res["Süd"]["incidence"] == pytest.approx(0.81, abs=0.01)
+    assert "glare" not in res["Süd"]
+
+
+def test_no_sun_below_horizon_or_elev_min() -> None:
+    table = parse_windows(WINDOWS)
+    assert not table.evaluate(-1.0, 180.0, 0.0, glare=False)["Süd"]["sun"]
+    assert not table.evaluate(3.0, 10.0, 1000.0, glare=False)["Nord"]["sun"]
+
+
+def test_glare_flags() -> None:
+    table = parse_windows(WINDOWS)
+    res = table.evaluate(20.0, 180.0, 100000.0, glare=True)
+    assert res["Süd"]["glare"]
+    assert not res["Nord"]["glare"]
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ("- name: A", "missing 'azimuth'"),
+        ("- name: A\n  azimuth: 400", "between"),
+        ("- name: A\n  azimuth: 10\n- name: A\n  azimuth: 20", "duplicate window name"),
+        ("{}", "expected a list"),
+    ],
+)
+def test_parse_errors(text: str, message: str) -> None:
+    with pytest.raises(WindowConfigError, match=message):
+        parse_windows(text)